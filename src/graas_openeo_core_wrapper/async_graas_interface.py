@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import weakref
+from graas_openeo_core_wrapper.config import Config as GRaaSConfig
+from graas_openeo_core_wrapper.graas_interface import GRaaSInterface
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+__license__ = "Apache License, Version 2.0"
+__author__ = "Sören Gebbert"
+__copyright__ = "Copyright 2018, Sören Gebbert"
+__maintainer__ = "Soeren Gebbert"
+__email__ = "soerengebbert@googlemail.com"
+
+
+# The client sessions that are shared by all AsyncGRaaSInterface instances, one for each event loop
+_SESSIONS = weakref.WeakKeyDictionary()
+
+
+async def close_sessions():
+    """Close the shared client session of the running event loop
+
+    This coroutine should be awaited before the event loop is closed.
+    """
+    loop = asyncio.get_event_loop()
+    session = _SESSIONS.pop(loop, None)
+    if session is not None:
+        await session.close()
+
+
+class AsyncGRaaSInterface(object):
+    """The asyncio counterpart of the GRaaSInterface
+
+    All backend operations are coroutines that share a single pooled aiohttp client session
+    per event loop, so that many backend calls can be in flight concurrently without
+    blocking a thread per call. The return values are identical to the GRaaSInterface methods.
+    """
+
+    def __init__(self, config=None):
+
+        if aiohttp is None:
+            raise Exception("The aiohttp package is required for the asynchronous GRaaS interface")
+
+        if config is None:
+            config = GRaaSConfig
+
+        self.config = config
+        self.host = config.HOST
+        self.port = config.PORT
+        self.base_url = "%(host)s:%(port)s" % {"host": self.host, "port": self.port}
+        self.auth = aiohttp.BasicAuth(config.USER, config.PASSWORD)
+        self.user = config.USER
+
+    layer_def_to_components = staticmethod(GRaaSInterface.layer_def_to_components)
+
+    def _get_session(self):
+        """Return the client session of the running event loop, create it if required
+
+        :return: A aiohttp.ClientSession object
+        """
+        loop = asyncio.get_event_loop()
+        session = _SESSIONS.get(loop)
+
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(limit=self.config.ASYNC_HTTP_LIMIT,
+                                             limit_per_host=self.config.ASYNC_HTTP_LIMIT_PER_HOST)
+            timeout = aiohttp.ClientTimeout(connect=self.config.HTTP_CONNECT_TIMEOUT,
+                                            sock_read=self.config.HTTP_READ_TIMEOUT)
+            session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+            _SESSIONS[loop] = session
+
+        return session
+
+    async def _send_request(self, method, url, json=None, auth=True):
+        """Send a request to the GRaaS backend and return the status code, the text and the parsed json content
+
+        :param method: The HTTP method
+        :param url: The URL of the request
+        :param json: The optional json content of the request
+        :param auth: Set True to authenticate the request
+        :return: (status_code, text, json_data) json_data is None if the status code is not 200
+        """
+        session = self._get_session()
+        async with session.request(method, url, json=json,
+                                   auth=self.auth if auth is True else None) as r:
+            text = await r.text()
+            json_data = None
+
+            if r.status == 200:
+                json_data = await r.json(content_type=None)
+
+            return r.status, text, json_data
+
+    async def check_health(self):
+
+        url = self.base_url + "/health_check"
+        status, text, data = await self._send_request("GET", url, auth=False)
+
+        if status == 200:
+            return True
+
+        return False
+
+    async def _send_get_request(self, url):
+        status, data, ret = await self._send_request("GET", url)
+
+        if status == 200:
+            data = ret["process_results"]
+
+        return status, data
+
+    async def _send_post_request(self, url, process_chain):
+        """Send a post request and return the return status and the GRaaS response
+
+        :param url:
+        :param process_chain:
+        :return:
+        """
+        status, data, ret = await self._send_request("POST", url, json=process_chain)
+
+        if status == 200:
+            data = ret
+
+        return status, data
+
+    async def resource_info(self, resource_id):
+        url = "%(base)s/status/%(user)s/%(rid)s" % {"base": self.base_url, "user": self.user, "rid": resource_id}
+        status, data, ret = await self._send_request("GET", url)
+
+        if status == 200:
+            data = ret
+
+        return status, data
+
+    async def delete_resource(self, resource_id):
+        url = "%(base)s/status/%(user)s/%(rid)s" % {"base": self.base_url, "user": self.user, "rid": resource_id}
+        status, data, ret = await self._send_request("DELETE", url)
+
+        if status == 200:
+            data = ret
+
+        return status, data
+
+    async def list_mapsets(self, location):
+        url = "%(base)s/locations/%(location)s/mapsets" % {"base": self.base_url,
+                                                           "location": location}
+        return await self._send_get_request(url)
+
+    async def mapset_info(self, location, mapset):
+        url = "%(base)s/locations/%(location)s/mapsets/%(mapset)s/info" % {"base": self.base_url,
+                                                                           "location": location,
+                                                                           "mapset": mapset}
+        return await self._send_get_request(url)
+
+    async def list_raster(self, location, mapset):
+        url = "%(base)s/locations/%(location)s/mapsets/%(mapset)s/raster_layers" % {"base": self.base_url,
+                                                                                    "location": location,
+                                                                                    "mapset": mapset}
+        return await self._send_get_request(url)
+
+    async def list_vector(self, location, mapset):
+        url = "%(base)s/locations/%(location)s/mapsets/%(mapset)s/vector_layers" % {"base": self.base_url,
+                                                                                    "location": location,
+                                                                                    "mapset": mapset}
+        return await self._send_get_request(url)
+
+    async def list_strds(self, location, mapset):
+        url = "%(base)s/locations/%(location)s/mapsets/%(mapset)s/strds" % {"base": self.base_url,
+                                                                            "location": location,
+                                                                            "mapset": mapset}
+        return await self._send_get_request(url)
+
+    async def layer_info(self, layer_name):
+        """Return informations about the requested layer, that can be of type raster, vector or strds
+
+        :param layer_name:
+        :return:
+        """
+        location, mapset, datatype, layer = self.layer_def_to_components(layer_name)
+        if datatype == "raster":
+            datatype = "raster_layers"
+        if datatype == "vector":
+            datatype = "vector_layers"
+        url = "%(base)s/locations/%(location)s/mapsets/%(mapset)s/%(dtype)s/%(layer)s" % {"base": self.base_url,
+                                                                                          "location": location,
+                                                                                          "mapset": mapset,
+                                                                                          "dtype": datatype,
+                                                                                          "layer": layer}
+        return await self._send_get_request(url)
+
+    async def check_layer_exists(self, layer_name):
+        """Return True if the layer exists, False otherwise
+
+        :param layer_name: The name of the layer
+        :return: True if the layer exists, False otherwise
+        """
+        status_code, layer_info = await self.layer_info(layer_name=layer_name)
+
+        if status_code != 200:
+            return False
+
+        return True
+
+    async def async_persistent_processing(self, location, mapset, process_chain):
+        """Send a process chain to the graas backend to be run asynchronously in a persistent database
+
+        :param location: The location in which to process
+        :param mapset: The new mapset to generate
+        :param process_chain: The process chain that must be executed
+        :return: Status code and the json data (status, json)
+        """
+
+        url = "%(base)s/locations/%(location)s/mapsets/%(mapset)s/processing_async" % {"base": self.base_url,
+                                                                                       "location": location,
+                                                                                       "mapset": mapset}
+        return await self._send_post_request(url=url, process_chain=process_chain)
+
+    async def async_ephemeral_processing(self, location, process_chain):
+        """Send a process chain to the graas backend to be run asynchronously in a ephemeral database
+
+        :param location: The location in which to process
+        :param process_chain: The process chain that must be executed
+        :return: Status code and the json data (status, json)
+        """
+
+        url = "%(base)s/locations/%(location)s/processing_async" % {"base": self.base_url,
+                                                                    "location": location}
+        return await self._send_post_request(url=url, process_chain=process_chain)
+
+    async def async_ephemeral_processing_export(self, location, process_chain):
+        """Send a process chain to the graas backend to be run asynchronously in a ephemeral database
+        with export capabilities
+
+        :param location: The location in which to process
+        :param process_chain: The process chain that must be executed
+        :return: Status code and the json data (status, json)
+        """
+
+        url = "%(base)s/locations/%(location)s/processing_async_export_gcs" % {"base": self.base_url,
+                                                                               "location": location}
+        return await self._send_post_request(url=url, process_chain=process_chain)
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+from collections import OrderedDict
+
+__license__ = "Apache License, Version 2.0"
+__author__ = "Sören Gebbert"
+__copyright__ = "Copyright 2018, Sören Gebbert"
+__maintainer__ = "Soeren Gebbert"
+__email__ = "soerengebbert@googlemail.com"
+
+
+class TTLCache(object):
+    """A bounded and thread safe LRU cache with a time to live for each entry
+
+    Entries that expired are not returned by get(). If a stale time to live is set,
+    get_or_load() will serve expired entries for that additional amount of time and
+    refresh them in a background thread (stale-while-revalidate).
+    """
+
+    def __init__(self, maxsize, ttl=None, stale_ttl=0):
+        """Constructor
+
+        :param maxsize: The maximum number of entries, the least recently used entry is removed first
+        :param ttl: The default time to live in seconds of an entry, None for no expiration
+        :param stale_ttl: The number of seconds an expired entry is served while it is refreshed
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.RLock()
+        # Incremented by each invalidation, values that were loaded before an invalidation are not stored
+        self._generation = 0
+
+    def _lookup(self, key):
+        """Return the (value, expires) entry and move it to the end of the LRU order
+
+        :param key: The key of the entry
+        :return: (value, expires) or None if the key is not in the cache
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def get(self, key, default=None):
+        """Return the value of a key that is not expired
+
+        :param key: The key of the entry
+        :param default: The value that is returned if the key is not in the cache or expired
+        :return: The cached value or the default
+        """
+        with self._lock:
+            entry = self._lookup(key)
+
+        if entry is None:
+            return default
+
+        value, expires = entry
+        if expires is not None and expires <= time.monotonic():
+            return default
+
+        return value
+
+    def put(self, key, value, ttl=-1):
+        """Store a value in the cache
+
+        :param key: The key of the entry
+        :param value: The value to store
+        :param ttl: The time to live in seconds of this entry, None for no expiration.
+                    The default time to live of the cache is used if not set.
+        """
+        if ttl == -1:
+            ttl = self.ttl
+
+        expires = None
+        if ttl is not None:
+            expires = time.monotonic() + ttl
+
+        with self._lock:
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get_or_load(self, key, loader, cache_if=None):
+        """Return the cached value of a key or load and store it
+
+        Expired entries within the stale time to live are returned immediately,
+        while a single background thread per key reloads them.
+
+        :param key: The key of the entry
+        :param loader: A callable without arguments that returns the value
+        :param cache_if: A callable that gets the loaded value and returns False if it must not be cached
+        :return: The cached or loaded value
+        """
+        with self._lock:
+            entry = self._lookup(key)
+
+        if entry is not None:
+            value, expires = entry
+            now = time.monotonic()
+
+            if expires is None or expires > now:
+                return value
+
+            if expires + self.stale_ttl > now:
+                self._refresh(key, loader, cache_if)
+                return value
+
+        return self._load(key, loader, cache_if)
+
+    def _load(self, key, loader, cache_if):
+        with self._lock:
+            generation = self._generation
+
+        value = loader()
+
+        with self._lock:
+            # The value may have been loaded from the state before the invalidation
+            if generation == self._generation and (cache_if is None or cache_if(value)):
+                self.put(key, value)
+
+        return value
+
+    def _refresh(self, key, loader, cache_if):
+        """Reload the value of a key in a background thread, if no other thread refreshes it already"""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                self._load(key, loader, cache_if)
+            except Exception:
+                # Keep the stale entry, the next access will try again
+                pass
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        thread = threading.Thread(target=run)
+        thread.daemon = True
+        thread.start()
+
+    def invalidate(self, key):
+        """Remove a key from the cache
+
+        :param key: The key of the entry
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+            self._generation += 1
+
+    def invalidate_if(self, predicate):
+        """Remove all keys from the cache for which the predicate returns True
+
+        :param predicate: A callable that gets the key and returns True if the entry must be removed
+        """
+        with self._lock:
+            for key in [key for key in self._entries if predicate(key)]:
+                del self._entries[key]
+            self._generation += 1
+
+    def clear(self):
+        """Remove all entries from the cache"""
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
@@ -13,6 +13,7 @@ __email__ = "soerengebbert@googlemail.com"
 GRAAS_CAPABILITIES=["/capabilities",
                     "/data",
                     "/data/{product_id}",
+                    "/data_batch",
                     '/processes',
                     '/processes/{process_id}',
                     '/jobs',
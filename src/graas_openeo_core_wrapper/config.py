@@ -19,3 +19,97 @@ class Config(object):
     PASSWORD="abcdefgh"
     # The database file that stores the graphs
     GRAPH_DB="%s/.graph_db_file.sqlite"%os.environ["HOME"]
+    # The number of host connection pools that are cached by the shared HTTP session
+    HTTP_POOL_CONNECTIONS=10
+    # The maximum number of keep-alive connections per host
+    HTTP_POOL_MAXSIZE=32
+    # Block if all connections to a host are in use instead of opening throw-away connections
+    HTTP_POOL_BLOCK=False
+    # The connect and read timeout in seconds of backend requests
+    HTTP_CONNECT_TIMEOUT=5
+    HTTP_READ_TIMEOUT=60
+    # The maximum number of requests per second that are sent to the backend and the number of
+    # requests that can be sent at once. Set BACKEND_RATE_LIMIT None to disable the rate limit.
+    BACKEND_RATE_LIMIT=50
+    BACKEND_RATE_BURST=100
+    # The maximum number of seconds a request waits for the rate limit before it fails
+    BACKEND_RATE_LIMIT_TIMEOUT=10
+    # The number of retries of failed GET requests, the delay before a retry is a random number
+    # of seconds up to BACKEND_RETRY_BACKOFF * 2^retry and at most BACKEND_RETRY_MAX_BACKOFF
+    BACKEND_RETRIES=2
+    BACKEND_RETRY_BACKOFF=0.2
+    BACKEND_RETRY_MAX_BACKOFF=2
+    # The circuit breaker rejects all requests to the backend after BACKEND_CIRCUIT_FAILURES
+    # consecutive failures, after BACKEND_CIRCUIT_RESET_TIMEOUT seconds the health check decides
+    # whether the requests are sent again
+    BACKEND_CIRCUIT_FAILURES=5
+    BACKEND_CIRCUIT_RESET_TIMEOUT=30
+    # The maximum number of last successful GET responses that are returned while the backend is unavailable
+    BACKEND_LAST_RESPONSE_CACHE_SIZE=4096
+    # The maximum number of concurrent connections of the asyncio client, overall and per host
+    ASYNC_HTTP_LIMIT=256
+    ASYNC_HTTP_LIMIT_PER_HOST=128
+    # The maximum number of backend calls that are run concurrently for a fan-out, like the data listing
+    BACKEND_MAX_CONCURRENCY=16
+    # The maximum number of cached mapset and layer listings, their time to live in seconds
+    # and the number of seconds an expired listing is served while it is refreshed in the background
+    CATALOGUE_CACHE_SIZE=4096
+    CATALOGUE_CACHE_TTL=60
+    CATALOGUE_CACHE_STALE_TTL=600
+    # The maximum number of cached layer and mapset metadata entries and their time to live in seconds
+    METADATA_CACHE_SIZE=4096
+    METADATA_CACHE_TTL=300
+    # The maximum number of product ids that can be requested with a single batch request
+    DATA_BATCH_MAX_PRODUCTS=1000
+    # The maximum number of compiled process graphs that are cached
+    PROCESS_GRAPH_CACHE_SIZE=1024
+    # The maximum age in seconds of a finished job whose results are reused for an identical
+    # process graph, set None to disable the reuse of results
+    JOB_REUSE_MAX_AGE=3600
+    # The number of jobs that are remembered for each process graph
+    JOB_REUSE_HISTORY=10
+    # The maximum number of seconds that a new job waits for the states of the remembered jobs
+    JOB_REUSE_LOOKUP_TIMEOUT=5
+    # The edge length in map units of the tiles that large filter_bbox extents are split into,
+    # each tile is processed by a separate backend job. Set None to disable the tiling by default.
+    JOB_TILE_SIZE=None
+    # The number of cells by which the tiles overlap their neighbours
+    JOB_TILE_OVERLAP=0
+    # The maximum number of tiles of a single job
+    JOB_MAX_TILES=64
+    # The number of parts of the date range that time reductions like min_time are split into,
+    # each part is processed by a separate backend job. Set None to disable the splitting by default.
+    JOB_TIME_CHUNKS=None
+    # The maximum number of time chunks of a single job
+    JOB_MAX_TIME_CHUNKS=32
+    # The maximum number of job states that are kept in memory
+    JOB_STATUS_CACHE_SIZE=4096
+    # The job state poller requests the state of a new job every JOB_POLLER_MIN_INTERVAL seconds,
+    # the interval grows by the factor JOB_POLLER_BACKOFF with each request that did not change
+    # the job status, up to JOB_POLLER_MAX_INTERVAL seconds
+    JOB_POLLER_MIN_INTERVAL=1
+    JOB_POLLER_MAX_INTERVAL=30
+    JOB_POLLER_BACKOFF=1.5
+    # The maximum number of job states that the poller requests concurrently
+    JOB_POLLER_BATCH_SIZE=16
+    # The number of consecutive temporary failures after which a job is not requested anymore,
+    # until a client requests its state again
+    JOB_POLLER_MAX_TRANSIENT_FAILURES=10
+    # Request the states of the jobs of the graph db that did not reach a terminal state when the
+    # poller starts, so that the states of jobs submitted before a restart are refreshed as well
+    JOB_POLLER_TRACK_STORED_JOBS=True
+    # The maximum number of seconds a GET /jobs/{job_id}?wait=<seconds> request blocks
+    JOB_WAIT_MAX_TIMEOUT=60
+    # The maximum number of seconds an event stream of a job is kept open and the number of
+    # seconds after which a keep-alive comment is sent if the job state did not change
+    JOB_EVENTS_MAX_DURATION=3600
+    JOB_EVENTS_KEEPALIVE=15
+    # The maximum number of jobs that run on the backend at the same time, further jobs are
+    # queued and submitted when a running job finished. Set None to disable the limit.
+    JOB_QUEUE_MAX_RUNNING=16
+    # The maximum number of jobs of a single user that run at the same time, None for no limit
+    JOB_QUEUE_MAX_RUNNING_PER_USER=4
+    # The maximum number of queued jobs of a single user, further jobs are rejected with 429
+    JOB_QUEUE_MAX_QUEUED_PER_USER=100
+    # The range -JOB_QUEUE_MAX_PRIORITY to JOB_QUEUE_MAX_PRIORITY of the priority query parameter
+    JOB_QUEUE_MAX_PRIORITY=10
@@ -2,6 +2,8 @@
 from openeo_core.data import Data, GET_DATA_DOC
 from openeo_core.definitions import DataSetListEntry, DataSetInfo
 from graas_openeo_core_wrapper.graas_interface import GRaaSInterface
+from graas_openeo_core_wrapper.executor import run_concurrently
+from functools import partial
 from flask import make_response, jsonify
 from flask_restful_swagger_2 import swagger
 from graas_openeo_core_wrapper.config import Config
@@ -13,6 +15,60 @@ __maintainer__ = "Soeren Gebbert"
 __email__ = "soerengebbert@googlemail.com"
 
 
+# The layer types that are listed for each mapset and their description
+DATASET_TYPES = [("strds", "Space time raster dataset"),
+                 ("raster", "Raster dataset")]
+
+
+def list_datasets(iface, locations):
+    """List the datasets of all mapsets in the provided locations
+
+    All mapsets of all locations are listed concurrently. The result is ordered by location,
+    mapset and dataset type, independent of the order in which the backend calls finished.
+    Failing backend calls do not abort the listing, they are reported in the error list.
+
+    :param iface: The GRaaSInterface object
+    :param locations: The list of location names
+    :return: (dataset_list, error_list)
+    """
+    dataset_list = []
+    error_list = []
+
+    results = run_concurrently([partial(iface.list_mapsets, location=location) for location in locations],
+                               return_exceptions=True)
+
+    layer_requests = []
+    for location, result in zip(locations, results):
+        if isinstance(result, Exception) or result[0] != 200:
+            error_list.append("An internal error occurred while catching mapsets "
+                              "from location %s!" % location)
+            continue
+
+        for mapset in result[1]:
+            for datatype, description in DATASET_TYPES:
+                layer_requests.append((location, mapset, datatype, description))
+
+    listing_functions = {"strds": iface.list_strds, "raster": iface.list_raster}
+    results = run_concurrently([partial(listing_functions[datatype], location=location, mapset=mapset)
+                                for location, mapset, datatype, description in layer_requests],
+                               return_exceptions=True)
+
+    for (location, mapset, datatype, description), result in zip(layer_requests, results):
+        if isinstance(result, Exception) or result[0] != 200:
+            error_list.append("An internal error occurred while catching %s layers "
+                              "from mapset %s/%s!" % (datatype, location, mapset))
+            continue
+
+        for entry in result[1]:
+            product_id = "%s.%s.%s.%s" % (location, mapset, datatype, entry)
+            ds = DataSetListEntry(product_id=product_id, description=description,
+                                  source="GRASS GIS location/mapset path: "
+                                         "/%s/%s" % (location, mapset))
+            dataset_list.append(ds)
+
+    return dataset_list, error_list
+
+
 class GRaaSData(Data):
 
     def __init__(self):
@@ -21,42 +77,14 @@ class GRaaSData(Data):
     @swagger.doc(GET_DATA_DOC)
     def get(self, ):
 
-        dataset_list = []
-
-        for location in Config.LOCATIONS:
-
-            status_code, mapsets = self.iface.list_mapsets(location=location)
-            if status_code != 200:
-                return make_response(jsonify({"description":"An internal error occurred "
-                                                            "while catching mapset "
-                                                            "from location %s!"%location}, 400))
-
-            for mapset in mapsets:
-
-                # List strds maps from the GRASS location
-                status_code, strds_data = self.iface.list_strds(location=location, mapset=mapset)
-                if status_code != 200:
-                    return make_response(jsonify({"description":"An internal error occurred "
-                                                                "while catching strds layers!"}, 400))
-
-                for entry in strds_data:
-                    strds_id = "%s.%s.strds.%s"%(location, mapset, entry)
-                    ds = DataSetListEntry(product_id=strds_id, description="Space time raster dataset",
-                                          source="GRASS GIS location/mapset path: "
-                                                 "/%s/%s"%(location, mapset))
-                    dataset_list.append(ds)
-
-                # List raster maps from the GRASS location
-                status_code, raster_data = self.iface.list_raster(location=location, mapset=mapset)
-                if status_code != 200:
-                    return make_response(jsonify({"description":"An internal error occurred "
-                                                                "while catching strds layers!"}, 400))
-
-                for entry in raster_data:
-                    raster_id = "%s.%s.raster.%s"%(location, mapset, entry)
-                    ds = DataSetListEntry(product_id=raster_id, description="Raster dataset",
-                                          source="GRASS GIS location/mapset path: "
-                                                 "/%s/%s"%(location, mapset))
-                    dataset_list.append(ds)
-
-        return make_response(jsonify(dataset_list), 200)
+        dataset_list, error_list = list_datasets(self.iface, Config.LOCATIONS)
+
+        if error_list and not dataset_list:
+            return make_response(jsonify({"description": " ".join(error_list)}), 400)
+
+        response = make_response(jsonify(dataset_list), 200)
+        # Report the parts of the listing that are missing due to backend errors
+        for error in error_list:
+            response.headers.add("Warning", '199 graas "%s"' % error)
+
+        return response
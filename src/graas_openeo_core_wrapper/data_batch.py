@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+from functools import partial
+from flask import make_response, jsonify, request
+from flask_restful_swagger_2 import swagger, Resource
+from graas_openeo_core_wrapper.config import Config
+from graas_openeo_core_wrapper.data_product_id import create_product_info
+from graas_openeo_core_wrapper.executor import run_concurrently
+from graas_openeo_core_wrapper.graas_interface import GRaaSInterface
+
+__license__ = "Apache License, Version 2.0"
+__author__ = "Sören Gebbert"
+__copyright__ = "Copyright 2018, Sören Gebbert"
+__maintainer__ = "Soeren Gebbert"
+__email__ = "soerengebbert@googlemail.com"
+
+
+POST_DATA_BATCH_DOC = {
+    "summary": "Returns the description of many datasets in a single request",
+    "description": "The request body is a JSON object with a list of product ids: "
+                   "{\"product_ids\": [\"location.mapset.datatype.layer\", ...]}. "
+                   "The response contains the descriptions of all products that were found, "
+                   "identical to GET /data/{product_id}, in the order of the request "
+                   "and an error entry for each product that could not be resolved.",
+    "tags": ["Data Discovery"],
+    "parameters": [
+        {
+            "name": "product_ids",
+            "in": "body",
+            "required": True,
+            "description": "The list of product ids",
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "product_ids": {
+                        "type": "array",
+                        "items": {"type": "string"}
+                    }
+                }
+            }
+        }
+    ],
+    "responses": {
+        "200": {"description": "An object with the list of product descriptions "
+                               "and the list of errors"},
+        "400": {"description": "The request body is not a valid list of product ids"}
+    }
+}
+
+
+def get_product_infos(iface, product_ids):
+    """Create the product descriptions of many product ids
+
+    The layer information of all products and the mapset information of all involved
+    mapsets are requested concurrently, each mapset is requested only once.
+
+    :param iface: The GRaaSInterface object
+    :param product_ids: The list of product ids in the form location.mapset.datatype.layer
+    :return: (product_info_list, error_list)
+    """
+    product_info_list = []
+    error_list = []
+
+    valid_ids = []
+    mapsets = []
+    for product_id in product_ids:
+        location, mapset, datatype, layer = iface.layer_def_to_components(product_id)
+        if location is None:
+            error_list.append({"product_id": product_id,
+                               "description": "The product id must be of form location.mapset.datatype.layer"})
+            continue
+
+        valid_ids.append(product_id)
+        if (location, mapset) not in mapsets:
+            mapsets.append((location, mapset))
+
+    calls = [partial(iface.layer_info, layer_name=product_id) for product_id in valid_ids]
+    calls.extend([partial(iface.mapset_info, location=location, mapset=mapset) for location, mapset in mapsets])
+    results = run_concurrently(calls, return_exceptions=True)
+
+    mapset_results = dict(zip(mapsets, results[len(valid_ids):]))
+
+    for product_id, result in zip(valid_ids, results[:len(valid_ids)]):
+        location, mapset, datatype, layer = iface.layer_def_to_components(product_id)
+        mapset_result = mapset_results[(location, mapset)]
+
+        if isinstance(result, Exception) or result[0] != 200:
+            error_list.append({"product_id": product_id,
+                               "description": "An internal error occurred while catching GRASS GIS "
+                                              "layer information for layer <%s>!" % product_id})
+            continue
+
+        if isinstance(mapset_result, Exception) or mapset_result[0] != 200:
+            error_list.append({"product_id": product_id,
+                               "description": "An internal error occurred while catching mapset info "
+                                              "for mapset <%s>!" % mapset})
+            continue
+
+        try:
+            product_info_list.append(create_product_info(product_id, result[1], mapset_result[1]))
+        except Exception as e:
+            error_list.append({"product_id": product_id,
+                               "description": "The information of product <%s> could not be "
+                                              "created: %s" % (product_id, str(e))})
+
+    return product_info_list, error_list
+
+
+class GRaaSDataBatch(Resource):
+
+    def __init__(self):
+        self.iface = GRaaSInterface()
+
+    @swagger.doc(POST_DATA_BATCH_DOC)
+    def post(self):
+
+        content = request.get_json(silent=True)
+
+        if not isinstance(content, dict) or not isinstance(content.get("product_ids"), list) or \
+                not all(isinstance(product_id, str) for product_id in content["product_ids"]):
+            return make_response(jsonify({"description": "The request body must contain a list "
+                                                         "of product ids"}), 400)
+
+        # Remove duplicates but keep the order of the request
+        product_ids = []
+        seen = set()
+        for product_id in content["product_ids"]:
+            if product_id not in seen:
+                seen.add(product_id)
+                product_ids.append(product_id)
+
+        if len(product_ids) > Config.DATA_BATCH_MAX_PRODUCTS:
+            return make_response(jsonify({"description": "At most %i product ids can be requested "
+                                                         "at once" % Config.DATA_BATCH_MAX_PRODUCTS}), 400)
+
+        product_info_list, error_list = get_product_infos(self.iface, product_ids)
+
+        return make_response(jsonify({"products": product_info_list,
+                                      "errors": error_list}), 200)
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from graas_openeo_core_wrapper.config import Config as GRaaSConfig
+
+__license__ = "Apache License, Version 2.0"
+__author__ = "Sören Gebbert"
+__copyright__ = "Copyright 2018, Sören Gebbert"
+__maintainer__ = "Soeren Gebbert"
+__email__ = "soerengebbert@googlemail.com"
+
+
+# The thread pool that runs concurrent backend calls, shared by all requests of this process
+_EXECUTOR = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def get_executor():
+    """Return the process wide thread pool that bounds the number of concurrent backend calls
+
+    :return: A ThreadPoolExecutor object
+    """
+    global _EXECUTOR
+
+    if _EXECUTOR is None:
+        with _EXECUTOR_LOCK:
+            if _EXECUTOR is None:
+                _EXECUTOR = ThreadPoolExecutor(max_workers=GRaaSConfig.BACKEND_MAX_CONCURRENCY)
+
+    return _EXECUTOR
+
+
+def run_concurrently(calls, return_exceptions=False):
+    """Run the provided callables concurrently in the shared thread pool and wait for all of them
+
+    The results are returned in the order of the provided callables, independent of the
+    order in which they finished. Callables must not call run_concurrently themselves,
+    since they would wait for workers of the same bounded pool.
+
+    :param calls: A list of callables without arguments, use functools.partial to bind arguments
+    :param return_exceptions: Set True to return the exceptions raised by a callable as result,
+                              otherwise the first exception is raised
+    :return: The list of results
+    """
+    executor = get_executor()
+    futures = [executor.submit(call) for call in calls]
+    results = []
+
+    for future in futures:
+        try:
+            results.append(future.result())
+        except Exception as e:
+            if return_exceptions is False:
+                raise
+            results.append(e)
+
+    return results
@@ -1,8 +1,16 @@
 # -*- coding: utf-8 -*-
 from flask import json
 from graas_openeo_core_wrapper.config import Config as GRaaSConfig
-import graas_openeo_core_wrapper
+from graas_openeo_core_wrapper.cache import TTLCache
+from graas_openeo_core_wrapper.executor import run_concurrently
+from graas_openeo_core_wrapper.resilience import TokenBucket, CircuitBreaker
+import copy
+import random
+import threading
+import time
+from functools import partial
 import requests
+from requests.adapters import HTTPAdapter
 
 __license__ = "Apache License, Version 2.0"
 __author__ = "Sören Gebbert"
@@ -10,6 +18,110 @@ __copyright__ = "Copyright 2018, Sören Gebbert"
 __maintainer__ = "Soeren Gebbert"
 __email__ = "soerengebbert@googlemail.com"
 
+# The HTTP sessions that are shared by all GRaaSInterface instances of this process,
+# one session for each connection pool configuration
+_SESSIONS = {}
+_SESSION_LOCK = threading.Lock()
+
+
+def get_session(config=None):
+    """Return the process wide HTTP session that keeps the connections to the GRaaS backend alive
+
+    The session is created on first use and shared across threads and GRaaSInterface instances,
+    so that backend calls reuse pooled TCP/TLS connections instead of performing a new handshake
+    for each request.
+
+    :param config: The configuration that provides the connection pool settings
+    :return: A requests.Session object
+    """
+    if config is None:
+        config = GRaaSConfig
+
+    key = (config.HTTP_POOL_CONNECTIONS, config.HTTP_POOL_MAXSIZE, config.HTTP_POOL_BLOCK)
+
+    session = _SESSIONS.get(key)
+    if session is not None:
+        return session
+
+    with _SESSION_LOCK:
+        if key not in _SESSIONS:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=config.HTTP_POOL_CONNECTIONS,
+                                  pool_maxsize=config.HTTP_POOL_MAXSIZE,
+                                  pool_block=config.HTTP_POOL_BLOCK)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _SESSIONS[key] = session
+
+        return _SESSIONS[key]
+
+
+# The rate limiters and circuit breakers of the backends that are shared by all GRaaSInterface
+# instances of this process, keys are the base urls of the backends
+_BACKEND_GUARDS = {}
+_BACKEND_GUARD_LOCK = threading.Lock()
+
+# The HTTP status codes of failed GET requests that are retried
+RETRY_STATUS_CODES = (502, 503, 504)
+
+# The last successful GET responses, keys are the request urls. They are returned
+# instead of an error while the circuit breaker of the backend is open.
+_LAST_RESPONSES = TTLCache(maxsize=GRaaSConfig.BACKEND_LAST_RESPONSE_CACHE_SIZE)
+
+# The url parts of GET requests whose last response must not be returned as fallback,
+# an outdated job status would report a running job that may have finished or failed
+NO_FALLBACK_URL_PARTS = ("/status/",)
+
+
+def get_backend_guards(base_url, config=None):
+    """Return the process wide rate limiter and circuit breaker of a backend
+
+    :param base_url: The base url of the backend
+    :param config: The configuration that provides the rate limit and circuit breaker settings
+    :return: (TokenBucket, CircuitBreaker)
+    """
+    if config is None:
+        config = GRaaSConfig
+
+    guards = _BACKEND_GUARDS.get(base_url)
+    if guards is not None:
+        return guards
+
+    with _BACKEND_GUARD_LOCK:
+        if base_url not in _BACKEND_GUARDS:
+            _BACKEND_GUARDS[base_url] = (TokenBucket(rate=config.BACKEND_RATE_LIMIT,
+                                                     burst=config.BACKEND_RATE_BURST),
+                                         CircuitBreaker(failure_threshold=config.BACKEND_CIRCUIT_FAILURES,
+                                                        reset_timeout=config.BACKEND_CIRCUIT_RESET_TIMEOUT))
+
+        return _BACKEND_GUARDS[base_url]
+
+
+# The cache of the mapset and layer listings, keys are (base_url, listing type, location[, mapset])
+_CATALOGUE_CACHE = TTLCache(maxsize=GRaaSConfig.CATALOGUE_CACHE_SIZE,
+                            ttl=GRaaSConfig.CATALOGUE_CACHE_TTL,
+                            stale_ttl=GRaaSConfig.CATALOGUE_CACHE_STALE_TTL)
+
+# The cache of the layer and mapset metadata, keys are (base_url, metadata type, location, mapset[, ...])
+_METADATA_CACHE = TTLCache(maxsize=GRaaSConfig.METADATA_CACHE_SIZE,
+                           ttl=GRaaSConfig.METADATA_CACHE_TTL)
+
+
+def invalidate_catalogue(location, mapset=None):
+    """Remove cached mapset and layer listings and metadata, so that they are requested from the backend
+
+    :param location: The location whose mapset listing and mapset content must be removed
+    :param mapset: Only remove the layer listings and metadata of this mapset and the mapset listing
+                   of the location, if not set all entries of the location are removed
+    """
+    def predicate(key):
+        if key[2] != location:
+            return False
+        return mapset is None or len(key) == 3 or key[3] == mapset
+
+    _CATALOGUE_CACHE.invalidate_if(predicate)
+    _METADATA_CACHE.invalidate_if(predicate)
+
 
 class GRaaSInterface(object):
 
@@ -23,6 +135,13 @@ class GRaaSInterface(object):
         self.base_url = "%(host)s:%(port)s" % {"host": self.host, "port": self.port}
         self.auth = (config.USER, config.PASSWORD)
         self.user = config.USER
+        self.timeout = (config.HTTP_CONNECT_TIMEOUT, config.HTTP_READ_TIMEOUT)
+        self.session = get_session(config)
+        self.rate_limiter, self.circuit_breaker = get_backend_guards(self.base_url, config)
+        self.rate_limit_timeout = config.BACKEND_RATE_LIMIT_TIMEOUT
+        self.retries = config.BACKEND_RETRIES
+        self.retry_backoff = config.BACKEND_RETRY_BACKOFF
+        self.retry_max_backoff = config.BACKEND_RETRY_MAX_BACKOFF
 
     @staticmethod
     def layer_def_to_components(layer):
@@ -41,23 +160,82 @@ class GRaaSInterface(object):
 
         location, mapset, datatype, layer = layer.split(".", 3)
 
-        # Store the location in the global location dict
-        graas_openeo_core_wrapper.PROCESS_LOCATION[location] = location
-
         return location, mapset, datatype, layer
 
     def check_health(self):
+        """Return True if the backend is healthy
+
+        The health check bypasses the rate limiter and the circuit breaker,
+        since it is the probe that closes an open circuit breaker.
+
+        :return: True if the backend is healthy, False otherwise
+        """
 
         url = self.base_url + "/health_check"
-        r = requests.get(url=url)
+        r = self.session.get(url=url, timeout=self.timeout)
 
         if r.status_code == 200:
             return True
 
         return False
 
+    def _send_request(self, method, url, **kwargs):
+        """Send a request to the backend through the rate limiter and the circuit breaker
+
+        Connection errors, timeouts and 5xx responses count as failures of the backend.
+        GET requests are idempotent, hence they are retried Config.BACKEND_RETRIES times after
+        connection errors, timeouts and the status codes in RETRY_STATUS_CODES, with a random
+        delay that grows exponentially with each retry.
+
+        If the circuit breaker is open or the rate limit is exceeded, GET requests return the last
+        successful response of the url, all other requests and job status requests fail immediately.
+
+        :param method: The HTTP method
+        :param url: The request url
+        :param kwargs: Additional arguments of requests.Session.request
+        :return: The requests.Response object
+        """
+        retries = self.retries if method == "GET" else 0
+        fallback = method == "GET" and not any(part in url for part in NO_FALLBACK_URL_PARTS)
+        attempt = 0
+
+        while True:
+            if self.circuit_breaker.allow(probe=self.check_health) is False:
+                reason = "The GRaaS backend %s is unavailable" % self.base_url
+            elif self.rate_limiter.acquire(timeout=self.rate_limit_timeout) is False:
+                reason = "The request rate limit of the GRaaS backend %s was exceeded" % self.base_url
+            else:
+                reason = None
+
+            if reason is not None:
+                response = _LAST_RESPONSES.get(url) if fallback else None
+                if response is None:
+                    raise Exception(reason)
+                return response
+
+            try:
+                r = self.session.request(method, url=url, auth=self.auth, timeout=self.timeout, **kwargs)
+            except requests.RequestException:
+                self.circuit_breaker.record_failure()
+                if attempt >= retries:
+                    raise
+            else:
+                if r.status_code >= 500:
+                    self.circuit_breaker.record_failure()
+                else:
+                    self.circuit_breaker.record_success()
+
+                if r.status_code not in RETRY_STATUS_CODES or attempt >= retries:
+                    if fallback and r.status_code == 200:
+                        _LAST_RESPONSES.put(url, r)
+                    return r
+
+            # Full jitter, so that the retries of concurrent requests do not hit the backend at the same time
+            time.sleep(random.uniform(0, min(self.retry_max_backoff, self.retry_backoff * 2 ** attempt)))
+            attempt += 1
+
     def _send_get_request(self, url):
-        r = requests.get(url=url, auth=self.auth)
+        r = self._send_request("GET", url)
         print(r)
         data = r.text
 
@@ -67,6 +245,26 @@ class GRaaSInterface(object):
 
         return r.status_code, data
 
+    def _send_cached_get_request(self, key, url, use_cache=True, cache=_CATALOGUE_CACHE):
+        """Send a get request whose successful response is stored in a cache
+
+        The data is returned as copy, so that callers can modify it without changing the cached entry.
+
+        :param key: The cache key of the request, the base url will be prepended
+        :param url: The request url
+        :param use_cache: Set False to bypass the cache and request the backend directly
+        :param cache: The cache to use, default is the catalogue cache
+        :return: (status_code, data)
+        """
+        if use_cache is False:
+            return self._send_get_request(url)
+
+        status, data = cache.get_or_load(key=(self.base_url,) + key,
+                                         loader=lambda: self._send_get_request(url),
+                                         cache_if=lambda result: result[0] == 200)
+
+        return status, copy.deepcopy(data)
+
     def _send_post_request(self, url, process_chain):
         """Send a post request adn return the return status and the GRaaS response
 
@@ -74,8 +272,7 @@ class GRaaSInterface(object):
         :param process_chain:
         :return:
         """
-        r = requests.post(url=url, auth=self.auth,
-                          json=process_chain)
+        r = self._send_request("POST", url, json=process_chain)
         data = r.text
 
         if r.status_code == 200:
@@ -85,7 +282,7 @@ class GRaaSInterface(object):
 
     def resource_info(self, resource_id):
         url = "%(base)s/status/%(user)s/%(rid)s" % {"base": self.base_url, "user": self.user, "rid": resource_id}
-        r = requests.get(url=url, auth=self.auth)
+        r = self._send_request("GET", url)
         data = r.text
 
         if r.status_code == 200:
@@ -95,7 +292,7 @@ class GRaaSInterface(object):
 
     def delete_resource(self, resource_id):
         url = "%(base)s/status/%(user)s/%(rid)s" % {"base": self.base_url, "user": self.user, "rid": resource_id}
-        r = requests.delete(url=url, auth=self.auth)
+        r = self._send_request("DELETE", url)
         data = r.text
 
         if r.status_code == 200:
@@ -107,7 +304,8 @@ class GRaaSInterface(object):
         url = "%(base)s/locations/%(location)s/mapsets/%(mapset)s" % {"base": self.base_url,
                                                                       "location": location,
                                                                       "mapset": mapset}
-        r = requests.post(url=url, auth=self.auth)
+        r = self._send_request("POST", url)
+        invalidate_catalogue(location=location, mapset=mapset)
         data = r.text
 
         if r.status_code == 200:
@@ -119,7 +317,8 @@ class GRaaSInterface(object):
         url = "%(base)s/locations/%(location)s/mapsets/%(mapset)s" % {"base": self.base_url,
                                                                       "location": location,
                                                                       "mapset": mapset}
-        r = requests.delete(url=url, auth=self.auth)
+        r = self._send_request("DELETE", url)
+        invalidate_catalogue(location=location, mapset=mapset)
         data = r.text
 
         if r.status_code == 200:
@@ -127,42 +326,45 @@ class GRaaSInterface(object):
 
         return r.status_code, data
 
-    def list_mapsets(self, location):
+    def list_mapsets(self, location, use_cache=True):
         url = "%(base)s/locations/%(location)s/mapsets" % {"base": self.base_url,
                                                            "location": location}
-        return self._send_get_request(url)
+        return self._send_cached_get_request(("mapsets", location), url, use_cache)
 
-    def mapset_info(self, location, mapset):
+    def mapset_info(self, location, mapset, use_cache=True):
         url = "%(base)s/locations/%(location)s/mapsets/%(mapset)s/info" % {"base": self.base_url,
                                                                            "location": location,
                                                                            "mapset": mapset}
-        return self._send_get_request(url)
+        return self._send_cached_get_request(("mapset_info", location, mapset), url, use_cache,
+                                             cache=_METADATA_CACHE)
 
-    def list_raster(self, location, mapset):
+    def list_raster(self, location, mapset, use_cache=True):
         url = "%(base)s/locations/%(location)s/mapsets/%(mapset)s/raster_layers" % {"base": self.base_url,
                                                                                     "location": location,
                                                                                     "mapset": mapset}
-        return self._send_get_request(url)
+        return self._send_cached_get_request(("raster", location, mapset), url, use_cache)
 
-    def list_vector(self, location, mapset):
+    def list_vector(self, location, mapset, use_cache=True):
         url = "%(base)s/locations/%(location)s/mapsets/%(mapset)s/vector_layers" % {"base": self.base_url,
                                                                                     "location": location,
                                                                                     "mapset": mapset}
-        return self._send_get_request(url)
+        return self._send_cached_get_request(("vector", location, mapset), url, use_cache)
 
-    def list_strds(self, location, mapset):
+    def list_strds(self, location, mapset, use_cache=True):
         url = "%(base)s/locations/%(location)s/mapsets/%(mapset)s/strds" % {"base": self.base_url,
                                                                             "location": location,
                                                                             "mapset": mapset}
-        return self._send_get_request(url)
+        return self._send_cached_get_request(("strds", location, mapset), url, use_cache)
 
-    def layer_info(self, layer_name):
+    def layer_info(self, layer_name, use_cache=True):
         """Return informations about the requested layer, that can be of type raster, vector or strds
 
         :param layer_name:
+        :param use_cache: Set False to bypass the metadata cache
         :return:
         """
         location, mapset, datatype, layer = GRaaSInterface.layer_def_to_components(layer_name)
+        key = ("layer_info", location, mapset, datatype, layer)
         if datatype == "raster":
             datatype = "raster_layers"
         if datatype == "vector":
@@ -172,21 +374,87 @@ class GRaaSInterface(object):
                                                                                           "mapset": mapset,
                                                                                           "dtype": datatype,
                                                                                           "layer": layer}
-        return self._send_get_request(url)
+        return self._send_cached_get_request(key, url, use_cache, cache=_METADATA_CACHE)
+
+    def strds_raster_layers(self, layer_name, use_cache=True):
+        """Return the list of raster layers of a strds with their start and end time
+
+        :param layer_name: The name of the strds in the form location.mapset.strds.layer
+        :param use_cache: Set False to bypass the metadata cache
+        :return: (status_code, data)
+        """
+        location, mapset, datatype, layer = GRaaSInterface.layer_def_to_components(layer_name)
+        url = "%(base)s/locations/%(location)s/mapsets/%(mapset)s/strds/%(layer)s/raster_layers" % \
+              {"base": self.base_url,
+               "location": location,
+               "mapset": mapset,
+               "layer": layer}
+        return self._send_cached_get_request(("strds_raster_layers", location, mapset, layer), url, use_cache,
+                                             cache=_METADATA_CACHE)
 
     def check_layer_exists(self, layer_name):
-        """Return True if the strds exists, False otherwise
+        """Return True if the layer exists, False otherwise
+
+        The layer is looked up in the cached layer listing of its mapset.
 
-        :param strds_name: The name of the strds
-        :return: True if the strds exists, False otherwise
+        :param layer_name: The name of the layer in the form location.mapset.datatype.layer
+        :return: True if the layer exists, False otherwise
         """
-        # Get region information about the required strds and check if it exists
-        status_code, layer_info = self.layer_info(layer_name=layer_name)
+        return len(self.find_missing_layers([layer_name])) == 0
 
-        if status_code != 200:
-            return False
+    def find_missing_layers(self, layer_names):
+        """Return the layers that do not exist in the backend
 
-        return True
+        The layers are looked up in the cached layer listings of their mapsets. All required
+        listings are requested concurrently and each listing only once. Listings that miss a
+        layer are requested again without the cache, so that layers that were created since
+        the listing was cached are found.
+
+        Layers whose listing could not be requested because of a backend error are not
+        reported as missing, since their existence can not be decided.
+
+        :param layer_names: The list of layer names in the form location.mapset.datatype.layer
+        :return: The list of missing layer names
+        """
+        listing_functions = {"raster": self.list_raster,
+                             "vector": self.list_vector,
+                             "strds": self.list_strds}
+        missing = []
+        listings = {}
+
+        for layer_name in layer_names:
+            location, mapset, datatype, layer = self.layer_def_to_components(layer_name)
+            if location is None or datatype not in listing_functions:
+                missing.append(layer_name)
+                continue
+            listings.setdefault((location, mapset, datatype), []).append((layer_name, layer))
+
+        for use_cache in (True, False):
+            keys = list(listings.keys())
+            results = run_concurrently([partial(listing_functions[datatype], location=location,
+                                                mapset=mapset, use_cache=use_cache)
+                                        for location, mapset, datatype in keys],
+                                       return_exceptions=True)
+            incomplete = {}
+
+            for key, result in zip(keys, results):
+                if isinstance(result, Exception) or result[0] >= 500:
+                    continue
+
+                # The backend answers with a client error if the mapset does not exist
+                names = set(result[1]) if result[0] == 200 else set()
+                absent = [(layer_name, layer) for layer_name, layer in listings[key] if layer not in names]
+
+                if absent and use_cache is True:
+                    incomplete[key] = absent
+                else:
+                    missing.extend(layer_name for layer_name, layer in absent)
+
+            listings = incomplete
+            if not listings:
+                break
+
+        return sorted(missing)
 
     def async_persistent_processing(self, location, mapset, process_chain):
         """Send a process chain to the graas backend to be run asynchronously in a persistent database
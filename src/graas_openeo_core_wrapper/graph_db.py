@@ -2,6 +2,8 @@
 from flask import json
 from graas_openeo_core_wrapper.config import Config as GRaaSConfig
 import requests
+import sqlite3
+from contextlib import closing
 from sqlitedict import SqliteDict
 
 __license__ = "Apache License, Version 2.0"
@@ -17,3 +19,80 @@ class GraphDB(SqliteDict):
     """
     def __init__(self):
         SqliteDict.__init__(self, filename=GRaaSConfig.GRAPH_DB, autocommit=True)
+
+
+class GraphHashDB(SqliteDict):
+    """This is the storage of the jobs that were submitted for a canonical process graph hash
+
+    Each entry is a list of dict(job_id, submitted) records, the latest submission last.
+    """
+    def __init__(self):
+        SqliteDict.__init__(self, filename=GRaaSConfig.GRAPH_DB, tablename="graph_hash", autocommit=True)
+
+
+class JobGroupDB(SqliteDict):
+    """This is the storage of the jobs that were split into several backend jobs
+
+    Each entry is a dict with the list of backend job ids (children) and the submission time.
+    """
+    def __init__(self):
+        SqliteDict.__init__(self, filename=GRaaSConfig.GRAPH_DB, tablename="job_group", autocommit=True)
+
+
+class JobStateDB(SqliteDict):
+    """This is the storage of the terminal status of the jobs, keys are job ids
+
+    Jobs with a terminal status are not requested again when the job state poller starts.
+    """
+    def __init__(self):
+        SqliteDict.__init__(self, filename=GRaaSConfig.GRAPH_DB, tablename="job_state", autocommit=True)
+
+
+class MapsetNameAllocator(object):
+    """Allocates unique names of persistent mapsets with a counter per location in the graph database
+
+    The counter is incremented in an immediate transaction, hence concurrent requests of
+    several threads or processes never get the same name and no mapset listing is required.
+    """
+    def __init__(self, filename=None):
+        """Constructor
+
+        :param filename: The sqlite database file, default is GRaaSConfig.GRAPH_DB
+        """
+        self.filename = filename if filename is not None else GRaaSConfig.GRAPH_DB
+
+        with self._connect() as connection:
+            connection.execute("CREATE TABLE IF NOT EXISTS mapset_counter "
+                               "(location TEXT, prefix TEXT, next INTEGER, PRIMARY KEY (location, prefix))")
+
+    def _connect(self):
+        """Open a connection in autocommit mode, an open transaction is rolled back when it is closed"""
+        return closing(sqlite3.connect(self.filename, timeout=30, isolation_level=None))
+
+    def allocate(self, location, prefix, seed):
+        """Allocate a new mapset name prefix_N in a location
+
+        :param location: The name of the location
+        :param prefix: The prefix of the mapset name
+        :param seed: A callable without arguments that returns the first free number, it is called
+                     only for the first allocation in a location, to skip the mapsets that exist already
+        :return: The mapset name
+        """
+        with self._connect() as connection:
+            row = connection.execute("SELECT next FROM mapset_counter WHERE location = ? AND prefix = ?",
+                                     (location, prefix)).fetchone()
+
+        # The seed requires a backend request, hence it is not called within the transaction
+        first = seed() if row is None else 0
+
+        with self._connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute("INSERT OR IGNORE INTO mapset_counter (location, prefix, next) VALUES (?, ?, ?)",
+                               (location, prefix, first))
+            number = connection.execute("SELECT next FROM mapset_counter WHERE location = ? AND prefix = ?",
+                                        (location, prefix)).fetchone()[0]
+            connection.execute("UPDATE mapset_counter SET next = ? WHERE location = ? AND prefix = ?",
+                               (number + 1, location, prefix))
+            connection.execute("COMMIT")
+
+        return "%s_%i" % (prefix, number)
@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+import threading
+import uuid
+from functools import partial
+from graas_openeo_core_wrapper.executor import run_concurrently
+from graas_openeo_core_wrapper.process_definitions.temporal import create_merge_process_chain
+
+__license__ = "Apache License, Version 2.0"
+__author__ = "Sören Gebbert"
+__copyright__ = "Copyright 2018, Sören Gebbert"
+__maintainer__ = "Soeren Gebbert"
+__email__ = "soerengebbert@googlemail.com"
+
+
+# The prefix of the ids of jobs that consist of several backend jobs
+GROUP_ID_PREFIX = "job_group-"
+
+# Serializes the submission of merge jobs, so that concurrent status requests submit a merge job only once
+_MERGE_LOCK = threading.Lock()
+
+
+def create_group_id():
+    """Create a new unique id for a job that consists of several backend jobs
+
+    :return: The job id
+    """
+    return "%s%s" % (GROUP_ID_PREFIX, uuid.uuid4())
+
+
+def combine_status(status_list):
+    """Combine the status of several backend jobs into the status of the job they belong to
+
+    The job failed if one backend job failed or was terminated, it is finished if all backend
+    jobs are finished, it is running as soon as one backend job started.
+
+    :param status_list: The list of backend job status strings
+    :return: The combined status
+    """
+    for status in ("error", "terminated"):
+        if status in status_list:
+            return status
+
+    if all(status == "finished" for status in status_list):
+        return "finished"
+
+    if any(status in ("running", "finished") for status in status_list):
+        return "running"
+
+    return "accepted"
+
+
+def _combine_resource_info(iface, group_id, children):
+    """Request the information of the backend jobs of a job group and combine them
+
+    :param iface: The GRaaSInterface object
+    :param group_id: The id of the job group
+    :param children: The list of backend job ids
+    :return: (status_code, resource_info)
+    """
+    results = run_concurrently([partial(iface.resource_info, child) for child in children],
+                               return_exceptions=True)
+
+    child_infos = []
+    for child, result in zip(children, results):
+        if isinstance(result, Exception):
+            return 500, {"resource_id": group_id, "child": child, "description": str(result)}
+        if result[0] != 200:
+            return result[0], {"resource_id": group_id, "child": child, "description": result[1]}
+        child_infos.append(result[1])
+
+    resources = []
+    for info in child_infos:
+        resources.extend(info.get("urls", {}).get("resources", []))
+
+    accept_datetimes = [info["accept_datetime"] for info in child_infos if "accept_datetime" in info]
+    datetimes = [info["datetime"] for info in child_infos if "datetime" in info]
+    timestamps = [info["timestamp"] for info in child_infos if "timestamp" in info]
+
+    response = dict(resource_id=group_id,
+                    user_id=child_infos[0].get("user_id") if child_infos else None,
+                    status=combine_status([info.get("status") for info in child_infos]),
+                    accept_datetime=min(accept_datetimes) if accept_datetimes else None,
+                    datetime=max(datetimes) if datetimes else None,
+                    timestamp=max(timestamps) if timestamps else None,
+                    # The consumed time of a job group is the time consumed by all backend jobs
+                    time_delta=sum(info.get("time_delta", 0) for info in child_infos),
+                    urls=dict(resources=resources),
+                    children=child_infos)
+
+    return 200, response
+
+
+def _submit_merge_job(iface, group_db, group_id):
+    """Submit the job that merges the partial results of a job group, if it was not submitted before
+
+    :param iface: The GRaaSInterface object
+    :param group_db: The JobGroupDB object
+    :param group_id: The id of the job group
+    :return: The id of the merge job
+    """
+    with _MERGE_LOCK:
+        group = group_db[group_id]
+
+        if group.get("merge_job") is None:
+            merge = group["merge"]
+            process_chain = create_merge_process_chain(merge["outputs"], merge["method"], merge["export"])
+            status, response = iface.async_ephemeral_processing_export(location=merge["location"],
+                                                                       process_chain=process_chain)
+            if status != 200:
+                raise Exception("The merge job of job group %s could not be submitted: %s" % (group_id,
+                                                                                           str(response)))
+
+            group["merge_job"] = response["resource_id"]
+            group_db[group_id] = group
+
+        return group["merge_job"]
+
+
+def group_resource_info(iface, group_db, group_id, group):
+    """Request the information of all backend jobs of a job group and combine them
+
+    The combined information has the same structure as the resource information of a
+    single backend job, the information of the backend jobs is listed in children.
+    If the job group has partial results that must be merged, the merge job is submitted
+    when all backend jobs are finished and the job group is finished with the merge job.
+
+    :param iface: The GRaaSInterface object
+    :param group_db: The JobGroupDB object
+    :param group_id: The id of the job group
+    :param group: The job group record with the list of backend job ids as children
+    :return: (status_code, resource_info)
+    """
+    status_code, response = _combine_resource_info(iface, group_id, group["children"])
+
+    if "merge" not in group or status_code != 200:
+        return status_code, response
+
+    # The partial results are merged after all backend jobs finished
+    if response["status"] != "finished":
+        return status_code, response
+
+    merge_job = _submit_merge_job(iface, group_db, group_id)
+    status_code, merge_info = iface.resource_info(merge_job)
+    if status_code != 200:
+        return status_code, {"resource_id": group_id, "child": merge_job, "description": merge_info}
+
+    response["status"] = merge_info.get("status")
+    response["datetime"] = merge_info.get("datetime", response["datetime"])
+    response["timestamp"] = merge_info.get("timestamp", response["timestamp"])
+    response["time_delta"] += merge_info.get("time_delta", 0)
+    # Only the merged results are the results of the job group
+    response["urls"] = dict(resources=merge_info.get("urls", {}).get("resources", []))
+    response["merge_job"] = merge_info
+
+    return 200, response
+
+
+def delete_partial_mapsets(iface, group_db, group_id):
+    """Delete the mapsets of the partial results of a job group that were split in time
+
+    The partial results are not needed anymore when the job group reached a final state,
+    the merged results are exported by the merge job. Mapsets that could not be deleted are
+    kept in the job group record.
+
+    :param iface: The GRaaSInterface object
+    :param group_db: The JobGroupDB object
+    :param group_id: The id of the job group
+    :return: The list of mapsets that could not be deleted
+    """
+    group = group_db.get(group_id)
+    if group is None or "merge" not in group or not group.get("mapsets"):
+        return []
+
+    location = group["merge"]["location"]
+    mapsets = group["mapsets"]
+    results = run_concurrently([partial(iface.delete_mapset, location=location, mapset=mapset)
+                                for mapset in mapsets], return_exceptions=True)
+
+    remaining = [mapset for mapset, result in zip(mapsets, results)
+                 if isinstance(result, Exception) or result[0] != 200]
+
+    with _MERGE_LOCK:
+        group = group_db[group_id]
+        group["mapsets"] = remaining
+        group_db[group_id] = group
+
+    return remaining
+
+
+def resource_info(iface, group_db, job_id):
+    """Return the resource information of a backend job or of a job group
+
+    :param iface: The GRaaSInterface object
+    :param group_db: The JobGroupDB object
+    :param job_id: The id of a backend job or of a job group
+    :return: (status_code, resource_info)
+    """
+    group = group_db.get(job_id)
+    if group is None:
+        return iface.resource_info(job_id)
+
+    return group_resource_info(iface, group_db, job_id, group)
+
+
+def delete_resource(iface, group_db, job_id):
+    """Terminate a backend job or all backend jobs of a job group
+
+    :param iface: The GRaaSInterface object
+    :param group_db: The JobGroupDB object
+    :param job_id: The id of a backend job or of a job group
+    :return: (status_code, response)
+    """
+    group = group_db.get(job_id)
+    if group is None:
+        return iface.delete_resource(job_id)
+
+    children = list(group["children"])
+    if group.get("merge_job") is not None:
+        children.append(group["merge_job"])
+
+    results = run_concurrently([partial(iface.delete_resource, child) for child in children],
+                               return_exceptions=True)
+
+    status_code = 200
+    responses = []
+    for child, result in zip(children, results):
+        if isinstance(result, Exception):
+            result = (500, str(result))
+        if result[0] != 200:
+            status_code = result[0]
+        responses.append(dict(resource_id=child, response=result[1]))
+
+    return status_code, dict(resource_id=job_id, children=responses)
@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from graas_openeo_core_wrapper.cache import TTLCache
+from graas_openeo_core_wrapper.config import Config as GRaaSConfig
+
+__license__ = "Apache License, Version 2.0"
+__author__ = "Sören Gebbert"
+__copyright__ = "Copyright 2018, Sören Gebbert"
+__maintainer__ = "Soeren Gebbert"
+__email__ = "soerengebbert@googlemail.com"
+
+
+# The job states that do not change anymore
+TERMINAL_STATES = ("finished", "error", "terminated")
+
+
+def is_transient(state):
+    """Return True if the state of a job could not be requested because of a temporary failure
+
+    :param state: The (status_code, info, etag) tuple of a job
+    :return: True if the backend or the connection failed, the request should be repeated
+    """
+    return state[0] >= 500
+
+
+def is_final(state):
+    """Return True if the state of a job will not change anymore
+
+    :param state: The (status_code, info, etag) tuple of a job
+    :return: True if the job is in a terminal state or the backend rejected the request,
+             for example because it does not know the job
+    """
+    if is_transient(state):
+        return False
+    return state[0] != 200 or state[1].get("status") in TERMINAL_STATES
+
+
+class JobStatusPoller(object):
+    """Refreshes the states of all active jobs in a single background thread
+
+    Each job is requested on its own schedule: new jobs are requested every
+    Config.JOB_POLLER_MIN_INTERVAL seconds, the interval grows by Config.JOB_POLLER_BACKOFF
+    with each request that did not change the status of the job, up to Config.JOB_POLLER_MAX_INTERVAL.
+    Jobs in terminal states are not requested anymore, jobs whose request failed temporarily
+    keep their last known state and are requested again after the backoff, up to
+    Config.JOB_POLLER_MAX_TRANSIENT_FAILURES times in a row. Each job is scheduled only once, hence
+    concurrent requests for the state of a job result in a single backend request.
+
+    Clients read the latest known state from memory or wait for its next change.
+    """
+
+    def __init__(self, fetch):
+        """Constructor
+
+        :param fetch: A callable that gets a job id and returns its (status_code, info, etag) tuple
+        """
+        self.fetch = fetch
+        # The latest states of the jobs, keys are job ids
+        self.states = TTLCache(maxsize=GRaaSConfig.JOB_STATUS_CACHE_SIZE)
+        # The schedule of the active jobs, keys are job ids and values are
+        # [next_request, interval, consecutive temporary failures] lists
+        self._schedule = {}
+        self._condition = threading.Condition()
+        self._thread = None
+        # The callables that are called with the job id and the state when a job reached a final state
+        self._listeners = []
+        # The backend requests run in a separate pool, since they may use the shared thread pool themselves
+        self._executor = ThreadPoolExecutor(max_workers=GRaaSConfig.JOB_POLLER_BATCH_SIZE)
+
+    def start(self):
+        """Start the background thread, if it is not running"""
+        with self._condition:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run)
+                self._thread.daemon = True
+                self._thread.start()
+
+    def add_listener(self, listener):
+        """Add a callable that is called with the job id and the state when a job reached a final state
+
+        The listeners are called from the background thread, they should return quickly.
+
+        :param listener: The callable
+        """
+        with self._condition:
+            self._listeners.append(listener)
+
+    def track(self, job_id, refresh=False, priority=False):
+        """Add a job to the schedule, if it is not scheduled and not in a terminal state
+
+        :param job_id: The id of the job
+        :param refresh: Set True to request the state of the job immediately, even if it is scheduled
+        :param priority: Set True to request the job before all other due jobs, if its state is not known,
+                         since a client waits for it
+        """
+        with self._condition:
+            if priority is True and job_id in self._schedule and self.states.get(job_id) is None:
+                self._schedule[job_id][0] = float("-inf")
+                self._condition.notify_all()
+                return
+
+            if job_id in self._schedule and refresh is False:
+                return
+
+            state = self.states.get(job_id)
+            if state is not None and state[0] == 200 and is_final(state) and refresh is False:
+                return
+
+            # Failed requests are not kept, the next reader waits for the new request
+            if state is not None and state[0] != 200:
+                self.states.invalidate(job_id)
+
+            next_request = float("-inf") if priority is True else time.monotonic()
+            self._schedule[job_id] = [next_request, GRaaSConfig.JOB_POLLER_MIN_INTERVAL, 0]
+            self._condition.notify_all()
+
+    def _due_jobs(self):
+        """Return the ids of the jobs whose next request is due, at most Config.JOB_POLLER_BATCH_SIZE
+
+        :return: The list of job ids
+        """
+        now = time.monotonic()
+        due = sorted((entry[0], job_id) for job_id, entry in self._schedule.items() if entry[0] <= now)
+        return [job_id for next_request, job_id in due[:GRaaSConfig.JOB_POLLER_BATCH_SIZE]]
+
+    def _fetch(self, job_id):
+        try:
+            return self.fetch(job_id)
+        except Exception as e:
+            # The failure has an ETag as well, so that readers can tell a repeated failure from a new one
+            return 500, {"error": str(e)}, "error: %s" % str(e)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                due = self._due_jobs()
+                while not due:
+                    if self._schedule:
+                        timeout = max(0, min(entry[0] for entry in self._schedule.values()) - time.monotonic())
+                    else:
+                        timeout = None
+                    self._condition.wait(timeout)
+                    due = self._due_jobs()
+
+            results = list(self._executor.map(self._fetch, due))
+
+            with self._condition:
+                for job_id, state in zip(due, results):
+                    self._update(job_id, state)
+                self._condition.notify_all()
+                listeners = list(self._listeners)
+
+            # The listeners are called outside of the lock, since they may track jobs themselves
+            for job_id, state in zip(due, results):
+                if is_final(state):
+                    for listener in listeners:
+                        try:
+                            listener(job_id, state)
+                        except Exception:
+                            pass
+
+    def _update(self, job_id, state):
+        """Store the new state of a job and compute its next request
+
+        :param job_id: The id of the job
+        :param state: The (status_code, info, etag) tuple of the job
+        """
+        previous = self.states.get(job_id)
+
+        # A temporary failure does not replace the last known state of the job
+        if not is_transient(state) or previous is None or previous[0] != 200:
+            self.states.put(job_id, state)
+
+        entry = self._schedule.get(job_id)
+        if entry is None:
+            return
+
+        # Jobs in terminal states and rejected requests are removed, rejected requests
+        # are scheduled again when a client requests the state of the job
+        if is_final(state):
+            del self._schedule[job_id]
+            return
+
+        # Jobs whose state could not be requested for too long are removed as well,
+        # they are scheduled again when a client requests the state of the job
+        entry[2] = entry[2] + 1 if is_transient(state) else 0
+        if entry[2] > GRaaSConfig.JOB_POLLER_MAX_TRANSIENT_FAILURES:
+            del self._schedule[job_id]
+            return
+
+        # Temporary failures back off like unchanged states, the job stays scheduled
+        if is_transient(state) or (previous is not None and previous[1].get("status") == state[1].get("status")):
+            entry[1] = min(entry[1] * GRaaSConfig.JOB_POLLER_BACKOFF, GRaaSConfig.JOB_POLLER_MAX_INTERVAL)
+        else:
+            entry[1] = GRaaSConfig.JOB_POLLER_MIN_INTERVAL
+
+        entry[0] = time.monotonic() + entry[1]
+
+    def _wait(self, job_id, etag, deadline):
+        """Wait until the state of a job differs from the provided ETag or is final
+
+        :param job_id: The id of the job
+        :param etag: The ETag of the state that is known, None to return as soon as any state is known
+        :param deadline: The time.monotonic() value at which the waiting stops
+        :return: The latest (status_code, info, etag) tuple or None if no state was requested yet
+        """
+        # The job is scheduled before the poller starts, so that it is part of the first batch
+        self.track(job_id, priority=True)
+        self.start()
+
+        with self._condition:
+            while True:
+                state = self.states.get(job_id)
+                if state is not None and (etag is None or state[2] != etag or is_final(state)):
+                    return state
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return state
+
+                self._condition.wait(remaining)
+
+    def read(self, job_id, timeout):
+        """Return the latest known state of a job, wait for the first request of the job if it is unknown
+
+        :param job_id: The id of the job
+        :param timeout: The maximum number of seconds to wait for the first request
+        :return: The latest (status_code, info, etag) tuple or None if no state was requested in time
+        """
+        return self._wait(job_id, None, time.monotonic() + timeout)
+
+    def wait_for_change(self, job_id, etag=None, timeout=0):
+        """Block until the state of a job differs from the provided ETag, the job is final or the timeout passed
+
+        :param job_id: The id of the job
+        :param etag: The ETag of the state that the client knows, None to return the current state
+        :param timeout: The maximum number of seconds to wait
+        :return: The latest (status_code, info, etag) tuple or None if no state was requested in time
+        """
+        return self._wait(job_id, etag, time.monotonic() + timeout)
+
+    def iterate_changes(self, job_id, etag=None, timeout=0, keepalive=15):
+        """Generate the states of a job as they change, until the job is final or the timeout passed
+
+        None is generated if the state did not change for keepalive seconds, so that the caller
+        can keep the connection to the client alive.
+
+        :param job_id: The id of the job
+        :param etag: The ETag of the state that the client knows, None to start with the current state
+        :param timeout: The maximum number of seconds to watch the job
+        :param keepalive: The maximum number of seconds between two generated values
+        :return: A generator of (status_code, info, etag) tuples and None values
+        """
+        deadline = time.monotonic() + timeout
+
+        while True:
+            now = time.monotonic()
+            if now >= deadline:
+                return
+
+            state = self._wait(job_id, etag, min(deadline, now + keepalive))
+
+            if state is not None and state[2] != etag:
+                etag = state[2]
+                yield state
+            elif state is None or is_final(state) is False:
+                yield None
+
+            if state is not None and is_final(state):
+                return
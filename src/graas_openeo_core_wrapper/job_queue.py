@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+import heapq
+import itertools
+import threading
+from collections import deque
+from graas_openeo_core_wrapper.cache import TTLCache
+from graas_openeo_core_wrapper.config import Config as GRaaSConfig
+from graas_openeo_core_wrapper.job_groups import create_group_id
+from graas_openeo_core_wrapper.job_poller import is_final
+
+__license__ = "Apache License, Version 2.0"
+__author__ = "Sören Gebbert"
+__copyright__ = "Copyright 2018, Sören Gebbert"
+__maintainer__ = "Soeren Gebbert"
+__email__ = "soerengebbert@googlemail.com"
+
+
+# The job queue of this process
+_JOB_QUEUE = None
+_JOB_QUEUE_LOCK = threading.Lock()
+
+
+def get_job_queue():
+    """Return the process wide job queue that admits jobs to the backend
+
+    :return: The JobQueue object
+    """
+    global _JOB_QUEUE
+
+    if _JOB_QUEUE is None:
+        with _JOB_QUEUE_LOCK:
+            if _JOB_QUEUE is None:
+                _JOB_QUEUE = JobQueue(max_running=GRaaSConfig.JOB_QUEUE_MAX_RUNNING,
+                                      max_running_per_user=GRaaSConfig.JOB_QUEUE_MAX_RUNNING_PER_USER,
+                                      max_queued_per_user=GRaaSConfig.JOB_QUEUE_MAX_QUEUED_PER_USER)
+
+    return _JOB_QUEUE
+
+
+class JobQueue(object):
+    """Admits jobs to the backend with a limit of running jobs overall and per user
+
+    Jobs that can not run immediately are queued. The queue of each user is ordered by
+    priority and submission order, the users take turns (round robin) when a running job
+    finished, so that a burst of jobs of one user does not delay the jobs of other users.
+
+    A job is submitted with a callable that gets the job id to use and returns
+    (status_code, data), data must contain the job_id on success.
+    """
+
+    def __init__(self, max_running=None, max_running_per_user=None, max_queued_per_user=None):
+        """Constructor
+
+        :param max_running: The maximum number of running jobs, None for no limit
+        :param max_running_per_user: The maximum number of running jobs of a single user, None for no limit
+        :param max_queued_per_user: The maximum number of queued jobs of a single user, None for no limit
+        """
+        self.max_running = max_running
+        self.max_running_per_user = max_running_per_user
+        self.max_queued_per_user = max_queued_per_user
+
+        self._lock = threading.Lock()
+        self._sequence = itertools.count()
+        # The queued jobs of each user as heap of (-priority, sequence, job_id, submit) tuples
+        self._queues = {}
+        # The users with queued jobs in round robin order
+        self._users = deque()
+        # The running jobs, keys are job ids and values are users
+        self._running = {}
+        # The number of running jobs and of jobs that are submitted at the moment, overall and per user
+        self._running_count = 0
+        self._user_running_count = {}
+        # The queued jobs that are submitted at the moment, keys are job ids and values are users
+        self._dispatching = {}
+        # The final (status_code, info) of queued jobs that failed to submit or that were cancelled
+        self._results = TTLCache(maxsize=GRaaSConfig.JOB_STATUS_CACHE_SIZE)
+        # The jobs that finished before their submission was recorded
+        self._finished = TTLCache(maxsize=GRaaSConfig.JOB_STATUS_CACHE_SIZE)
+
+    def _can_run(self, user):
+        if self.max_running is not None and self._running_count >= self.max_running:
+            return False
+        if self.max_running_per_user is not None and \
+                self._user_running_count.get(user, 0) >= self.max_running_per_user:
+            return False
+        return True
+
+    def _reserve(self, user):
+        self._running_count += 1
+        self._user_running_count[user] = self._user_running_count.get(user, 0) + 1
+
+    def _release(self, user):
+        self._running_count -= 1
+        self._user_running_count[user] -= 1
+        if self._user_running_count[user] == 0:
+            del self._user_running_count[user]
+
+    def _position(self, job_id):
+        """Return the position of a queued job in the round robin order of all queued jobs
+
+        :param job_id: The id of the job
+        :return: The position starting with 1 or None if the job is not queued
+        """
+        queues = [sorted(self._queues[user]) for user in self._users]
+        position = 0
+
+        for index in range(max([len(queue) for queue in queues] + [0])):
+            for queue in queues:
+                if index < len(queue):
+                    position += 1
+                    if queue[index][2] == job_id:
+                        return position
+
+        return None
+
+    def admit(self, user, priority, submit):
+        """Submit a job immediately if the limits allow it, otherwise queue it
+
+        :param user: The name of the user that submits the job
+        :param priority: The priority of the job among the jobs of the user, higher runs first
+        :param submit: The callable that submits the job
+        :return: (status_code, data) of the submission or of the queued job
+        """
+        with self._lock:
+            queue = self._queues.get(user)
+
+            if not queue and self._can_run(user):
+                self._reserve(user)
+            else:
+                if self.max_queued_per_user is not None and queue and len(queue) >= self.max_queued_per_user:
+                    return 429, {"description": "At most %i jobs of a user can be queued" % self.max_queued_per_user}
+
+                job_id = create_group_id()
+                if not queue:
+                    queue = self._queues[user] = []
+                    self._users.append(user)
+                heapq.heappush(queue, (-priority, next(self._sequence), job_id, submit))
+
+                return 202, {"job_id": job_id, "status": "queued", "queue_position": self._position(job_id)}
+
+        return self._submit(user, submit, None)
+
+    def _submit(self, user, submit, job_id):
+        """Run the submission of a job whose slot was reserved and record the running job
+
+        :param user: The name of the user that submits the job
+        :param submit: The callable that submits the job
+        :param job_id: The id of the queued job or None if the job was not queued
+        :return: (status_code, data) of the submission
+        """
+        try:
+            status, data = submit(job_id=job_id)
+        except Exception as e:
+            status, data = 400, {"error": str(e)}
+
+        with self._lock:
+            self._dispatching.pop(job_id, None)
+
+            if status == 200 and self._finished.get(data["job_id"]) is None:
+                self._running[data["job_id"]] = user
+                return status, data
+
+            self._release(user)
+            if status != 200 and job_id is not None:
+                self._results.put(job_id, (status, dict(status="error", user_id=user, job_info=data)))
+
+        self.dispatch()
+        return status, data
+
+    def _next_job(self):
+        """Remove the next job from the queue that can run and reserve its slot
+
+        :return: (user, job_id, submit) or None if no queued job can run
+        """
+        if self.max_running is not None and self._running_count >= self.max_running:
+            return None
+
+        for i in range(len(self._users)):
+            user = self._users[0]
+            self._users.rotate(-1)
+
+            if self._can_run(user):
+                queue = self._queues[user]
+                priority, sequence, job_id, submit = heapq.heappop(queue)
+                if not queue:
+                    del self._queues[user]
+                    self._users.remove(user)
+
+                self._reserve(user)
+                self._dispatching[job_id] = user
+                return user, job_id, submit
+
+        return None
+
+    def dispatch(self):
+        """Submit queued jobs in background threads while the limits allow it"""
+        while True:
+            with self._lock:
+                entry = self._next_job()
+
+            if entry is None:
+                return
+
+            user, job_id, submit = entry
+            thread = threading.Thread(target=self._submit, args=(user, submit, job_id))
+            thread.daemon = True
+            thread.start()
+
+    def job_finished(self, job_id, state):
+        """Release the slot of a running job when the poller reports a terminal state
+
+        :param job_id: The id of the job
+        :param state: The (status_code, info, etag) tuple of the job
+        """
+        # Temporary failures of the state requests do not release the slot, the poller requests the job again
+        if not is_final(state):
+            return
+
+        with self._lock:
+            if job_id not in self._running:
+                self._finished.put(job_id, True)
+                return
+            self._release(self._running.pop(job_id))
+
+        self.dispatch()
+
+    def cancel(self, job_id):
+        """Remove a job from the queue
+
+        :param job_id: The id of the job
+        :return: True if the job was queued and is removed
+        """
+        with self._lock:
+            for user, queue in self._queues.items():
+                entries = [entry for entry in queue if entry[2] != job_id]
+                if len(entries) == len(queue):
+                    continue
+
+                if entries:
+                    heapq.heapify(entries)
+                    self._queues[user] = entries
+                else:
+                    del self._queues[user]
+                    self._users.remove(user)
+
+                self._results.put(job_id, (200, dict(status="terminated", user_id=user)))
+                return True
+
+        return False
+
+    def queued_info(self, job_id):
+        """Return the state of a job that is queued or that was queued and did not reach the backend
+
+        :param job_id: The id of the job
+        :return: (status_code, info) or None if the job is unknown to the queue
+        """
+        with self._lock:
+            if job_id in self._dispatching:
+                return 200, dict(status="queued", user_id=self._dispatching[job_id], queue_position=0)
+
+            for user, queue in self._queues.items():
+                if any(entry[2] == job_id for entry in queue):
+                    return 200, dict(status="queued", user_id=user, queue_position=self._position(job_id))
+
+        return self._results.get(job_id)
@@ -1,13 +1,24 @@
 # -*- coding: utf-8 -*-
 import pprint
+import re
+import threading
+import time
+from functools import partial
 from openeo_core.jobs import POST_JOBS_DOC
 from openeo_core.jobs import Jobs
-from graas_openeo_core_wrapper.graas_interface import GRaaSInterface
+from graas_openeo_core_wrapper.graas_interface import GRaaSInterface, invalidate_catalogue
 from flask import make_response, jsonify, request
 from flask_restful_swagger_2 import swagger
-from graas_openeo_core_wrapper.process_definitions import analyse_process_graph
-import graas_openeo_core_wrapper
-from graas_openeo_core_wrapper.graph_db import GraphDB
+from graas_openeo_core_wrapper.process_definitions import compile_process_graph
+from graas_openeo_core_wrapper.process_definitions.graph_hash import canonical_graph_hash
+from graas_openeo_core_wrapper.process_definitions.tiling import split_process_graph
+from graas_openeo_core_wrapper.process_definitions.temporal import split_time_reduction
+from graas_openeo_core_wrapper.graph_db import GraphDB, GraphHashDB, JobGroupDB, MapsetNameAllocator
+from graas_openeo_core_wrapper.executor import run_concurrently
+from graas_openeo_core_wrapper import job_groups
+from graas_openeo_core_wrapper.jobs_job_id import get_job_poller, invalidate_catalogue_when_final
+from graas_openeo_core_wrapper.job_queue import get_job_queue
+from graas_openeo_core_wrapper.config import Config
 
 __license__ = "Apache License, Version 2.0"
 __author__ = "Sören Gebbert"
@@ -15,66 +26,352 @@ __copyright__ = "Copyright 20186, Sören Gebbert"
 __maintainer__ = "Soeren Gebbert"
 __email__ = "soerengebbert@googlemail.com"
 
+# The prefix of the names of the mapsets that are created for persistent jobs
+MAPSET_PREFIX = "openeo_mapset"
+
+# Serializes the updates of the job records of the graph hash db
+_HASH_DB_LOCK = threading.Lock()
+
 
 class GRaaSJobs(Jobs):
 
     def __init__(self):
         self.iface = GRaaSInterface()
         self.db = GraphDB()
+        self.hash_db = GraphHashDB()
+        self.group_db = JobGroupDB()
+        self.mapset_allocator = MapsetNameAllocator()
+
+    def _first_free_mapset_number(self, location):
+        """Return the number after the highest number of the existing persistent job mapsets of a location
+
+        :param location: The name of the location
+        :return: The first free mapset number
+        """
+        status_code, mapsets = self.iface.list_mapsets(location=location, use_cache=False)
+        if status_code != 200:
+            raise Exception("An internal error occurred while catching mapsets!")
+
+        numbers = [int(mapset[len(MAPSET_PREFIX) + 1:]) for mapset in mapsets
+                   if re.match(r"^%s_\d+$" % MAPSET_PREFIX, mapset)]
+
+        return max(numbers) + 1 if numbers else 0
+
+    def _find_finished_job(self, graph_hash):
+        """Return the latest finished job of a process graph hash that did not finish more than
+        Config.JOB_REUSE_MAX_AGE seconds ago
+
+        The finish time is the timestamp of the last update of the job in the backend,
+        the submission time if the backend does not provide it. Jobs whose state is not known
+        within Config.JOB_REUSE_LOOKUP_TIMEOUT seconds are not reused.
+
+        :param graph_hash: The canonical hash of the process graph
+        :return: (job_id, job_info) or (None, None) if no finished job was found
+        """
+        if Config.JOB_REUSE_MAX_AGE is None:
+            return None, None
+
+        records = list(reversed(self.hash_db.get(graph_hash, [])))
+
+        # The states of all records are requested together, the lookup waits once for all of them
+        poller = get_job_poller()
+        poller.start()
+        for record in records:
+            poller.track(record["job_id"])
+
+        deadline = time.monotonic() + Config.JOB_REUSE_LOOKUP_TIMEOUT
+        for record in records:
+            state = poller.read(record["job_id"], timeout=max(0, deadline - time.monotonic()))
+            if state is None or state[0] != 200 or state[1]["status"] != "finished":
+                continue
+
+            finished = state[1]["job_info"].get("timestamp") or record["submitted"]
+            if time.time() - finished <= Config.JOB_REUSE_MAX_AGE:
+                return record["job_id"], state[1]["job_info"]
+
+        return None, None
+
+    def _store_job(self, graph_hash, job_id):
+        """Remember the job that was submitted for a process graph hash
+
+        :param graph_hash: The canonical hash of the process graph
+        :param job_id: The id of the submitted job
+        """
+        with _HASH_DB_LOCK:
+            records = self.hash_db.get(graph_hash, [])
+            records.append(dict(job_id=job_id, submitted=time.time()))
+            self.hash_db[graph_hash] = records[-Config.JOB_REUSE_HISTORY:]
+
+        # The state of the new job is requested by the shared poller from now on,
+        # a queued job changed its state with the submission
+        get_job_poller().track(job_id, refresh=True)
+
+    def _store_queued_job(self, job_id, backend_job_id):
+        """Store a queued job that was submitted as job group with a single backend job
+
+        The queued job keeps its id, so that clients can follow it after the submission.
+
+        :param job_id: The id of the queued job
+        :param backend_job_id: The id of the backend job
+        """
+        self.group_db[job_id] = dict(children=[backend_job_id], submitted=time.time())
+
+    def _get_user(self):
+        """Return the name of the user that sends the request, the client address if it is not authenticated
+
+        :return: The user name
+        """
+        if request.authorization is not None and request.authorization.username:
+            return request.authorization.username
+
+        return request.remote_addr
+
+    def _admit(self, process_graph, submit):
+        """Submit a job through the job queue
+
+        :param process_graph: The process description of the job
+        :param submit: The callable that submits the job and returns (status_code, data)
+        :return: The flask response
+        """
+        priority = int(request.args.get("priority", 0))
+        priority = max(-Config.JOB_QUEUE_MAX_PRIORITY, min(priority, Config.JOB_QUEUE_MAX_PRIORITY))
+
+        status, data = get_job_queue().admit(self._get_user(), priority, submit)
+
+        if status == 202:
+            # Save the process graph of the queued job into the graph db
+            self.db[data["job_id"]] = process_graph
+            get_job_poller().track(data["job_id"])
+
+        return make_response(jsonify(data), status)
+
+    def _submit_group(self, process_graph, graph_hash, calls, graphs, group, job_id=None):
+        """Submit the backend jobs of a job group concurrently and store the job group
+
+        If the submission of a backend job fails, the already submitted backend jobs are terminated.
+
+        :param process_graph: The process description of the job group
+        :param graph_hash: The canonical hash of the process graph
+        :param calls: The list of callables that submit the backend jobs
+        :param graphs: The list of process descriptions of the backend jobs
+        :param group: The job group record, the backend job ids are added as children
+        :param job_id: The id of the queued job that is used as job group id, None to create a new id
+        :return: (status_code, data)
+        """
+        results = run_concurrently(calls, return_exceptions=True)
+
+        children = []
+        failure = None
+        for result in results:
+            if isinstance(result, Exception):
+                failure = (400, {"error": str(result)})
+            elif result[0] != 200:
+                failure = result
+            else:
+                children.append(result[1])
+
+        if failure is not None:
+            run_concurrently([partial(self.iface.delete_resource, child["resource_id"]) for child in children],
+                             return_exceptions=True)
+            return failure
+
+        group_id = job_id if job_id is not None else job_groups.create_group_id()
+        group["children"] = [child["resource_id"] for child in children]
+        group["submitted"] = time.time()
+        self.group_db[group_id] = group
+
+        # Save the process graphs of the group and of its backend jobs into the graph db
+        self.db[group_id] = process_graph
+        for child, graph in zip(children, graphs):
+            self.db[child["resource_id"]] = graph
+
+        self._store_job(graph_hash, group_id)
+
+        job_info = dict(resource_id=group_id,
+                        status=job_groups.combine_status([child.get("status") for child in children]),
+                        children=children)
+
+        return 200, {"job_id": group_id, "job_info": job_info}
+
+    def _submit_tiles(self, process_graph, graph_hash, location, tiles, job_id=None):
+        """Submit a backend job for each tile of a process graph and store them as job group
+
+        :param process_graph: The process description that was split into tiles
+        :param graph_hash: The canonical hash of the process graph
+        :param location: The location of the input products
+        :param tiles: The list of (tile, process description) tuples
+        :param job_id: The id of the queued job, None if the job was not queued
+        :return: (status_code, data)
+        """
+        calls = [partial(self.iface.async_ephemeral_processing_export, location=location,
+                         process_chain=dict(list=compile_process_graph(graph).process_list, version="1"))
+                 for tile, graph in tiles]
+
+        return self._submit_group(process_graph, graph_hash, calls, [graph for tile, graph in tiles],
+                                  dict(tiles=[tile for tile, graph in tiles]), job_id=job_id)
+
+    def _list_start_times(self, product_id):
+        """Return the start times of the maps of a strds, so that time chunks without maps are not submitted
+
+        :param product_id: The strds product id
+        :return: The list of start time strings
+        """
+        status, layers = self.iface.strds_raster_layers(product_id)
+        if status != 200:
+            raise Exception("The maps of product <%s> could not be listed: %s" % (product_id, str(layers)))
+
+        return [layer["start_time"] for layer in layers]
+
+    def _submit_time_chunks(self, process_graph, graph_hash, location, split, job_id=None):
+        """Submit a backend job for each part of the date range of a time reduction and store them as job group
+
+        The partial reductions are computed in persistent mapsets, so that the job that merges them
+        can read them when all parts are finished. The mapsets are deleted when the job group
+        reached a final state.
+
+        :param process_graph: The process description that was split in time
+        :param graph_hash: The canonical hash of the process graph
+        :param location: The location of the input products
+        :param split: The TemporalSplit of the process graph
+        :param job_id: The id of the queued job, None if the job was not queued
+        :return: (status_code, data)
+        """
+        compiled_chunks = [compile_process_graph(graph, persistent=True) for chunk, graph in split.chunks]
+        mapsets = [self.mapset_allocator.allocate(location=location, prefix=MAPSET_PREFIX,
+                                                  seed=lambda: self._first_free_mapset_number(location))
+                   for chunk in split.chunks]
+
+        calls = [partial(self.iface.async_persistent_processing, location=location, mapset=mapset,
+                         process_chain=dict(list=compiled.process_list, version="1"))
+                 for compiled, mapset in zip(compiled_chunks, mapsets)]
+
+        # The partial results of each output are merged into a single map
+        outputs = [["%s@%s" % (compiled.output_names[i], mapset) for compiled, mapset in zip(compiled_chunks, mapsets)]
+                   for i in range(len(compiled_chunks[0].output_names))]
+
+        group = dict(chunks=[chunk for chunk, graph in split.chunks],
+                     mapsets=mapsets,
+                     merge=dict(location=location, method=split.merge_method, export=split.export, outputs=outputs),
+                     merge_job=None)
+
+        # The jobs create the new mapsets, hence the cached listings are outdated when the job group is finished
+        group_id = job_id if job_id is not None else job_groups.create_group_id()
+        invalidate_catalogue_when_final(group_id, location, mapsets)
+
+        result = self._submit_group(process_graph, graph_hash, calls, [graph for chunk, graph in split.chunks],
+                                    group, job_id=group_id)
+
+        if result[0] != 200:
+            for mapset in mapsets:
+                invalidate_catalogue(location=location, mapset=mapset)
+
+        return result
+
+    def _submit_ephemeral(self, process_graph, graph_hash, location, process_list, job_id=None):
+        """Submit a job that runs in an ephemeral mapset
+
+        :param process_graph: The process description of the job
+        :param graph_hash: The canonical hash of the process graph
+        :param location: The location of the input products
+        :param process_list: The compiled process list
+        :param job_id: The id of the queued job, None if the job was not queued
+        :return: (status_code, data)
+        """
+        process_chain = dict(list=process_list,
+                             version="1")
+
+        # pprint.pprint(process_chain)
+
+        status, response = self.iface.async_ephemeral_processing_export(location=location,
+                                                                        process_chain=process_chain)
+        # pprint.pprint(response)
+
+        # Save the process graph into the graph db
+        self.db[response["resource_id"]] = process_graph
+
+        if status != 200:
+            return status, response
+
+        if job_id is None:
+            job_id = response["resource_id"]
+        else:
+            self._store_queued_job(job_id, response["resource_id"])
+
+        self._store_job(graph_hash, job_id)
+
+        return 200, {"job_id": job_id, "job_info": response}
+
+    def _submit_persistent(self, process_graph, location, process_list, job_id=None):
+        """Submit a job that runs in a new persistent mapset
+
+        :param process_graph: The process description of the job
+        :param location: The location of the input products
+        :param process_list: The compiled process list
+        :param job_id: The id of the queued job, None if the job was not queued
+        :return: (status_code, data)
+        """
+        new_mapset = self.mapset_allocator.allocate(location=location, prefix=MAPSET_PREFIX,
+                                                    seed=lambda: self._first_free_mapset_number(location))
+
+        process_chain = dict(list=process_list,
+                             version="1")
+
+        # pprint.pprint(process_chain)
+
+        status, response = self.iface.async_persistent_processing(location=location,
+                                                                  mapset=new_mapset,
+                                                                  process_chain=process_chain)
+        # pprint.pprint(response)
+
+        # Save the process graph into the graph db
+        self.db[response["resource_id"]] = process_graph
+
+        if status != 200:
+            invalidate_catalogue(location=location, mapset=new_mapset)
+            return status, response
+
+        if job_id is None:
+            job_id = response["resource_id"]
+        else:
+            self._store_queued_job(job_id, response["resource_id"])
+
+        # The job creates the new mapset, hence the cached listings are outdated when the job is finished
+        invalidate_catalogue_when_final(job_id, location, [new_mapset])
+
+        get_job_poller().track(job_id, refresh=True)
+
+        return 200, {"job_id": job_id, "job_info": response}
 
     @swagger.doc(POST_JOBS_DOC)
     def put(self):
         """Modify the existing database by running the job in a persistent mapset
 
+        The job is admitted by the job queue, see post().
+
         :return:
         """
 
         try:
 
-            # Empty the process location
-            graas_openeo_core_wrapper.PROCESS_LOCATION = {}
             process_graph = request.get_json()
-            # Transform the process graph into a process chain and store the input location
-            # Check all locations in the process graph
-            result_name, process_list = analyse_process_graph(process_graph)
+            # Transform the process graph into a process chain and store the input locations
+            compiled = compile_process_graph(process_graph, persistent=True)
 
-            if len(graas_openeo_core_wrapper.PROCESS_LOCATION) == 0 or len(graas_openeo_core_wrapper.PROCESS_LOCATION) > 1:
+            # Check all locations in the process graph
+            if len(compiled.locations) != 1:
                 return make_response(jsonify({"description":"Processes can only be defined for a single location!"},
                                              400))
 
-            location = graas_openeo_core_wrapper.PROCESS_LOCATION.keys()
-            location = list(location)[0]
-
-            status_code, mapsets = self.iface.list_mapsets(location=location)
-            if status_code != 200:
-                return make_response(jsonify({"description":"An internal error occurred "
-                                                            "while catching mapsets!"}, 400))
-
-            count = 0
-            name = "openeo_mapset"
-            new_mapset = "%s_%i"%(name, count)
-            while new_mapset in mapsets:
-                count += 1
-                new_mapset = "%s_%i"%(name, count)
-
-            process_chain = dict(list=process_list,
-                                 version="1")
+            # Reject process graphs with missing input products before they occupy a backend worker
+            missing = self.iface.find_missing_layers(compiled.sources)
+            if missing:
+                return make_response(jsonify({"description": "The following products do not exist: "
+                                                             "%s" % ", ".join(missing)}), 400)
 
-            # pprint.pprint(process_chain)
+            location = compiled.locations[0]
+            process_list = compiled.process_list
 
-            status, response = self.iface.async_persistent_processing(location=location,
-                                                                      mapset=new_mapset,
-                                                                      process_chain=process_chain)
-            # pprint.pprint(response)
-
-            # Save the process graph into the graph db
-            self.db[response["resource_id"]] = process_graph
-
-            if status == 200:
-                return make_response(jsonify({"job_id":response["resource_id"],
-                                              "job_info":response}), status)
-            else:
-                return make_response(jsonify(response), status)
+            return self._admit(process_graph, partial(self._submit_persistent, process_graph, location, process_list))
         except Exception as e:
                 return make_response(jsonify({"error": str(e)}), 400)
 
@@ -82,40 +379,84 @@ class GRaaSJobs(Jobs):
     def post(self):
         """Run the job in an ephemeral mapset
 
+        The results of a finished job with an identical process graph are reused,
+        unless the query parameter reuse=false is set.
+
+        If a tile size is set with the query parameter tile_size or Config.JOB_TILE_SIZE,
+        process graphs that can be tiled are split into one backend job per tile.
+        If a number of time chunks is set with the query parameter time_chunks or Config.JOB_TIME_CHUNKS,
+        time reductions are split into one backend job per part of the date range and a final job
+        that merges the partial results. The job id then identifies the group of these backend jobs.
+
+        The number of running jobs is limited overall and per user by the job queue. Jobs above
+        the limits are queued and 202 is returned with the position of the job in the queue, the
+        job is submitted to the backend as soon as a running job finished. The query parameter
+        priority orders the queued jobs of a user, higher priorities are submitted first.
+
         :return:
         """
 
         try:
-            # Empty the process location
-            graas_openeo_core_wrapper.PROCESS_LOCATION = {}
             process_graph = request.get_json()
-            # Transform the process graph into a process chain and store the input location
-            # Check all locations in the process graph
-            result_name, process_list = analyse_process_graph(process_graph)
+            graph_hash = canonical_graph_hash(process_graph)
 
-            if len(graas_openeo_core_wrapper.PROCESS_LOCATION) == 0 or len(graas_openeo_core_wrapper.PROCESS_LOCATION) > 1:
+            if request.args.get("reuse", "true").lower() != "false":
+                job_id, job_info = self._find_finished_job(graph_hash)
+                if job_id is not None:
+                    return make_response(jsonify({"job_id": job_id,
+                                                  "job_info": job_info,
+                                                  "reused": True}), 200)
+
+            # Transform the process graph into a process chain and store the input locations
+            compiled = compile_process_graph(process_graph)
+
+            # Check all locations in the process graph
+            if len(compiled.locations) != 1:
                 return make_response(jsonify({"description":"Processes can only be defined for a single location!"},
                                              400))
 
-            location = graas_openeo_core_wrapper.PROCESS_LOCATION.keys()
-            location = list(location)[0]
+            # Reject process graphs with missing input products before they occupy a backend worker
+            missing = self.iface.find_missing_layers(compiled.sources)
+            if missing:
+                return make_response(jsonify({"description": "The following products do not exist: "
+                                                             "%s" % ", ".join(missing)}), 400)
 
-            process_chain = dict(list=process_list,
-                                 version="1")
+            location = compiled.locations[0]
+            process_list = compiled.process_list
 
-            # pprint.pprint(process_chain)
+            tile_size = request.args.get("tile_size", Config.JOB_TILE_SIZE)
+            if tile_size is not None:
+                tile_size = float(tile_size)
+                tile_overlap = int(request.args.get("tile_overlap", Config.JOB_TILE_OVERLAP))
+                if tile_size <= 0 or tile_overlap < 0:
+                    return make_response(jsonify({"description": "The tile size must be larger than 0 and the "
+                                                                 "tile overlap must not be negative"}), 400)
 
-            status, response = self.iface.async_ephemeral_processing_export(location=location,
-                                                                            process_chain=process_chain)
-            # pprint.pprint(response)
+                # The number of tiles is checked before the tiles are created
+                try:
+                    tiles = split_process_graph(process_graph, tile_size, tile_overlap,
+                                                max_tiles=Config.JOB_MAX_TILES)
+                except Exception as e:
+                    return make_response(jsonify({"description": str(e)}), 400)
 
-            # Save the process graph into the graph db
-            self.db[response["resource_id"]] = process_graph
+                if tiles is not None:
+                    return self._admit(process_graph, partial(self._submit_tiles, process_graph, graph_hash,
+                                                              location, tiles))
 
-            if status == 200:
-                return make_response(jsonify({"job_id":response["resource_id"],
-                                              "job_info":response}), status)
-            else:
-                return make_response(jsonify(response), status)
+            time_chunks = request.args.get("time_chunks", Config.JOB_TIME_CHUNKS)
+            if time_chunks is not None:
+                time_chunks = int(time_chunks)
+                if time_chunks < 1 or time_chunks > Config.JOB_MAX_TIME_CHUNKS:
+                    return make_response(jsonify({"description": "The number of time chunks must be between 1 "
+                                                                 "and %i" % Config.JOB_MAX_TIME_CHUNKS}), 400)
+
+                split = split_time_reduction(process_graph, time_chunks,
+                                             list_start_times=self._list_start_times)
+                if split is not None:
+                    return self._admit(process_graph, partial(self._submit_time_chunks, process_graph, graph_hash,
+                                                              location, split))
+
+            return self._admit(process_graph, partial(self._submit_ephemeral, process_graph, graph_hash,
+                                                      location, process_list))
         except Exception as e:
                 return make_response(jsonify({"error": str(e)}), 400)
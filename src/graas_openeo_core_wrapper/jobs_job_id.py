@@ -1,11 +1,20 @@
 # -*- coding: utf-8 -*-
+import hashlib
+import json
 import pprint
+import threading
+from functools import partial
 from openeo_core.jobs_job_id import GET_JOBS_ID_DOC, DELETE_JOBS_ID_DOC
 from openeo_core.jobs_job_id import JobsJobId
-from graas_openeo_core_wrapper.graas_interface import GRaaSInterface
-from flask import make_response, jsonify
+from graas_openeo_core_wrapper.graas_interface import GRaaSInterface, invalidate_catalogue
+from flask import make_response, jsonify, request
 from flask_restful_swagger_2 import swagger
-from graas_openeo_core_wrapper.graph_db import GraphDB
+from graas_openeo_core_wrapper.graph_db import GraphDB, JobGroupDB, JobStateDB
+from graas_openeo_core_wrapper import job_groups
+from graas_openeo_core_wrapper.cache import TTLCache
+from graas_openeo_core_wrapper.config import Config
+from graas_openeo_core_wrapper.job_poller import JobStatusPoller, TERMINAL_STATES
+from graas_openeo_core_wrapper.job_queue import get_job_queue
 
 __license__ = "Apache License, Version 2.0"
 __author__ = "Sören Gebbert"
@@ -13,42 +22,243 @@ __copyright__ = "Copyright 20186, Sören Gebbert"
 __maintainer__ = "Soeren Gebbert"
 __email__ = "soerengebbert@googlemail.com"
 
+# The poller of the job states, shared by all requests of this process
+_JOB_POLLER = None
+_JOB_POLLER_LOCK = threading.Lock()
+
+# The cache of the process graphs of the jobs, that never change after the submission
+_PROCESS_GRAPH_CACHE = TTLCache(maxsize=Config.JOB_STATUS_CACHE_SIZE)
+
+# The mapsets that are created by running jobs, keys are job ids and values are lists of (location, mapset) tuples
+_JOB_MAPSETS = {}
+_JOB_MAPSETS_LOCK = threading.Lock()
+
+
+def invalidate_catalogue_when_final(job_id, location, mapsets):
+    """Remove the cached listings and metadata of the mapsets of a job when the job reached a final state
+
+    The backend creates the mapsets and their layers while the job runs, hence the
+    cached listings are outdated when the job finished and not when it was submitted.
+
+    :param job_id: The id of the job
+    :param location: The location of the mapsets
+    :param mapsets: The list of mapsets that the job creates
+    """
+    with _JOB_MAPSETS_LOCK:
+        _JOB_MAPSETS.setdefault(job_id, []).extend((location, mapset) for mapset in mapsets)
+
+
+def _invalidate_job_catalogue(job_id, state):
+    """Poller listener that removes the cached listings of the mapsets of a job that reached a final state
+
+    :param job_id: The id of the job
+    :param state: The (status_code, info, etag) tuple of the job
+    """
+    with _JOB_MAPSETS_LOCK:
+        entries = _JOB_MAPSETS.pop(job_id, [])
+
+    for location, mapset in entries:
+        invalidate_catalogue(location=location, mapset=mapset)
+
+
+def _store_terminal_state(job_id, state, state_db):
+    """Poller listener that stores the terminal status of a job, so that it is not requested after a restart
+
+    :param job_id: The id of the job
+    :param state: The (status_code, info, etag) tuple of the job
+    :param state_db: The JobStateDB object
+    """
+    if state[0] == 200 and state[1].get("status") in TERMINAL_STATES:
+        state_db[job_id] = state[1]["status"]
+
+
+def _delete_group_mapsets(job_id, state, iface, group_db):
+    """Poller listener that deletes the mapsets of the partial results of a job group that reached a final state
+
+    The mapsets are deleted in a separate thread, since the listeners must return quickly.
+
+    :param job_id: The id of the job
+    :param state: The (status_code, info, etag) tuple of the job
+    :param iface: The GRaaSInterface object
+    :param group_db: The JobGroupDB object
+    """
+    group = group_db.get(job_id)
+    if group is None or "merge" not in group or not group.get("mapsets"):
+        return
+
+    thread = threading.Thread(target=job_groups.delete_partial_mapsets, args=(iface, group_db, job_id))
+    thread.daemon = True
+    thread.start()
+
+
+def compute_etag(info):
+    """Compute the entity tag of a job information
+
+    :param info: The job information dictionary
+    :return: The entity tag string
+    """
+    return hashlib.sha1(json.dumps(info, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def get_process_graph(db, job_id):
+    """Return the process graph of a job from the graph db
+
+    :param db: The GraphDB object
+    :param job_id: The id of the job
+    :return: The process graph
+    """
+    process_graph = _PROCESS_GRAPH_CACHE.get(job_id)
+    if process_graph is None:
+        process_graph = db[job_id]
+        _PROCESS_GRAPH_CACHE.put(job_id, process_graph)
+
+    return process_graph
+
+
+def fetch_job_info(job_id, iface, db, group_db):
+    """Request the information of a job from the backend
+
+    Jobs that wait in the job queue are not requested from the backend,
+    their information contains their position in the queue.
+
+    :param job_id: The id of the job
+    :param iface: The GRaaSInterface object
+    :param db: The GraphDB object
+    :param group_db: The JobGroupDB object
+    :return: (status_code, info, etag)
+    """
+    # Unknown job ids are final, they must not be requested from the backend again and again
+    if job_id not in db:
+        info = dict(job_id=job_id,
+                    status="error",
+                    description="The job <%s> does not exist" % job_id)
+        return 404, info, compute_etag(info)
+
+    queued = get_job_queue().queued_info(job_id)
+    if queued is not None:
+        status, info = queued
+        info = dict(info, job_id=job_id, process_graph=get_process_graph(db, job_id))
+        return status, info, compute_etag(info)
+
+    status, response = job_groups.resource_info(iface, group_db, job_id)
+    process_graph = get_process_graph(db, job_id)
+
+    if status == 200:
+        info = dict(job_id=job_id,
+                    user_id=response["user_id"],
+                    status=response["status"],
+                    process_graph=process_graph,
+                    submitted=response["accept_datetime"],
+                    last_update=response["datetime"],
+                    consumed_credits=response["time_delta"],
+                    job_info=response)
+
+        if "urls" in response and "resources" in response["urls"]:
+            info["resources"] = response["urls"]["resources"]
+    else:
+        info = dict(job_id=job_id,
+                    status="error",
+                    process_graph=process_graph,
+                    job_info=response)
+
+    return status, info, compute_etag(info)
+
+
+def get_job_poller():
+    """Return the process wide poller of the job states
+
+    The poller is started with the jobs of the graph db that did not reach a terminal state,
+    the backend jobs of job groups are requested through their job group.
+    The job queue and the catalogue cache are notified by the poller when a job reached a final state,
+    the mapsets of the partial results of job groups are deleted then.
+
+    :return: The JobStatusPoller object
+    """
+    global _JOB_POLLER
+
+    if _JOB_POLLER is None:
+        with _JOB_POLLER_LOCK:
+            if _JOB_POLLER is None:
+                db = GraphDB()
+                group_db = JobGroupDB()
+                iface = GRaaSInterface()
+                poller = JobStatusPoller(fetch=partial(fetch_job_info, iface=iface, db=db, group_db=group_db))
+                poller.add_listener(get_job_queue().job_finished)
+                poller.add_listener(_invalidate_job_catalogue)
+                state_db = JobStateDB()
+                poller.add_listener(partial(_store_terminal_state, state_db=state_db))
+                poller.add_listener(partial(_delete_group_mapsets, iface=iface, group_db=group_db))
+
+                if Config.JOB_POLLER_TRACK_STORED_JOBS is True:
+                    skipped = set(state_db.keys())
+                    for group in group_db.values():
+                        skipped.update(group["children"])
+                    for job_id in db.keys():
+                        if job_id not in skipped:
+                            poller.track(job_id)
+
+                poller.start()
+                _JOB_POLLER = poller
+
+    return _JOB_POLLER
+
 
 class GRaaSJobsJobId(JobsJobId):
 
     def __init__(self):
         self.iface = GRaaSInterface()
         self.db = GraphDB()
+        self.group_db = JobGroupDB()
 
     @swagger.doc(GET_JOBS_ID_DOC)
     def get(self, job_id):
+        """Return the information of a job
+
+        The response carries an ETag header. If the If-None-Match header of the request
+        matches the current ETag, 304 is returned without a body.
 
+        With the query parameter wait=<seconds> the request blocks until the state of the job
+        differs from the state of the If-None-Match header, the job is finished or the number of
+        seconds passed.
+
+        The state is read from the shared job poller, hence the backend is not requested
+        for each client request.
+
+        :param job_id: The id of the job
+        :return: The flask response
+        """
         try:
-            status, response = self.iface.resource_info(job_id)
-            if status == 200:
-                process_graph = self.db[job_id]
+            poller = get_job_poller()
+            state = None
 
-                info = dict(job_id=job_id,
-                            user_id=response["user_id"],
-                            status=response["status"],
-                            process_graph=process_graph,
-                            submitted=response["accept_datetime"],
-                            last_update=response["datetime"],
-                            consumed_credits=response["time_delta"],
-                            job_info=response)
+            if "wait" in request.args:
+                try:
+                    timeout = min(float(request.args["wait"]), Config.JOB_WAIT_MAX_TIMEOUT)
+                except ValueError:
+                    return make_response(jsonify({"description": "The wait parameter must be "
+                                                                 "a number of seconds"}), 400)
 
-                if "urls" in response and "resources" in response["urls"]:
-                    info["resources"] = response["urls"]["resources"]
+                state = poller.wait_for_change(job_id, etag=next(iter(request.if_none_match), None),
+                                               timeout=max(0.0, timeout))
 
-                return make_response(jsonify(info), 200)
+            if state is None:
+                state = poller.read(job_id, timeout=Config.HTTP_READ_TIMEOUT)
+
+            if state is None:
+                return make_response(jsonify({"description": "The state of the job could not be "
+                                                             "requested in time"}), 503)
+
+            status, info, etag = state
+
+            if status == 200 and request.if_none_match.contains(etag):
+                response = make_response("", 304)
             else:
-                process_graph = self.db[job_id]
-                info = dict(job_id=job_id,
-                            status="error",
-                            process_graph=process_graph,
-                            job_info=response)
+                response = make_response(jsonify(info), status)
 
-                return make_response(jsonify(info), status)
+            if status == 200:
+                response.set_etag(etag)
+
+            return response
         except Exception as e:
                 return make_response(jsonify({"error": str(e)}), 500)
 
@@ -56,7 +266,15 @@ class GRaaSJobsJobId(JobsJobId):
     def delete(self, job_id):
 
         try:
-            status, response = self.iface.resource_info(job_id)
+            if get_job_queue().cancel(job_id) is True:
+                # The job never reached the backend
+                get_job_poller().track(job_id, refresh=True)
+                info = dict(job_id=job_id,
+                            status="terminated",
+                            process_graph=self.db[job_id])
+                return make_response(jsonify(info), 200)
+
+            status, response = job_groups.resource_info(self.iface, self.group_db, job_id)
 
             if status == 200:
 
@@ -70,7 +288,9 @@ class GRaaSJobsJobId(JobsJobId):
                             consumed_credits=response["time_delta"],
                             job_info=response)
 
-                status, response = self.iface.delete_resource(job_id)
+                status, response = job_groups.delete_resource(self.iface, self.group_db, job_id)
+                # The job changes its state, hence it is requested again
+                get_job_poller().track(job_id, refresh=True)
                 if status != 200:
                     process_graph = self.db[job_id]
                     info = dict(job_id=job_id,
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+import json
+from flask import Response, request
+from flask_restful_swagger_2 import swagger, Resource
+from graas_openeo_core_wrapper.config import Config
+from graas_openeo_core_wrapper.jobs_job_id import get_job_poller
+
+__license__ = "Apache License, Version 2.0"
+__author__ = "Sören Gebbert"
+__copyright__ = "Copyright 2018, Sören Gebbert"
+__maintainer__ = "Soeren Gebbert"
+__email__ = "soerengebbert@googlemail.com"
+
+
+GET_JOBS_ID_EVENTS_DOC = {
+    "summary": "Streams the state changes of a job as server-sent events",
+    "description": "Each change of the job state is sent as event of type status, its data is the "
+                   "job information of GET /jobs/{job_id} and its id is the ETag of the job information. "
+                   "The stream ends when the job is finished, failed or terminated. "
+                   "A client that reconnects with the Last-Event-ID header receives only newer states.",
+    "tags": ["Job Management"],
+    "parameters": [
+        {
+            "name": "job_id",
+            "in": "path",
+            "type": "string",
+            "description": "job identifier string",
+            "required": True
+        }
+    ],
+    "responses": {
+        "200": {"description": "The event stream of the job states"}
+    }
+}
+
+
+def create_event(state):
+    """Create a server-sent event of a job state
+
+    :param state: The (status_code, info, etag) tuple of the job or None for a keep-alive comment
+    :return: The event string
+    """
+    if state is None:
+        return ": keep-alive\n\n"
+
+    status, info, etag = state
+    event = "status" if status == 200 else "error"
+    lines = ["event: %s" % event]
+    if etag is not None:
+        lines.append("id: %s" % etag)
+    lines.append("data: %s" % json.dumps(info, default=str))
+
+    return "\n".join(lines) + "\n\n"
+
+
+class GRaaSJobsJobIdEvents(Resource):
+
+    @swagger.doc(GET_JOBS_ID_EVENTS_DOC)
+    def get(self, job_id):
+
+        states = get_job_poller().iterate_changes(job_id,
+                                                  etag=request.headers.get("Last-Event-ID"),
+                                                  timeout=Config.JOB_EVENTS_MAX_DURATION,
+                                                  keepalive=Config.JOB_EVENTS_KEEPALIVE)
+
+        response = Response((create_event(state) for state in states), mimetype="text/event-stream")
+        response.headers["Cache-Control"] = "no-cache"
+        # Disable the buffering of reverse proxies, so that the events are delivered immediately
+        response.headers["X-Accel-Buffering"] = "no"
+
+        return response
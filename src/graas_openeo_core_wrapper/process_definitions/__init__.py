@@ -1,8 +1,27 @@
 # -*- coding: utf-8 -*-
+import copy
+from collections import namedtuple
+from graas_openeo_core_wrapper.cache import TTLCache
+from graas_openeo_core_wrapper.config import Config as GRaaSConfig
+from graas_openeo_core_wrapper.process_definitions.compile_context import CompileContext
+from graas_openeo_core_wrapper.process_definitions.graph_hash import canonical_graph_hash, subgraph_hashes
+from graas_openeo_core_wrapper.process_definitions.optimizer import optimize_process_chain, final_region_step
+from graas_openeo_core_wrapper.process_definitions.rewrite import push_down_filters
+from graas_openeo_core_wrapper.process_definitions.validate import validate_process_graph
 
 # This is the process dictionary that is used to store all processes of the GRaaS wrapper
 PROCESS_DESCRIPTION_DICT = {}
 PROCESS_DICT = {}
+# The properties of the processes that are used by the graph rewrites and the process chain optimizer:
+#   spatially_local: Each output pixel depends only on the input pixels at the same location
+#   temporally_local: Each output map depends only on the input maps of the same time stamp
+#   tileable: The results can be computed for tiles of the region and collected from all tiles
+#   merge_method: The r.series method that merges the results of a time reduction over parts
+#                 of the time series, only set if the reduction can be split in time
+PROCESS_PROPERTIES = {}
+# The functions that check the arguments of a process before the compilation, they get the arguments
+# and the number of inputs and return the list of error messages and the number of results
+PROCESS_VALIDATORS = {}
 # Import the process_definitions to fill the process.PROCESS_DICT with process_definitions
 import graas_openeo_core_wrapper.process_definitions.filter_bbox_process
 import graas_openeo_core_wrapper.process_definitions.filter_daterange_process
@@ -19,51 +38,135 @@ __maintainer__ = "Soeren Gebbert"
 __email__ = "soerengebbert@googlemail.com"
 
 
-def analyse_process_graph(graph):
+def _input_entries(graph):
+    """Return the collection entries of a process description
+
+    :param graph: The process description or the arguments of a process
+    :return: The list of collection entries
+    """
+    if not graph or ("collections" not in graph and "process_graph" not in graph):
+        raise Exception("process_graph or collection not found on process description")
+
+    if "process_graph" in graph:
+        return [graph["process_graph"]]
+
+    return graph["collections"]
+
+
+def analyse_process_graph(graph, context=None):
     """Analyse a process process graph and call the required subprocess analysis
 
     This function return the list of input names for the next process and the
     GRaaS process chain that was build before.
 
+    The process graph is traversed in depth first post order with an explicit stack,
+    so that the inputs of a process are analysed before the process itself.
+    Hence the depth of the process graph is not limited by the recursion limit.
+
     :param graph: The process description
+    :param context: The CompileContext of the current compilation, a new one is created if not set
     :return: (output_name_list, pc)
     """
+    if context is None:
+        context = CompileContext()
 
-    if not graph or ("collections" not in graph and "process_graph" not in graph):
-        raise Exception("process_graph or collection not found on process description")
+    entry_list = _input_entries(graph)
+
+    # Identical subgraphs are compiled only once, their output names are reused
+    hashes = None
+    if context.subgraph_outputs is not None:
+        hashes = subgraph_hashes(entry_list)
 
     process_list = []
     input_list = []
 
-    if "process_graph" in graph:
-        entry = graph["process_graph"]
+    # The stack entries are (entry, input names of the entry, input names of the parent, first step).
+    # The input names of the entry are None until the inputs of the entry were pushed to the stack,
+    # the first step is the index of the first process chain step of the subgraph of the entry.
+    stack = [(entry, None, input_list, None) for entry in reversed(entry_list)]
+
+    while stack:
+        entry, inputs, parent_inputs, first_step = stack.pop()
 
         if "process_id" in entry:
 
-            if entry["process_id"] not in PROCESS_DICT:
-                raise Exception("Unsupported process id")
+            if inputs is None:
+                if entry["process_id"] not in PROCESS_DICT:
+                    raise Exception("Unsupported process id")
+
+                if hashes is not None and hashes[id(entry)] in context.subgraph_outputs:
+                    outputs, region_step = context.subgraph_outputs[hashes[id(entry)]]
+                    # The consumer must run in the region that the subgraph left behind
+                    if region_step is not None:
+                        process_list.append(dict(region_step, id=context.step_id("g.region")))
+                    parent_inputs.extend(outputs)
+                    continue
 
-            inputs, processes = PROCESS_DICT[entry["process_id"]](entry["args"])
+                inputs = []
+                stack.append((entry, inputs, parent_inputs, len(process_list)))
+                stack.extend((child, None, inputs, None) for child in reversed(_input_entries(entry["args"])))
+                continue
+
+            outputs, processes = PROCESS_DICT[entry["process_id"]](entry["args"], inputs, context)
             process_list.extend(processes)
-            input_list.extend(inputs)
+            parent_inputs.extend(outputs)
+
+            # The region that a subgraph leaves behind is set again when its outputs are reused,
+            # subgraphs whose region can not be restored by a single step are not reused
+            if hashes is not None:
+                reusable, region_step = final_region_step(process_list[first_step:])
+                if reusable:
+                    context.subgraph_outputs[hashes[id(entry)]] = (list(outputs), region_step)
         if "product_id" in entry:
             input = entry["product_id"]
-            input_list.append(input)
+            context.add_product(input)
+            parent_inputs.append(input)
 
-    elif "collections" in graph:
-        entry_list = graph["collections"]
-        for entry in entry_list:
+    return input_list, process_list
 
-            if "process_id" in entry:
 
-                if entry["process_id"] not in PROCESS_DICT:
-                    raise Exception("Unsupported process id")
+# The result of a process graph compilation
+CompiledProcessGraph = namedtuple("CompiledProcessGraph", ["output_names", "process_list", "locations", "sources"])
 
-                inputs, processes = PROCESS_DICT[entry["process_id"]](entry["args"])
-                process_list.extend(processes)
-                input_list.extend(inputs)
-            if "product_id" in entry:
-                inputs = entry["product_id"]
-                input_list.append(inputs)
+# The cache of compiled process graphs, keys are the canonical process graph hashes
+_COMPILE_CACHE = TTLCache(maxsize=GRaaSConfig.PROCESS_GRAPH_CACHE_SIZE)
 
-    return input_list, process_list
+
+def compile_process_graph(graph, persistent=False):
+    """Compile a process graph into a GRaaS process list
+
+    Compiled process graphs are cached by their canonical hash, so that resubmitted
+    process graphs are not analysed again. Process graphs that are not in the cache
+    are validated first, so that invalid process graphs are rejected before any work
+    is done. Temporal and spatial filters are pushed
+    towards the sources before the analysis. Structurally identical subgraphs are
+    emitted only once in the process list and their output names are reused.
+    Each compilation uses its own CompileContext, hence this function is thread safe.
+    The process list is optimized by fusing map algebra expressions and by removing
+    redundant region settings.
+
+    :param graph: The process description
+    :param persistent: Set True if the process list is run in a persistent mapset,
+                       whose region must be kept at the end of processing
+    :return: A CompiledProcessGraph (output_names, process_list, locations, sources)
+    """
+    key = (canonical_graph_hash(graph), persistent)
+    compiled = _COMPILE_CACHE.get(key)
+
+    if compiled is None:
+        errors = validate_process_graph(graph)
+        if errors:
+            raise Exception("Invalid process graph: " + "; ".join(errors))
+
+        context = CompileContext(deduplicate=True)
+        output_names, process_list = analyse_process_graph(push_down_filters(graph), context)
+        process_list = optimize_process_chain(process_list, discard_region=not persistent,
+                                              output_names=output_names)
+        compiled = CompiledProcessGraph(output_names=output_names,
+                                        process_list=process_list,
+                                        locations=sorted(context.locations),
+                                        sources=list(context.sources))
+        _COMPILE_CACHE.put(key, compiled)
+
+    # The caller may modify the process list
+    return copy.deepcopy(compiled)
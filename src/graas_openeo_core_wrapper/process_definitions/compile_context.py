@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+import itertools
+from graas_openeo_core_wrapper.graas_interface import GRaaSInterface
+
+__license__ = "Apache License, Version 2.0"
+__author__ = "Sören Gebbert"
+__copyright__ = "Copyright 2018, Sören Gebbert"
+__maintainer__ = "Soeren Gebbert"
+__email__ = "soerengebbert@googlemail.com"
+
+# The maximum length of the generated names of the process results
+MAX_OUTPUT_NAME_LENGTH = 128
+
+
+class CompileContext(object):
+    """The state of a single process graph compilation
+
+    Each compilation uses its own context, so that process graphs can be compiled
+    concurrently by several threads without sharing any state.
+    """
+
+    def __init__(self, deduplicate=False):
+        """Constructor
+
+        :param deduplicate: Set True to emit structurally identical subgraphs only once
+        """
+        # The locations of the input products
+        self.locations = set()
+        # The product ids of the input products in the order of their first use
+        self.sources = []
+        self._source_set = set()
+        # The counter that creates the numbers of the process chain step ids
+        self.step_counter = itertools.count()
+        # The (output names, region step) tuples of the process subgraphs that were already compiled,
+        # keys are the canonical subgraph hashes. The region step sets the region that was active after
+        # the subgraph, None if the subgraph does not change the region.
+        # It is None if identical subgraphs should not be deduplicated.
+        self.subgraph_outputs = {} if deduplicate else None
+        # The generated names of the process results and the number of times each base name was requested
+        self.output_names = set()
+        self._name_counts = {}
+
+    def step_id(self, module):
+        """Return a unique id for a process chain step of this compilation
+
+        The ids are numbered in the order of their creation, hence the same process graph
+        always results in the same process chain.
+
+        :param module: The name of the module of the step, e.g. t.rast.extract
+        :return: The step id, e.g. t_rast_extract_3
+        """
+        return "%s_%i" % (module.replace(".", "_"), next(self.step_counter))
+
+    def output_name(self, layer_name, process_name):
+        """Generate a unique name for the result of a process in this compilation
+
+        The name is composed of the input layer name and the process name. It is shortened to
+        MAX_OUTPUT_NAME_LENGTH characters, so that the names do not grow with the depth of the
+        process graph, and a number is appended if the name was already generated.
+
+        :param layer_name: The name of the input layer
+        :param process_name: The name of the process
+        :return: The name of the process result
+        """
+        base_name = "%s_%s" % (layer_name[:MAX_OUTPUT_NAME_LENGTH - len(process_name) - 1], process_name)
+
+        name = base_name
+        while name in self.output_names:
+            count = self._name_counts.get(base_name, 0) + 1
+            self._name_counts[base_name] = count
+            name = "%s_%i" % (base_name, count)
+
+        self.output_names.add(name)
+        return name
+
+    def add_product(self, product_id):
+        """Register an input product of the process graph and record its location
+
+        :param product_id: The product id in the form location.mapset.datatype.layer
+        """
+        if product_id not in self._source_set:
+            self._source_set.add(product_id)
+            self.sources.append(product_id)
+
+        location, mapset, datatype, layer = GRaaSInterface.layer_def_to_components(product_id)
+        if location is not None:
+            self.locations.add(location)
@@ -1,7 +1,6 @@
 # -*- coding: utf-8 -*-
 from graas_openeo_core_wrapper import process_definitions
 from graas_openeo_core_wrapper.graas_interface import GRaaSInterface
-from random import randint
 
 __license__ = "Apache License, Version 2.0"
 __author__ = "Sören Gebbert"
@@ -21,38 +20,74 @@ DOC = {
         },
         "left": {
             "description": "left boundary (longitude / easting)",
-            "required":True
+            "required":True,
+            "type": "number"
         },
         "right": {
             "description": "right boundary (longitude / easting)",
-            "required":True
+            "required":True,
+            "type": "number"
         },
         "top": {
             "description": "top boundary (latitude / northing)",
-            "required":True
+            "required":True,
+            "type": "number"
         },
         "bottom": {
             "description": "bottom boundary (latitude / northing)",
-            "required":True
+            "required":True,
+            "type": "number"
         },
         "ewres": {
             "description": "East-west resolution in mapset units",
-            "required":True
+            "required":True,
+            "type": "number"
         },
         "nsres": {
             "description": "North-south resolution in mapset units",
-            "required":True
+            "required":True,
+            "type": "number"
         },
         "srs": {
-            "description": "spatial reference system of boundaries as proj4 or EPSG:12345 like string"
+            "description": "spatial reference system of boundaries as proj4 or EPSG:12345 like string",
+            "type": "string"
         }
     }
 }
 
 process_definitions.PROCESS_DESCRIPTION_DICT[PROCESS_NAME] = DOC
+process_definitions.PROCESS_PROPERTIES[PROCESS_NAME] = dict(spatially_local=True,
+                                                            temporally_local=True,
+                                                            tileable=True)
 
 
-def create_graas_process_chain_entry(left, right, top, bottom, ewres, nsres):
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def validate_args(args, input_count):
+    """Check that the bounding box is not empty and that the resolution is positive
+
+    :param args: The process description arguments
+    :param input_count: The number of inputs of the process
+    :return: (error_list, output_count)
+    """
+    errors = []
+
+    if _is_number(args.get("left")) and _is_number(args.get("right")) and args["left"] >= args["right"]:
+        errors.append("The left boundary of process <%s> must be smaller than the right boundary" % PROCESS_NAME)
+
+    if _is_number(args.get("bottom")) and _is_number(args.get("top")) and args["bottom"] >= args["top"]:
+        errors.append("The bottom boundary of process <%s> must be smaller than the top boundary" % PROCESS_NAME)
+
+    for name in ("ewres", "nsres"):
+        if _is_number(args.get(name)) and args[name] <= 0:
+            errors.append("The resolution <%s> of process <%s> must be positive" % (name, PROCESS_NAME))
+
+    return errors, input_count
+
+
+def create_graas_process_chain_entry(left, right, top, bottom, ewres, nsres, context):
     """Create a GRaaS command of the process chain that uses g.region to create a valid computational region
     for the provide input strds
 
@@ -65,12 +100,11 @@ def create_graas_process_chain_entry(left, right, top, bottom, ewres, nsres):
     :param bottom:
     :param ewres:
     :param nsres:
+    :param context: The CompileContext of the compilation
     :return: A GRaaS process chain description
     """
 
-    rn = randint(0, 1000000)
-
-    pc = {"id": "g_region_%i"%rn,
+    pc = {"id": context.step_id("g.region"),
           "module": "g.region",
           "inputs": [{"param": "n", "value": str(top)},
                      {"param": "s", "value": str(bottom)},
@@ -82,14 +116,16 @@ def create_graas_process_chain_entry(left, right, top, bottom, ewres, nsres):
     return pc
 
 
-def get_process_list(args):
+def get_process_list(args, input_names, context):
     """Analyse the process description and return the GRaaS process chain and the name of the processing result
 
     :param args: The process description
+    :param input_names: The output names of the input processes and the input product ids
+    :param context: The CompileContext of the compilation
     :return: (output_name, pc)
     """
 
-    input_names, process_list = process_definitions.analyse_process_graph(args)
+    process_list = []
     output_names = []
 
     for input_name in input_names:
@@ -108,10 +144,12 @@ def get_process_list(args):
         if "srs" in args:
             print("SRS is currently not supported")
 
-        pc = create_graas_process_chain_entry(left=left, right=right, top=top, bottom=bottom, ewres=ewres, nsres=nsres)
+        pc = create_graas_process_chain_entry(left=left, right=right, top=top, bottom=bottom, ewres=ewres, nsres=nsres,
+                                              context=context)
         process_list.append(pc)
 
     return output_names, process_list
 
 
 process_definitions.PROCESS_DICT[PROCESS_NAME] = get_process_list
+process_definitions.PROCESS_VALIDATORS[PROCESS_NAME] = validate_args
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
-from random import randint
 from graas_openeo_core_wrapper import process_definitions
 from graas_openeo_core_wrapper.graas_interface import GRaaSInterface
+from graas_openeo_core_wrapper.process_definitions.validate import parse_date
 
 __license__ = "Apache License, Version 2.0"
 __author__ = "Sören Gebbert"
@@ -21,23 +21,60 @@ DOC = {
             "description": "array of input collections with one element"
         },
         "from": {
-            "description": "start date"
+            "description": "start date",
+            "required": True,
+            "type": "string"
         },
         "to": {
-            "description": "end date"
+            "description": "end date",
+            "required": True,
+            "type": "string"
+        },
+        "start_before": {
+            "description": "optional date, only observations that started before this date are selected. "
+                           "It is used to split the time series into disjoint parts.",
+            "type": "string"
         }
     }
 }
 
 process_definitions.PROCESS_DESCRIPTION_DICT[PROCESS_NAME] = DOC
+process_definitions.PROCESS_PROPERTIES[PROCESS_NAME] = dict(spatially_local=True,
+                                                            temporally_local=True,
+                                                            tileable=True)
+
+
+def validate_args(args, input_count):
+    """Check that the start and end date can be parsed and that the start is not after the end
+
+    :param args: The process description arguments
+    :param input_count: The number of inputs of the process
+    :return: (error_list, output_count)
+    """
+    errors = []
+    dates = {}
 
+    for name in ("from", "to", "start_before"):
+        if isinstance(args.get(name), str):
+            dates[name] = parse_date(args[name])
+            if dates[name] is None:
+                errors.append("The argument <%s> of process <%s> is not a valid date: %s" % (name, PROCESS_NAME,
+                                                                                          args[name]))
 
-def create_graas_process_chain_entry(input_name, start_time, end_time, output_name):
+    if dates.get("from") is not None and dates.get("to") is not None and dates["from"] > dates["to"]:
+        errors.append("The start date of process <%s> must not be after the end date" % PROCESS_NAME)
+
+    return errors, input_count
+
+
+def create_graas_process_chain_entry(input_name, start_time, end_time, output_name, context, start_before=None):
     """Create a GRaaS command of the process chain that uses t.rast.extract to create a subset of a strds
 
     :param strds_name: The name of the strds
     :param start_time:
     :param end_time:
+    :param context: The CompileContext of the compilation
+    :param start_before: Select only the maps that start before this date, if set
     :return: A GRaaS process chain description
     """
     location, mapset, datatype, layer_name = GRaaSInterface.layer_def_to_components(input_name)
@@ -46,15 +83,14 @@ def create_graas_process_chain_entry(input_name, start_time, end_time, output_na
         input_name = layer_name + "@" + mapset
     base_name = "%s_extract"%layer_name
 
-    # Get info about the time series to extract its resolution settings and bbox
-    rn = randint(0, 1000000)
-
+    where = "start_time >= '%(start)s' AND end_time <= '%(end)s'"%{"start":start_time, "end":end_time}
+    if start_before is not None:
+        where += " AND start_time < '%s'"%start_before
 
-    pc = {"id": "t_rast_extract_%i"%rn,
+    pc = {"id": context.step_id("t.rast.extract"),
           "module": "t.rast.extract",
           "inputs": [{"param": "input", "value": input_name},
-                     {"param": "where", "value": "start_time >= '%(start)s' "
-                                                 "AND end_time <= '%(end)s'"%{"start":start_time, "end":end_time}},
+                     {"param": "where", "value": where},
                      {"param": "output", "value": output_name},
                      {"param": "expression", "value": "1.0 * %s"%input_name},
                      {"param": "basename", "value": base_name},
@@ -63,22 +99,23 @@ def create_graas_process_chain_entry(input_name, start_time, end_time, output_na
     return pc
 
 
-def get_process_list(args):
+def get_process_list(args, input_names, context):
     """Analyse the process description and return the GRaaS process chain and the name of the processing result
     strds that was filtered by start and end date
 
     :param args: The process description
+    :param input_names: The output names of the input processes and the input product ids
+    :param context: The CompileContext of the compilation
     :return: (output_name, pc)
     """
 
-    # Get the input description and the process chain to attach this process
-    input_names, process_list = process_definitions.analyse_process_graph(args)
+    process_list = []
     output_names = []
 
     for input_name in input_names:
 
         location, mapset, datatype, layer_name = GRaaSInterface.layer_def_to_components(input_name)
-        output_name = "%s_%s" % (layer_name, PROCESS_NAME)
+        output_name = context.output_name(layer_name, PROCESS_NAME)
         output_names.append(output_name)
 
         start_time = None
@@ -92,10 +129,13 @@ def get_process_list(args):
         pc = create_graas_process_chain_entry(input_name=input_name,
                                               start_time=start_time,
                                               end_time=end_time,
-                                              output_name=output_name)
+                                              output_name=output_name,
+                                              context=context,
+                                              start_before=args.get("start_before"))
         process_list.append(pc)
 
     return output_names, process_list
 
 
 process_definitions.PROCESS_DICT[PROCESS_NAME] = get_process_list
+process_definitions.PROCESS_VALIDATORS[PROCESS_NAME] = validate_args
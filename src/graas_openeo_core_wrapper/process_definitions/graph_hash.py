@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import json
+
+__license__ = "Apache License, Version 2.0"
+__author__ = "Sören Gebbert"
+__copyright__ = "Copyright 2018, Sören Gebbert"
+__maintainer__ = "Soeren Gebbert"
+__email__ = "soerengebbert@googlemail.com"
+
+
+# Marks the already serialised parts of the canonical JSON text on the serialisation stack
+_TEXT = object()
+
+
+def normalize_value(value):
+    """Return the canonical form of a scalar process graph value
+
+    Numbers are normalised, so that 39, 39.0 and 3.9e1 are identical.
+
+    :param value: A scalar value of the process graph
+    :return: The normalised value
+    """
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        value = float(value)
+        if value.is_integer():
+            return int(value)
+        return value
+
+    return value
+
+
+def canonical_json(graph):
+    """Serialise a process graph or a part of it into a canonical JSON text
+
+    The keys of dictionaries are sorted and numbers are normalised. The serialisation uses an
+    explicit stack, hence the nesting depth of the process graph is not limited by the recursion limit.
+
+    :param graph: The process graph or a part of it
+    :return: The canonical JSON text
+    """
+    parts = []
+    stack = [(None, graph)]
+
+    while stack:
+        marker, value = stack.pop()
+
+        if marker is _TEXT:
+            parts.append(value)
+        elif isinstance(value, dict):
+            items = [(_TEXT, "{")]
+            for index, (key, item) in enumerate(sorted(value.items(), key=lambda pair: str(pair[0]))):
+                if index > 0:
+                    items.append((_TEXT, ","))
+                items.append((_TEXT, json.dumps(str(key)) + ":"))
+                items.append((None, item))
+            items.append((_TEXT, "}"))
+            stack.extend(reversed(items))
+        elif isinstance(value, (list, tuple)):
+            items = [(_TEXT, "[")]
+            for index, item in enumerate(value):
+                if index > 0:
+                    items.append((_TEXT, ","))
+                items.append((None, item))
+            items.append((_TEXT, "]"))
+            stack.extend(reversed(items))
+        else:
+            parts.append(json.dumps(normalize_value(value)))
+
+    return "".join(parts)
+
+
+def canonical_graph_hash(graph):
+    """Compute a hash of a process graph that is independent of the key order and number formatting
+
+    :param graph: The process graph
+    :return: The hex digest of the SHA-256 hash
+    """
+    return hashlib.sha256(canonical_json(graph).encode("utf-8")).hexdigest()
+
+
+def subgraph_hashes(entry_list):
+    """Compute the hashes of all process nodes and products of a process graph bottom up
+
+    The hash of a process node is computed from its process id, its arguments without the
+    collections and the hashes of its inputs (Merkle hash), so that each node is serialised
+    only once and structurally identical subgraphs have identical hashes.
+
+    :param entry_list: The collection entries of the process graph
+    :return: A dictionary id(entry) -> hash
+    """
+    hashes = {}
+    stack = [(entry, False) for entry in entry_list]
+
+    while stack:
+        entry, expanded = stack.pop()
+
+        if id(entry) in hashes:
+            continue
+
+        collections = entry.get("args", {}).get("collections", []) if "process_id" in entry else []
+
+        if not expanded and collections:
+            stack.append((entry, True))
+            stack.extend((child, False) for child in collections)
+            continue
+
+        args = dict((key, value) for key, value in entry.get("args", {}).items() if key != "collections")
+        node = dict(entry)
+        if "args" in entry:
+            node["args"] = args
+        node["inputs"] = [hashes[id(child)] for child in collections]
+
+        hashes[id(entry)] = canonical_graph_hash(node)
+
+    return hashes
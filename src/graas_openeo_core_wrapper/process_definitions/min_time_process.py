@@ -1,5 +1,4 @@
 # -*- coding: utf-8 -*-
-from random import randint
 from graas_openeo_core_wrapper import process_definitions
 from graas_openeo_core_wrapper.graas_interface import GRaaSInterface
 
@@ -23,14 +22,19 @@ DOC = {
 }
 
 process_definitions.PROCESS_DESCRIPTION_DICT[PROCESS_NAME] = DOC
+process_definitions.PROCESS_PROPERTIES[PROCESS_NAME] = dict(spatially_local=True,
+                                                            temporally_local=False,
+                                                            tileable=True,
+                                                            merge_method="minimum")
 
 
-def create_graas_process_chain_entry(input_name, output_name):
+def create_graas_process_chain_entry(input_name, output_name, context):
     """Create a GRaaS process description that uses t.rast.series to create the minimum
     value of the time series.
 
     :param input_time_series: The input time series name
     :param output_map: The name of the output map
+    :param context: The CompileContext of the compilation
     :return: A GRaaS process chain description
     """
 
@@ -39,9 +43,7 @@ def create_graas_process_chain_entry(input_name, output_name):
     if mapset is not None:
         input_name = layer_name + "@" + mapset
 
-    rn = randint(0, 1000000)
-
-    pc = {"id": "t_rast_series_%i"%rn,
+    pc = {"id": context.step_id("t.rast.series"),
           "module": "t.rast.series",
           "inputs": [{"param": "input", "value": input_name},
                      {"param": "method", "value": "minimum"},
@@ -51,23 +53,26 @@ def create_graas_process_chain_entry(input_name, output_name):
     return pc
 
 
-def get_process_list(args):
+def get_process_list(args, input_names, context):
     """Analyse the process description and return the GRaaS process chain and the name of the processing result layer
     which is a single raster layer
 
     :param args: The process description arguments
+    :param input_names: The output names of the input processes and the input product ids
+    :param context: The CompileContext of the compilation
     :return: (output_name, pc)
     """
-    input_names, process_list = process_definitions.analyse_process_graph(args)
+    process_list = []
     output_names = []
 
     for input_name in input_names:
         location, mapset, datatype, layer_name = GRaaSInterface.layer_def_to_components(input_name)
-        output_name = "%s_%s" % (layer_name, PROCESS_NAME)
+        output_name = context.output_name(layer_name, PROCESS_NAME)
         output_names.append(output_name)
 
         pc = create_graas_process_chain_entry(input_name,
-                                              output_name)
+                                              output_name,
+                                              context)
         process_list.append(pc)
 
     return output_names, process_list
@@ -1,5 +1,4 @@
 # -*- coding: utf-8 -*-
-from random import randint
 from graas_openeo_core_wrapper import process_definitions
 from graas_openeo_core_wrapper.graas_interface import GRaaSInterface
 
@@ -19,24 +18,47 @@ DOC = {
             "description": "array of input collections with one element"
         },
         "red": {
-            "description": "reference to the red band"
+            "description": "reference to the red band",
+            "required": True,
+            "type": "string"
         },
         "nir": {
-            "description": "reference to the nir band"
+            "description": "reference to the nir band",
+            "required": True,
+            "type": "string"
         }
     }
 }
 
 process_definitions.PROCESS_DESCRIPTION_DICT[PROCESS_NAME] = DOC
+process_definitions.PROCESS_PROPERTIES[PROCESS_NAME] = dict(spatially_local=True,
+                                                            temporally_local=True,
+                                                            tileable=True)
 
 
-def create_graas_process_chain_entry(nir_time_series, red_time_series, output_time_series):
+def validate_args(args, input_count):
+    """Check that the process gets exactly two input time series, the red and the nir band
+
+    :param args: The process description arguments
+    :param input_count: The number of inputs of the process
+    :return: (error_list, output_count)
+    """
+    errors = []
+
+    if input_count != 2:
+        errors.append("Process <%s> requires two input time series, but got %i" % (PROCESS_NAME, input_count))
+
+    return errors, 1
+
+
+def create_graas_process_chain_entry(nir_time_series, red_time_series, output_time_series, context):
     """Create a GRaaS process description that uses t.rast.series to create the minimum
     value of the time series.
 
     :param nir_time_series: The NIR band time series name
     :param red_time_series: The RED band time series name
     :param output_time_series: The name of the output time series
+    :param context: The CompileContext of the compilation
     :return: A list of GRaaS process chain descriptions
     """
     location, mapset, datatype, layer_name = GRaaSInterface.layer_def_to_components(nir_time_series)
@@ -51,10 +73,8 @@ def create_graas_process_chain_entry(nir_time_series, red_time_series, output_ti
 
     location, mapset, datatype, output_name = GRaaSInterface.layer_def_to_components(output_time_series)
 
-    rn = randint(0, 1000000)
-
     pc = [
-        {"id": "t_rast_mapcalc_%i" % rn,
+        {"id": context.step_id("t.rast.mapcalc"),
          "module": "t.rast.mapcalc",
          "inputs": [{"param": "expression",
                      "value": "%(result)s = float((%(nir)s - %(red)s)/"
@@ -68,7 +88,7 @@ def create_graas_process_chain_entry(nir_time_series, red_time_series, output_ti
                      "value": "ndvi"},
                     {"param": "output",
                      "value": output_name}]},
-        {"id": "t_rast_color_%i" % rn,
+        {"id": context.step_id("t.rast.colors"),
          "module": "t.rast.colors",
          "inputs": [{"param": "input",
                      "value": output_name},
@@ -78,14 +98,16 @@ def create_graas_process_chain_entry(nir_time_series, red_time_series, output_ti
     return pc
 
 
-def get_process_list(args):
+def get_process_list(args, input_names, context):
     """Analyse the process description and return the GRaaS process chain and the name of the processing result
 
     :param args: The process description arguments
+    :param input_names: The output names of the input processes and the input product ids
+    :param context: The CompileContext of the compilation
     :return: (output_time_series, pc)
     """
 
-    input_names, process_list = process_definitions.analyse_process_graph(args)
+    process_list = []
     output_names = []
 
     # Two input names are required
@@ -109,13 +131,14 @@ def get_process_list(args):
             raise Exception("Band information is missing from process description")
 
         location, mapset, datatype, layer_name = GRaaSInterface.layer_def_to_components(nir_time_series)
-        output_name = "%s_%s" % (layer_name, PROCESS_NAME)
+        output_name = context.output_name(layer_name, PROCESS_NAME)
         output_names.append(output_name)
 
-        pc = create_graas_process_chain_entry(nir_time_series, red_time_series, output_name)
+        pc = create_graas_process_chain_entry(nir_time_series, red_time_series, output_name, context)
         process_list.extend(pc)
 
     return output_names, process_list
 
 
 process_definitions.PROCESS_DICT[PROCESS_NAME] = get_process_list
+process_definitions.PROCESS_VALIDATORS[PROCESS_NAME] = validate_args
@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+import re
+
+__license__ = "Apache License, Version 2.0"
+__author__ = "Sören Gebbert"
+__copyright__ = "Copyright 2018, Sören Gebbert"
+__maintainer__ = "Soeren Gebbert"
+__email__ = "soerengebbert@googlemail.com"
+
+
+# The g.region parameters that set the computational region by coordinates and resolution
+COORDINATE_PARAMS = {"n", "s", "e", "w", "res", "ewres", "nsres"}
+
+
+def _inputs(step):
+    """Return the input parameters of a process chain step as dictionary
+
+    :param step: The process chain step
+    :return: A dictionary param -> value
+    """
+    return dict((entry["param"], entry.get("value")) for entry in step.get("inputs", []))
+
+
+def _is_coordinate_region(step):
+    """Return True if the step is a g.region call that only sets coordinates and resolution"""
+    if step["module"] != "g.region":
+        return False
+    params = _inputs(step)
+    return len(params) > 0 and set(params) <= COORDINATE_PARAMS
+
+
+def _defines_full_region(params):
+    """Return True if the g.region parameters define the extent and the resolution of the region"""
+    has_extent = {"n", "s", "e", "w"} <= set(params)
+    has_resolution = "res" in params or {"ewres", "nsres"} <= set(params)
+    return has_extent and has_resolution
+
+
+def _saved_region(step):
+    """Return the name of the region that is saved by a step, None if the step does not only save a region"""
+    if step["module"] != "g.region":
+        return None
+    params = _inputs(step)
+    if list(params) == ["save"]:
+        return params["save"]
+    return None
+
+
+def _restored_region(step):
+    """Return the name of the region that is restored by a step, None if the step does not restore a region"""
+    if step["module"] != "g.region":
+        return None
+    params = _inputs(step)
+    if list(params) == ["region"]:
+        return params["region"]
+    return None
+
+
+def _is_region_independent(step):
+    """Return True if the result of a step does not depend on the computational region"""
+    if _saved_region(step) is not None:
+        return True
+    if step["module"] == "r.mask" and "r" in step.get("flags", "") and not step.get("inputs"):
+        return True
+    if step["module"] == "importer":
+        return all(entry.get("import_descr", {}).get("type") == "vector" for entry in step.get("inputs", []))
+    return False
+
+
+def final_region_step(process_list):
+    """Return the step that sets the computational region that is active after a list of steps
+
+    :param process_list: The list of process chain steps
+    :return: (reusable, step): reusable is False if the region can not be restored by a single step,
+             step is the last g.region step or None if the steps do not change the region
+    """
+    steps = [step for step in process_list if step["module"] == "g.region" and _saved_region(step) is None]
+    if not steps:
+        return True, None
+
+    if _is_coordinate_region(steps[-1]) and _defines_full_region(_inputs(steps[-1])):
+        return True, steps[-1]
+
+    return False, None
+
+
+def remove_redundant_regions(process_list):
+    """Remove g.region steps that set the region that is already active and merge consecutive g.region steps
+
+    Only the g.region module changes the computational region. Hence a coordinate based g.region step
+    that sets the same region as the last coordinate based g.region step is a no-op, if no other
+    region change happened in between. A coordinate based g.region step that is directly followed by
+    a g.region step that defines the full region is overwritten and removed.
+
+    :param process_list: The process chain steps
+    :return: The optimized process chain steps
+    """
+    result = []
+    # The current region as (params, flags) if it was set by coordinates, None if unknown
+    current_region = None
+
+    for step in process_list:
+
+        if step["module"] == "g.region":
+            params = _inputs(step)
+            flags = step.get("flags", "")
+
+            if _is_coordinate_region(step):
+                region = (sorted(params.items()), flags)
+
+                if region == current_region:
+                    continue
+
+                if result and _is_coordinate_region(result[-1]) and not result[-1].get("flags") \
+                        and not flags and _defines_full_region(params):
+                    result.pop()
+
+                current_region = region if _defines_full_region(params) else None
+            elif _saved_region(step) is None:
+                current_region = None
+
+        result.append(step)
+
+    return result
+
+
+def remove_noop_region_restores(process_list, discard_region=True):
+    """Remove region restores that no later step depends on and the region saves that become unused
+
+    A restore is a no-op if it is followed only by region independent steps until the next
+    g.region step that defines the full region. If discard_region is True, the region at the end
+    of the process chain is not used, so restores at the end of the chain are no-ops as well.
+    A region save is removed if no restore reads it before the region name is saved again.
+
+    :param process_list: The process chain steps
+    :param discard_region: Set True if the region at the end of the process chain is discarded,
+                           which is the case for ephemeral processing
+    :return: The optimized process chain steps
+    """
+    result = list(process_list)
+
+    # Remove restores that are no-ops, iterate backwards so that the following steps are already optimized
+    for index in reversed(range(len(result))):
+        if _restored_region(result[index]) is None:
+            continue
+
+        noop = discard_region
+        for step in result[index + 1:]:
+            if step["module"] == "g.region" and _defines_full_region(_inputs(step)):
+                noop = True
+                break
+            if not _is_region_independent(step):
+                noop = False
+                break
+
+        if noop:
+            del result[index]
+
+    # Remove saves that are not read by a restore before the next save with the same name
+    for index in reversed(range(len(result))):
+        name = _saved_region(result[index])
+        if name is None:
+            continue
+
+        used = False
+        for step in result[index + 1:]:
+            if _restored_region(step) == name:
+                used = True
+                break
+            if _saved_region(step) == name:
+                break
+
+        if not used:
+            del result[index]
+
+    return result
+
+
+def _name_pattern(name):
+    """Return the regular expression that matches a map or space time dataset name in a map algebra expression"""
+    return re.compile(r"(?<![\w@.])%s(?![\w@])" % re.escape(name))
+
+
+def _references(step, name):
+    """Return the names of the input parameters of a step that reference the provided map or dataset name"""
+    pattern = _name_pattern(name)
+    params = []
+    for entry in step.get("inputs", []) + step.get("outputs", []):
+        if isinstance(entry.get("value"), str) and pattern.search(entry["value"]):
+            params.append(entry["param"])
+    return params
+
+
+# Matches the map and dataset names in the parameter values of a process chain step
+_NAME_RUN_PATTERN = re.compile(r"[\w@.]+")
+
+
+def _reference_index(process_list):
+    """Create an index of the names that the steps of a process chain may reference
+
+    The index maps every run of name characters and each of its prefixes that ends before a dot
+    to the indices of the steps that contain it. It contains all steps for which _references()
+    finds a name that consists of name characters only, so that these steps are found without
+    scanning the whole process chain.
+
+    :param process_list: The process chain steps
+    :return: A dictionary name -> list of step indices in ascending order
+    """
+    index = {}
+    for position, step in enumerate(process_list):
+        names = set()
+        for entry in step.get("inputs", []) + step.get("outputs", []):
+            if not isinstance(entry.get("value"), str):
+                continue
+            for run in _NAME_RUN_PATTERN.findall(entry["value"]):
+                parts = run.split(".")
+                for length in range(1, len(parts) + 1):
+                    names.add(".".join(parts[:length]))
+        for name in names:
+            index.setdefault(name, []).append(position)
+    return index
+
+
+def fuse_extract_expressions(process_list, output_names=None):
+    """Fuse the map algebra expression of t.rast.extract steps into the t.rast.mapcalc steps that use the result
+
+    t.rast.extract with an expression computes a new map for each extracted map. If the extracted
+    space time raster dataset is only used by t.rast.mapcalc steps, the expression is moved into
+    their expressions and t.rast.extract only registers the selected maps without writing new maps.
+
+    :param process_list: The process chain steps
+    :param output_names: The names of the process graph results, they are never fused
+    :return: The optimized process chain steps
+    """
+    if output_names is None:
+        output_names = []
+
+    result = [dict(step) for step in process_list]
+    # Fusing does not add new names to the consumers, hence the index stays valid
+    reference_index = _reference_index(result)
+
+    for index, step in enumerate(result):
+        if step["module"] != "t.rast.extract":
+            continue
+
+        params = _inputs(step)
+        if "expression" not in params or params.get("output") in output_names:
+            continue
+
+        output = params["output"]
+        if _NAME_RUN_PATTERN.fullmatch(output):
+            candidates = [result[position] for position in reference_index.get(output, []) if position > index]
+        else:
+            candidates = result[index + 1:]
+
+        consumers = []
+        fusable = True
+        for other in candidates:
+            referencing = _references(other, output)
+            if not referencing:
+                continue
+            if other["module"] != "t.rast.mapcalc" or not set(referencing) <= {"inputs", "expression"}:
+                fusable = False
+                break
+            consumers.append(other)
+
+        if not fusable or not consumers:
+            continue
+
+        # The expression of t.rast.extract uses the input dataset name, the fused expression
+        # uses the extracted dataset that references the original maps
+        expression = _name_pattern(params["input"]).sub(output, params["expression"])
+
+        step["inputs"] = [entry for entry in step["inputs"]
+                          if entry["param"] not in ("expression", "basename", "suffix")]
+
+        for consumer in consumers:
+            inputs = []
+            for entry in consumer["inputs"]:
+                if entry["param"] == "expression":
+                    target, source = entry["value"].split("=", 1)
+                    source = _name_pattern(output).sub(lambda match: "(%s)" % expression, source)
+                    entry = dict(entry, value="%s=%s" % (target, source))
+                inputs.append(entry)
+            consumer["inputs"] = inputs
+
+    return result
+
+
+def optimize_process_chain(process_list, discard_region=True, output_names=None):
+    """Run all optimization passes over a process chain
+
+    :param process_list: The process chain steps
+    :param discard_region: Set True if the region at the end of the process chain is discarded
+    :param output_names: The names of the process graph results
+    :return: The optimized process chain steps
+    """
+    process_list = fuse_extract_expressions(process_list, output_names=output_names)
+    process_list = remove_redundant_regions(process_list)
+    process_list = remove_noop_region_restores(process_list, discard_region=discard_region)
+    return process_list
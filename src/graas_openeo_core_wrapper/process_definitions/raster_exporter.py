@@ -1,7 +1,6 @@
 # -*- coding: utf-8 -*-
 from graas_openeo_core_wrapper import process_definitions
 from graas_openeo_core_wrapper.graas_interface import GRaaSInterface
-from random import randint
 
 __license__ = "Apache License, Version 2.0"
 __author__ = "Sören Gebbert"
@@ -22,13 +21,17 @@ DOC = {
 }
 
 process_definitions.PROCESS_DESCRIPTION_DICT[PROCESS_NAME] = DOC
+process_definitions.PROCESS_PROPERTIES[PROCESS_NAME] = dict(spatially_local=False,
+                                                            temporally_local=False,
+                                                            tileable=True)
 
 
-def create_graas_process_chain_entry(input_name):
+def create_graas_process_chain_entry(input_name, context):
     """Create a GRaaS command of the process chain that computes the regional statistics based on a
     strds and a polygon.
 
     :param input_name: The name of the raster layer
+    :param context: The CompileContext of the compilation
     :return: A GRaaS process chain description
     """
 
@@ -37,11 +40,10 @@ def create_graas_process_chain_entry(input_name):
     if mapset is not None:
         input_name = layer_name + "@" + mapset
 
-    rn = randint(0, 1000000)
     pc = []
 
     exporter = {
-        "id": "exporter_%i"%rn,
+        "id": context.step_id("exporter"),
           "module": "exporter",
           "outputs": [{"export": {"type": "raster", "format": "GTiff"},
                        "param": "map",
@@ -52,16 +54,17 @@ def create_graas_process_chain_entry(input_name):
     return pc
 
 
-def get_process_list(args):
+def get_process_list(args, input_names, context):
     """Analyse the process description and return the GRaaS process chain and the name of the processing result layer
     which is a single raster layer
 
     :param args: The process description
+    :param input_names: The output names of the input processes and the input product ids
+    :param context: The CompileContext of the compilation
     :return: (output_names, pc)
     """
 
-    # Get the input description and the process chain to attach this process
-    input_names, process_list = process_definitions.analyse_process_graph(args)
+    process_list = []
     output_names = []
 
     for input_name in input_names:
@@ -69,7 +72,7 @@ def get_process_list(args):
         output_name = input_name
         output_names.append(output_name)
 
-        pc = create_graas_process_chain_entry(input_name=input_name)
+        pc = create_graas_process_chain_entry(input_name=input_name, context=context)
         process_list.extend(pc)
 
     import pprint
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+from graas_openeo_core_wrapper import process_definitions
+
+__license__ = "Apache License, Version 2.0"
+__author__ = "Sören Gebbert"
+__copyright__ = "Copyright 2018, Sören Gebbert"
+__maintainer__ = "Soeren Gebbert"
+__email__ = "soerengebbert@googlemail.com"
+
+
+# The filters that are pushed towards the sources, the process property that allows a filter
+# to be moved below a process and the rank of the filter. A filter is never moved below a filter
+# with a lower rank, so that the cheap spatial filter ends up closest to the sources, nor below
+# a filter with the same rank, since the order of nested filters of the same kind matters.
+PUSHDOWN_FILTERS = {"filter_bbox": ("spatially_local", 0),
+                    "filter_daterange": ("temporally_local", 1)}
+
+
+def _can_push_below(filter_node, child):
+    """Return True if the filter can be moved below the child process without changing the result
+
+    :param filter_node: The filter process description
+    :param child: The collection entry of the filter
+    :return: True if the filter can be moved below the child
+    """
+    if "process_id" not in child:
+        return False
+
+    property_name, rank = PUSHDOWN_FILTERS[filter_node["process_id"]]
+    properties = process_definitions.PROCESS_PROPERTIES.get(child["process_id"], {})
+
+    if properties.get(property_name) is not True:
+        return False
+
+    if child["process_id"] in PUSHDOWN_FILTERS and PUSHDOWN_FILTERS[child["process_id"]][1] <= rank:
+        return False
+
+    return "collections" in child.get("args", {})
+
+
+def _push_down(filter_node):
+    """Move a filter below its input processes, as long as the input processes allow it
+
+    filter(process(inputs)) is rewritten to process(filter(inputs)), the filter is then
+    pushed further down.
+
+    :param filter_node: The filter process description with rewritten collections
+    :return: The rewritten process description
+    """
+    # The processes the filter is moved below, from the top to the bottom
+    chain = []
+    collections = filter_node["args"]["collections"]
+
+    while len(collections) == 1 and _can_push_below(filter_node, collections[0]):
+        chain.append(collections[0])
+        collections = collections[0]["args"]["collections"]
+
+    if not chain:
+        return filter_node
+
+    filter_args = dict(filter_node["args"])
+    filter_args["collections"] = collections
+    result = dict(filter_node, args=filter_args)
+
+    for child in reversed(chain):
+        child_args = dict(child["args"])
+        child_args["collections"] = [result]
+        result = dict(child, args=child_args)
+
+    return result
+
+
+def _rewrite(entry):
+    """Rewrite a collection entry and all of its inputs
+
+    The inputs are rewritten before the processes that use them, using an explicit stack
+    so that the depth of the process graph is not limited by the recursion limit.
+
+    :param entry: A process description or a product
+    :return: The rewritten copy of the entry
+    """
+    rewritten = {}
+    stack = [(entry, False)]
+
+    while stack:
+        node, expanded = stack.pop()
+
+        if "process_id" not in node or "collections" not in node.get("args", {}):
+            rewritten[id(node)] = node
+            continue
+
+        if not expanded:
+            stack.append((node, True))
+            stack.extend((child, False) for child in node["args"]["collections"])
+            continue
+
+        args = dict(node["args"])
+        args["collections"] = [rewritten[id(child)] for child in args["collections"]]
+        node_copy = dict(node, args=args)
+
+        if node_copy["process_id"] in PUSHDOWN_FILTERS:
+            node_copy = _push_down(node_copy)
+
+        rewritten[id(node)] = node_copy
+
+    return rewritten[id(entry)]
+
+
+def push_down_filters(graph):
+    """Move temporal and spatial filters as close to the sources as the process semantics allow
+
+    A filter_daterange is moved below processes that work on each map independently and
+    a filter_bbox below processes that work on each pixel independently, so that expensive
+    processes only compute the maps and the region that pass the filters.
+    The provided graph is not modified.
+
+    :param graph: The process description
+    :return: The rewritten process description
+    """
+    if not graph:
+        return graph
+
+    if "process_graph" in graph:
+        return dict(graph, process_graph=_rewrite(graph["process_graph"]))
+
+    if "collections" in graph:
+        return dict(graph, collections=[_rewrite(entry) for entry in graph["collections"]])
+
+    return graph
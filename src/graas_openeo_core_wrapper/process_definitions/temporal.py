@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+from collections import namedtuple
+from graas_openeo_core_wrapper import process_definitions
+from graas_openeo_core_wrapper.graas_interface import GRaaSInterface
+from graas_openeo_core_wrapper.process_definitions.compile_context import CompileContext
+from graas_openeo_core_wrapper.process_definitions.tiling import walk_process_graph, replace_process_arguments
+from graas_openeo_core_wrapper.process_definitions.validate import parse_date
+
+__license__ = "Apache License, Version 2.0"
+__author__ = "Sören Gebbert"
+__copyright__ = "Copyright 2018, Sören Gebbert"
+__maintainer__ = "Soeren Gebbert"
+__email__ = "soerengebbert@googlemail.com"
+
+
+# The format of the chunk boundaries
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# The time series reduction of a process graph split into parts of the date range:
+#   chunks: The list of (filter_daterange arguments, process description) tuples of the parts
+#   merge_method: The r.series method that merges the partial results
+#   export: True if the merged results must be exported
+TemporalSplit = namedtuple("TemporalSplit", ["chunks", "merge_method", "export"])
+
+
+def compute_time_chunks(start, end, count, start_times=None):
+    """Split a date range into parts of equal length
+
+    The parts select the maps by their start time, so that each map is selected by exactly one part.
+    All parts keep the end date of the date range, since the maps must end before the end date.
+
+    If the start times of the maps are known, parts without a map of each time series are merged
+    with the following part, or the previous part if they are the last one, since their reduction
+    would produce no partial result.
+
+    :param start: The start date string
+    :param end: The end date string
+    :param count: The number of parts
+    :param start_times: A list with the list of map start time strings for each time series or None
+    :return: The list of filter_daterange arguments (from, to and start_before) of the parts
+    """
+    start_date = parse_date(start)
+    end_date = parse_date(end)
+    step = (end_date - start_date) / count
+
+    boundaries = [start_date + step * i for i in range(count)]
+
+    if start_times is not None:
+        map_times = [[date for date in (parse_date(time) for time in times) if date is not None]
+                     for times in start_times]
+
+        def is_empty(lower, upper):
+            return any(not any(lower <= date and (upper is None or date < upper) for date in dates)
+                       for dates in map_times)
+
+        kept = boundaries[:1]
+        for boundary in boundaries[1:]:
+            if not is_empty(kept[-1], boundary):
+                kept.append(boundary)
+
+        # The last part is merged into the previous part that is not empty
+        while len(kept) > 1 and is_empty(kept[-1], None):
+            kept.pop()
+
+        boundaries = kept
+
+    chunks = []
+
+    for i, boundary in enumerate(boundaries):
+        chunk = {"from": boundary.strftime(DATE_FORMAT), "to": end}
+        if i + 1 < len(boundaries):
+            chunk["start_before"] = boundaries[i + 1].strftime(DATE_FORMAT)
+        chunks.append(chunk)
+
+    # Keep the original start date string
+    chunks[0]["from"] = start
+
+    return chunks
+
+
+def find_time_reduction(graph):
+    """Return the time reduction of a process graph if it can be computed for parts of its date range
+
+    The process graph must consist of a time reduction with a merge method, optionally followed by
+    raster exporters. All processes below the reduction must be temporally local and
+    all filter_daterange processes must use the same date range.
+
+    :param graph: The process description
+    :return: (reduction entry, date range, export) or None if the process graph can not be split in time
+    """
+    if "process_graph" not in graph:
+        return None
+
+    export = False
+    entry = graph["process_graph"]
+    while entry.get("process_id") == "raster_exporter" and len(entry.get("args", {}).get("collections", [])) == 1:
+        export = True
+        entry = entry["args"]["collections"][0]
+
+    properties = process_definitions.PROCESS_PROPERTIES.get(entry.get("process_id"), {})
+    if properties.get("merge_method") is None:
+        return None
+
+    date_range = None
+    for child in walk_process_graph({"collections": entry["args"].get("collections", [])}):
+        if "process_id" not in child:
+            continue
+
+        if process_definitions.PROCESS_PROPERTIES.get(child["process_id"], {}).get("temporally_local") is not True:
+            return None
+
+        if child["process_id"] == "filter_daterange":
+            child_range = (child["args"].get("from"), child["args"].get("to"))
+            if "start_before" in child["args"] or (date_range is not None and child_range != date_range):
+                return None
+            date_range = child_range
+
+    if date_range is None:
+        return None
+
+    return entry, date_range, export
+
+
+def split_time_reduction(graph, count, list_start_times=None):
+    """Split the time reduction of a process graph into reductions over parts of its date range
+
+    :param graph: The process description
+    :param count: The number of parts
+    :param list_start_times: A function that returns the list of map start time strings of a strds product id,
+                             if set, parts that contain no map are not created
+    :return: A TemporalSplit or None if the process graph can not be split in time
+    """
+    reduction = find_time_reduction(graph)
+    if reduction is None or count < 2:
+        return None
+
+    entry, date_range, export = reduction
+    start_date, end_date = parse_date(date_range[0]), parse_date(date_range[1])
+    if start_date is None or end_date is None or start_date >= end_date:
+        return None
+
+    start_times = None
+    if list_start_times is not None:
+        product_ids = sorted(set(child["product_id"] for child in walk_process_graph({"process_graph": entry})
+                                 if "product_id" in child and
+                                 GRaaSInterface.layer_def_to_components(child["product_id"])[2] == "strds"))
+        start_times = [list_start_times(product_id) for product_id in product_ids]
+
+    time_chunks = compute_time_chunks(date_range[0], date_range[1], count, start_times)
+    if len(time_chunks) < 2:
+        return None
+
+    merge_method = process_definitions.PROCESS_PROPERTIES[entry["process_id"]]["merge_method"]
+
+    chunks = [(chunk, replace_process_arguments({"process_graph": entry}, "filter_daterange", chunk))
+              for chunk in time_chunks]
+
+    return TemporalSplit(chunks=chunks, merge_method=merge_method, export=export)
+
+
+def create_merge_process_chain(partial_names, merge_method, export):
+    """Create the GRaaS process chain that merges the partial results of a split time reduction
+
+    :param partial_names: A list with the list of partial result maps (name@mapset) for each result
+    :param merge_method: The r.series method that merges the partial results
+    :param export: Set True to export the merged results
+    :return: The GRaaS process chain
+    """
+    context = CompileContext()
+    process_list = []
+
+    for names in partial_names:
+        output_name = context.output_name(names[0].split("@")[0], "merge")
+
+        process_list.append({"id": context.step_id("g.region"),
+                             "module": "g.region",
+                             "inputs": [{"param": "raster", "value": names[0]}],
+                             "flags": "g"})
+
+        process_list.append({"id": context.step_id("r.series"),
+                             "module": "r.series",
+                             "inputs": [{"param": "input", "value": ",".join(names)},
+                                        {"param": "method", "value": merge_method},
+                                        {"param": "output", "value": output_name}]})
+
+        if export is True:
+            process_list.append({"id": context.step_id("exporter"),
+                                 "module": "exporter",
+                                 "outputs": [{"export": {"type": "raster", "format": "GTiff"},
+                                              "param": "map",
+                                              "value": output_name}]})
+
+    return dict(list=process_list, version="1")
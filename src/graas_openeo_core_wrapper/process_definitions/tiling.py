@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+import math
+from graas_openeo_core_wrapper import process_definitions
+
+__license__ = "Apache License, Version 2.0"
+__author__ = "Sören Gebbert"
+__copyright__ = "Copyright 2018, Sören Gebbert"
+__maintainer__ = "Soeren Gebbert"
+__email__ = "soerengebbert@googlemail.com"
+
+
+# The arguments of filter_bbox that define the extent and the resolution
+BBOX_ARGS = ("left", "right", "top", "bottom", "ewres", "nsres")
+
+
+def _tile_grid(extent, tile_size, overlap=0):
+    """Compute the number of cells of a bounding box and of its tiles
+
+    :param extent: A dictionary with the filter_bbox arguments left, right, top, bottom, ewres and nsres
+    :param tile_size: The edge length of the tiles in map units, it is rounded to whole cells
+    :param overlap: The number of cells by which neighbouring tiles overlap
+    :return: A tuple of the number of columns and rows of the bounding box and of a tile
+    """
+    if tile_size <= 0:
+        raise Exception("The tile size must be larger than 0")
+    if overlap < 0:
+        raise Exception("The tile overlap must not be negative")
+
+    # The small epsilon avoids an additional column or row because of floating point errors
+    cols = max(1, int(math.ceil((extent["right"] - extent["left"]) / extent["ewres"] - 1e-9)))
+    rows = max(1, int(math.ceil((extent["top"] - extent["bottom"]) / extent["nsres"] - 1e-9)))
+    tile_cols = max(1, int(round(tile_size / extent["ewres"])))
+    tile_rows = max(1, int(round(tile_size / extent["nsres"])))
+
+    return cols, rows, tile_cols, tile_rows
+
+
+def count_tiles(extent, tile_size):
+    """Return the number of tiles of a bounding box without creating them
+
+    :param extent: A dictionary with the filter_bbox arguments left, right, top, bottom, ewres and nsres
+    :param tile_size: The edge length of the tiles in map units, it is rounded to whole cells
+    :return: The number of tiles that compute_tiles() creates
+    """
+    cols, rows, tile_cols, tile_rows = _tile_grid(extent, tile_size)
+    return int(math.ceil(cols / tile_cols)) * int(math.ceil(rows / tile_rows))
+
+
+def compute_tiles(extent, tile_size, overlap=0):
+    """Split a bounding box into tiles that are aligned to the cells of the region
+
+    The tiles are ordered row by row from the top left to the bottom right. The overlap is
+    added on each side of a tile, but the tiles never exceed the bounding box.
+
+    :param extent: A dictionary with the filter_bbox arguments left, right, top, bottom, ewres and nsres
+    :param tile_size: The edge length of the tiles in map units, it is rounded to whole cells
+    :param overlap: The number of cells by which neighbouring tiles overlap
+    :return: The list of tile extents as dictionaries with the same keys as the extent
+    """
+    left, right, top, bottom = extent["left"], extent["right"], extent["top"], extent["bottom"]
+    ewres, nsres = extent["ewres"], extent["nsres"]
+    cols, rows, tile_cols, tile_rows = _tile_grid(extent, tile_size, overlap)
+
+    tiles = []
+    for row in range(0, rows, tile_rows):
+        for col in range(0, cols, tile_cols):
+            first_col = max(0, col - overlap)
+            last_col = min(cols, col + tile_cols + overlap)
+            first_row = max(0, row - overlap)
+            last_row = min(rows, row + tile_rows + overlap)
+
+            tiles.append(dict(left=round(left + first_col * ewres, 10),
+                              right=round(min(right, left + last_col * ewres), 10),
+                              top=round(top - first_row * nsres, 10),
+                              bottom=round(max(bottom, top - last_row * nsres), 10),
+                              ewres=ewres,
+                              nsres=nsres))
+
+    return tiles
+
+
+def walk_process_graph(graph):
+    """Return all process descriptions and products of a process graph
+
+    :param graph: The process description
+    :return: The list of collection entries
+    """
+    entries = []
+    if "process_graph" in graph:
+        stack = [graph["process_graph"]]
+    else:
+        stack = list(graph.get("collections", []))
+
+    while stack:
+        entry = stack.pop()
+        entries.append(entry)
+        if "process_id" in entry:
+            stack.extend(entry.get("args", {}).get("collections", []))
+
+    return entries
+
+
+def find_tileable_extent(graph):
+    """Return the filter_bbox extent of a process graph if its results can be computed tile by tile
+
+    The process graph can be tiled if all of its processes are tileable and all filter_bbox
+    processes use the same extent, resolution and spatial reference system.
+
+    :param graph: The process description
+    :return: The extent as dictionary of the filter_bbox arguments or None if the graph can not be tiled
+    """
+    extent = None
+
+    for entry in walk_process_graph(graph):
+        if "process_id" not in entry:
+            continue
+
+        properties = process_definitions.PROCESS_PROPERTIES.get(entry["process_id"], {})
+        if properties.get("tileable") is not True:
+            return None
+
+        if entry["process_id"] == "filter_bbox":
+            bbox = dict((name, entry["args"].get(name)) for name in BBOX_ARGS + ("srs",))
+            if extent is not None and bbox != extent:
+                return None
+            extent = bbox
+
+    if extent is None:
+        return None
+
+    return dict((name, extent[name]) for name in BBOX_ARGS)
+
+
+def replace_process_arguments(graph, process_id, arguments):
+    """Return a copy of the process graph in which the arguments of all processes of a type are updated
+
+    Only the processes on the path to a modified process are copied, the original
+    process graph is not modified.
+
+    :param graph: The process description
+    :param process_id: The id of the processes that should be modified
+    :param arguments: The dictionary of arguments that are set
+    :return: The modified copy of the process description
+    """
+    copies = {}
+    entries = walk_process_graph(graph)
+
+    # The inputs of a process are always after the process in the walk order
+    for entry in reversed(entries):
+        if "process_id" not in entry or "collections" not in entry.get("args", {}):
+            copies[id(entry)] = entry
+            continue
+
+        args = dict(entry["args"])
+        args["collections"] = [copies[id(child)] for child in args["collections"]]
+        if entry["process_id"] == process_id:
+            args.update(arguments)
+        copies[id(entry)] = dict(entry, args=args)
+
+    if "process_graph" in graph:
+        return dict(graph, process_graph=copies[id(graph["process_graph"])])
+
+    return dict(graph, collections=[copies[id(entry)] for entry in graph["collections"]])
+
+
+def split_process_graph(graph, tile_size, overlap=0, max_tiles=None):
+    """Split a process graph into process graphs for tiles of its filter_bbox extent
+
+    The number of tiles is checked before any tile is created, so that huge extents
+    with small tiles are rejected cheaply.
+
+    :param graph: The process description
+    :param tile_size: The edge length of the tiles in map units
+    :param overlap: The number of cells by which neighbouring tiles overlap
+    :param max_tiles: The maximum number of tiles, None for no limit
+    :return: The list of (tile, process description) tuples or None if the graph
+             can not be tiled or fits into a single tile
+    """
+    extent = find_tileable_extent(graph)
+    if extent is None:
+        return None
+
+    count = count_tiles(extent, tile_size)
+    if max_tiles is not None and count > max_tiles:
+        raise Exception("The process graph requires %i tiles, but at most %i tiles are allowed" % (count, max_tiles))
+
+    tiles = compute_tiles(extent, tile_size, overlap)
+    if len(tiles) < 2:
+        return None
+
+    return [(tile, replace_process_arguments(graph, "filter_bbox", tile)) for tile in tiles]
@@ -1,7 +1,6 @@
 # -*- coding: utf-8 -*-
 from graas_openeo_core_wrapper import process_definitions
 from graas_openeo_core_wrapper.graas_interface import GRaaSInterface
-from random import randint
 
 __license__ = "Apache License, Version 2.0"
 __author__ = "Sören Gebbert"
@@ -20,21 +19,27 @@ DOC = {
             "description": "array of input collections with one element"
         },
         "python_file_url": {
-            "description": "The public URL to the python file that contains the udf"
+            "description": "The public URL to the python file that contains the udf",
+            "required": True,
+            "type": "string"
         }
     }
 }
 
 process_definitions.PROCESS_DESCRIPTION_DICT[PROCESS_NAME] = DOC
+process_definitions.PROCESS_PROPERTIES[PROCESS_NAME] = dict(spatially_local=False,
+                                                            temporally_local=False,
+                                                            tileable=False)
 
 
-def create_graas_process_chain_entry(input_name, python_file_url, output_name):
+def create_graas_process_chain_entry(input_name, python_file_url, output_name, context):
     """Create a GRaaS command of the process chain that uses g.region to create a valid computational region
     for the provide input strds
 
     :param strds_name: The name of the strds
     :param python_file_url: The URL to the python file that defines the UDF
     :param output_name: The name of the output raster layer
+    :param context: The CompileContext of the compilation
     :return: A GRaaS process chain description
     """
 
@@ -43,7 +48,7 @@ def create_graas_process_chain_entry(input_name, python_file_url, output_name):
     if mapset is not None:
         input_name = layer_name + "@" + mapset
 
-    pc = {"id": "t_rast_aggr_func",
+    pc = {"id": context.step_id("t.rast.aggr_func"),
           "module": "t.rast.aggr_func",
           "inputs": [{"import_descr": {"source": python_file_url,
                                        "type": "file"},
@@ -57,22 +62,23 @@ def create_graas_process_chain_entry(input_name, python_file_url, output_name):
     return pc
 
 
-def get_process_list(args):
+def get_process_list(args, input_names, context):
     """Analyse the process description and return the GRaaS process chain and the name of the processing result layer
     which is a single raster layer
 
     :param args: The process description
+    :param input_names: The output names of the input processes and the input product ids
+    :param context: The CompileContext of the compilation
     :return: (output_name, pc)
     """
 
-    # Get the input description and the process chain to attach this process
-    input_names, process_list = process_definitions.analyse_process_graph(args)
+    process_list = []
     output_names = []
 
     for input_name in input_names:
 
         location, mapset, datatype, layer_name = GRaaSInterface.layer_def_to_components(input_name)
-        output_name = "%s_%s" % (layer_name, PROCESS_NAME)
+        output_name = context.output_name(layer_name, PROCESS_NAME)
         output_names.append(output_name)
 
         if "python_file_url" in args:
@@ -82,7 +88,8 @@ def get_process_list(args):
 
         pc = create_graas_process_chain_entry(input_name=input_name,
                                               python_file_url=python_file_url,
-                                              output_name=output_name)
+                                              output_name=output_name,
+                                              context=context)
         process_list.append(pc)
 
     return output_names, process_list
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+import re
+from datetime import datetime, timedelta
+from graas_openeo_core_wrapper import process_definitions
+
+__license__ = "Apache License, Version 2.0"
+__author__ = "Sören Gebbert"
+__copyright__ = "Copyright 2018, Sören Gebbert"
+__maintainer__ = "Soeren Gebbert"
+__email__ = "soerengebbert@googlemail.com"
+
+
+# The types that can be set in the argument descriptions of the processes and the accepted Python types
+ARGUMENT_TYPES = {"number": (int, float),
+                  "string": (str,),
+                  "array": (list,),
+                  "object": (dict,),
+                  "boolean": (bool,)}
+
+# The accepted formats of dates in process arguments, further ISO 8601 dates with fractional
+# seconds or a time zone like 2017-04-12T11:17:08.250Z are accepted as well
+DATE_FORMATS = ["%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S"]
+
+# The ISO 8601 dates with optional fractional seconds and time zone: date and time, fraction, time zone
+ISO_DATE_PATTERN = re.compile(r"^(\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2})(\.\d+)?(Z|[+-]\d{2}:?\d{2})?$")
+
+
+def parse_date(value):
+    """Parse a date of a process argument
+
+    Dates with a time zone are converted to UTC without time zone,
+    so that they can be compared with the dates without time zone.
+
+    :param value: The date string
+    :return: The datetime object or None if the date can not be parsed
+    """
+    if not isinstance(value, str):
+        return None
+
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format)
+        except ValueError:
+            pass
+
+    # datetime.fromisoformat() is not available in Python 3.5, hence the parts are parsed separately
+    match = ISO_DATE_PATTERN.match(value)
+    if match is None:
+        return None
+
+    date_time, fraction, zone = match.groups()
+    try:
+        date = datetime.strptime(date_time.replace(" ", "T"), "%Y-%m-%dT%H:%M:%S")
+    except ValueError:
+        return None
+
+    if fraction is not None:
+        date = date.replace(microsecond=int(fraction[1:7].ljust(6, "0")))
+
+    if zone is not None and zone != "Z":
+        offset = timedelta(hours=int(zone[1:3]), minutes=int(zone[-2:]))
+        date = date - offset if zone[0] == "+" else date + offset
+
+    return date
+
+
+def _has_type(value, type_name):
+    """Return True if the value is of the provided argument type"""
+    if type_name not in ARGUMENT_TYPES:
+        return True
+    if isinstance(value, bool) and type_name != "boolean":
+        return False
+    return isinstance(value, ARGUMENT_TYPES[type_name])
+
+
+def _validate_arguments(process_id, args):
+    """Check the arguments of a process against its argument descriptions
+
+    :param process_id: The id of the process
+    :param args: The arguments of the process
+    :return: The list of error messages
+    """
+    errors = []
+    doc_args = process_definitions.PROCESS_DESCRIPTION_DICT[process_id].get("args", {})
+
+    for name, description in sorted(doc_args.items()):
+        if name not in args:
+            if description.get("required") is True:
+                errors.append("Process <%s> requires the argument <%s>" % (process_id, name))
+            continue
+
+        type_name = description.get("type")
+        if type_name is not None and not _has_type(args[name], type_name):
+            errors.append("The argument <%s> of process <%s> must be of type %s" % (name, process_id, type_name))
+
+    return errors
+
+
+def validate_process_graph(graph):
+    """Validate a process graph before it is compiled
+
+    All process descriptions are checked in a single pass with an explicit stack: the structure
+    of the graph, the process ids, the required arguments and their types as described
+    in the DOC of each process and the checks of the process validators. The number of results
+    of each process is derived from the number of its inputs, so that processes that require a
+    specific number of inputs can be checked without compiling the graph.
+
+    :param graph: The process description
+    :return: The list of error messages, empty if the process graph is valid
+    """
+    if not isinstance(graph, dict) or ("collections" not in graph and "process_graph" not in graph):
+        return ["process_graph or collection not found on process description"]
+
+    if "process_graph" in graph:
+        entry_list = [graph["process_graph"]]
+    else:
+        entry_list = graph["collections"]
+
+    if not isinstance(entry_list, list):
+        return ["The collections of the process description must be a list"]
+
+    errors = []
+    # The stack entries are (entry, input counts of the entry, input counts of the parent).
+    # The input counts of the entry are None until its inputs were pushed to the stack.
+    root_counts = []
+    stack = [(entry, None, root_counts) for entry in reversed(entry_list)]
+
+    while stack:
+        entry, input_counts, parent_counts = stack.pop()
+
+        if not isinstance(entry, dict):
+            errors.append("The collection entries must be process descriptions or products")
+            continue
+
+        if "product_id" in entry:
+            if not isinstance(entry["product_id"], str):
+                errors.append("The product id <%s> must be a string" % str(entry["product_id"]))
+            parent_counts.append(1)
+            continue
+
+        if "process_id" not in entry:
+            errors.append("The collection entries must contain a process_id or a product_id")
+            continue
+
+        process_id = entry["process_id"]
+        args = entry.get("args")
+
+        if input_counts is None:
+            if process_id not in process_definitions.PROCESS_DICT:
+                errors.append("Unsupported process id <%s>" % str(process_id))
+                continue
+
+            if not isinstance(args, dict) or not isinstance(args.get("collections"), list):
+                errors.append("Process <%s> requires a list of collections" % process_id)
+                continue
+
+            input_counts = []
+            stack.append((entry, input_counts, parent_counts))
+            stack.extend((child, None, input_counts) for child in reversed(args["collections"]))
+            continue
+
+        errors.extend(_validate_arguments(process_id, args))
+
+        input_count = sum(input_counts)
+        output_count = input_count
+        if process_id in process_definitions.PROCESS_VALIDATORS:
+            process_errors, output_count = process_definitions.PROCESS_VALIDATORS[process_id](args, input_count)
+            errors.extend(process_errors)
+
+        parent_counts.append(output_count)
+
+    return errors
@@ -1,7 +1,6 @@
 # -*- coding: utf-8 -*-
 from graas_openeo_core_wrapper import process_definitions
 from graas_openeo_core_wrapper.graas_interface import GRaaSInterface
-from random import randint
 
 __license__ = "Apache License, Version 2.0"
 __author__ = "Sören Gebbert"
@@ -22,15 +21,20 @@ DOC = {
             "description": "array of input collections with at least one element that must be of type time series"
         },
         "regions": {
-            "description": "URL to a publicly accessible polygon file readable by OGR"
+            "description": "URL to a publicly accessible polygon file readable by OGR",
+            "required": True,
+            "type": "string"
         }
     }
 }
 
 process_definitions.PROCESS_DESCRIPTION_DICT[PROCESS_NAME] = DOC
+process_definitions.PROCESS_PROPERTIES[PROCESS_NAME] = dict(spatially_local=False,
+                                                            temporally_local=False,
+                                                            tileable=False)
 
 
-def create_graas_process_chain_entry(input_name, regions):
+def create_graas_process_chain_entry(input_name, regions, context):
     """Create a GRaaS command of the process chain that computes the regional statistics based on a
     strds and a polygon.
 
@@ -39,6 +43,7 @@ def create_graas_process_chain_entry(input_name, regions):
 
     :param input_name: The name of the strds
     :param regions: The URL to the vector file that defines the regions of interest
+    :param context: The CompileContext of the compilation
     :return: A GRaaS process chain description
     """
 
@@ -47,11 +52,10 @@ def create_graas_process_chain_entry(input_name, regions):
     if mapset is not None:
         input_name = layer_name + "@" + mapset
 
-    rn = randint(0, 1000000)
     pc = []
 
     importer = {
-        "id": "importer_%i" % rn,
+        "id": context.step_id("importer"),
         "module": "importer",
         "inputs": [{
             "import_descr": {
@@ -64,41 +68,41 @@ def create_graas_process_chain_entry(input_name, regions):
     }
 
     g_region_1 = {
-        "id": "g_region_%i" % rn,
+        "id": context.step_id("g.region"),
         "module": "g.region",
         "inputs": [{"param": "save",
                     "value": "previous_region"}],
         "flags": "g"}
 
     g_region_2 = {
-        "id": "g_region_%i" % rn,
+        "id": context.step_id("g.region"),
         "module": "g.region",
         "inputs": [{"param": "vector",
                     "value": "polygon"}],
         "flags": "g"}
 
     r_mask_1 = {
-        "id": "r_mask_%i" % rn,
+        "id": context.step_id("r.mask"),
         "module": "r.mask",
         "inputs": [{"param": "vector",
                     "value": "polygon"}]
     }
 
     t_rast_univar = {
-        "id": "t_rast_univar_%i" % rn,
+        "id": context.step_id("t.rast.univar"),
         "module": "t.rast.univar",
         "inputs": [{"param": "input",
                     "value": input_name}]
     }
 
     r_mask_2 = {
-        "id": "r_mask_%i" % rn,
+        "id": context.step_id("r.mask"),
         "module": "r.mask",
         "flags": "r"
     }
 
     g_region_3 = {
-        "id": "g_region_%i" % rn,
+        "id": context.step_id("g.region"),
         "module": "g.region",
         "inputs": [{"param": "region",
                     "value": "previous_region"}],
@@ -115,16 +119,17 @@ def create_graas_process_chain_entry(input_name, regions):
     return pc
 
 
-def get_process_list(args):
+def get_process_list(args, input_names, context):
     """Analyse the process description and return the GRaaS process chain and the name of the processing result layer
     which is a single raster layer
 
     :param args: The process description
+    :param input_names: The output names of the input processes and the input product ids
+    :param context: The CompileContext of the compilation
     :return: (output_name, pc)
     """
 
-    # Get the input description and the process chain to attach this process
-    input_names, process_list = process_definitions.analyse_process_graph(args)
+    process_list = []
     output_names = []
 
     for input_name in input_names:
@@ -138,7 +143,8 @@ def get_process_list(args):
             raise Exception("The vector polygon is missing in the process description")
 
         pc = create_graas_process_chain_entry(input_name=input_name,
-                                              regions=regions)
+                                              regions=regions,
+                                              context=context)
         process_list.extend(pc)
 
     return output_names, process_list
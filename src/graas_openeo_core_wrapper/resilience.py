@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+__license__ = "Apache License, Version 2.0"
+__author__ = "Sören Gebbert"
+__copyright__ = "Copyright 2018, Sören Gebbert"
+__maintainer__ = "Soeren Gebbert"
+__email__ = "soerengebbert@googlemail.com"
+
+
+class TokenBucket(object):
+    """A thread safe token bucket that limits the rate of requests
+
+    The bucket holds at most burst tokens and is refilled with rate tokens per second.
+    Each request takes a token, requests wait if the bucket is empty.
+    """
+
+    def __init__(self, rate, burst):
+        """Constructor
+
+        :param rate: The number of tokens that are added per second, None for no limit
+        :param burst: The maximum number of tokens in the bucket
+        """
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self):
+        """Take a token if one is available
+
+        :return: The number of seconds until the next token is available, 0 if a token was taken
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self, timeout=None):
+        """Take a token, wait until one is available
+
+        :param timeout: The maximum number of seconds to wait, None to wait without limit
+        :return: True if a token was taken, False if the timeout passed
+        """
+        if self.rate is None:
+            return True
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            delay = self._take()
+            if delay == 0:
+                return True
+
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining < delay:
+                    return False
+
+            time.sleep(delay)
+
+
+class CircuitBreaker(object):
+    """A thread safe circuit breaker that stops requests to a backend that failed repeatedly
+
+    The circuit opens after failure_threshold consecutive failures. Requests are rejected while
+    the circuit is open. After reset_timeout seconds a single request probes the backend
+    (half-open state), the circuit closes if the probe succeeds, otherwise it opens again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold, reset_timeout):
+        """Constructor
+
+        :param failure_threshold: The number of consecutive failures that open the circuit
+        :param reset_timeout: The number of seconds the circuit stays open before the backend is probed
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CircuitBreaker.CLOSED
+        self._failures = 0
+        self._opened = None
+        self._lock = threading.Lock()
+
+    def allow(self, probe):
+        """Return True if a request can be sent to the backend
+
+        If the circuit is open and the reset timeout passed, the calling thread runs the probe,
+        all other threads are rejected until the probe finished.
+
+        :param probe: A callable without arguments that returns True if the backend is healthy
+        :return: True if the request can be sent, False if it must be rejected
+        """
+        with self._lock:
+            if self.state == CircuitBreaker.CLOSED:
+                return True
+
+            if self.state == CircuitBreaker.HALF_OPEN or time.monotonic() - self._opened < self.reset_timeout:
+                return False
+
+            self.state = CircuitBreaker.HALF_OPEN
+
+        try:
+            healthy = probe()
+        except Exception:
+            healthy = False
+
+        with self._lock:
+            if healthy is True:
+                self.state = CircuitBreaker.CLOSED
+                self._failures = 0
+            else:
+                self.state = CircuitBreaker.OPEN
+                self._opened = time.monotonic()
+
+        return healthy is True
+
+    def record_success(self):
+        """Record a successful request"""
+        with self._lock:
+            self._failures = 0
+
+    def record_failure(self):
+        """Record a failed request, open the circuit if the failure threshold is reached"""
+        with self._lock:
+            self._failures += 1
+
+            if self.state == CircuitBreaker.CLOSED and self._failures >= self.failure_threshold:
+                self.state = CircuitBreaker.OPEN
+                self._opened = time.monotonic()
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""Benchmark of the process graph compiler
+
+Compiles deep chains and wide process graphs of growing size and prints the
+compile time per node, which should stay constant for a linear scaling compiler.
+
+    python tests/benchmark_compiler.py
+"""
+import time
+from graas_openeo_core_wrapper.process_definitions import compile_process_graph
+
+__license__ = "Apache License, Version 2.0"
+__author__ = "Sören Gebbert"
+__copyright__ = "Copyright 2018, Sören Gebbert"
+__maintainer__ = "Soeren Gebbert"
+__email__ = "soerengebbert@googlemail.com"
+
+
+def create_chain(size):
+    """Create a process graph that is a chain of alternating filter and min_time processes"""
+    entry = {"product_id": "ECAD.PERMANENT.strds.temperature_mean_1950_2013_yearly_celsius"}
+    for i in range(size):
+        if i % 2 == 0:
+            entry = {"process_id": "filter_daterange",
+                     "args": {"collections": [entry], "from": "%i-01-01" % (1950 + i % 60), "to": "2013-01-01"}}
+        else:
+            entry = {"process_id": "min_time", "args": {"collections": [entry]}}
+    return {"process_graph": entry}
+
+
+def create_wide_graph(size):
+    """Create a process graph with a single process that has many filtered inputs"""
+    collections = [{"process_id": "filter_daterange",
+                    "args": {"collections": [{"product_id": "ECAD.PERMANENT.strds.precipitation_%i" % i}],
+                             "from": "2001-01-01", "to": "2005-01-01"}} for i in range(size - 1)]
+    return {"process_graph": {"process_id": "raster_exporter", "args": {"collections": collections}}}
+
+
+def benchmark(name, create_graph, sizes, repeat=3):
+    print("%s:" % name)
+    for size in sizes:
+        graph = create_graph(size)
+        best = None
+        for i in range(repeat):
+            # Modify the graph so that the compile cache is not used
+            graph["benchmark_run"] = i
+            start = time.perf_counter()
+            compile_process_graph(graph)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        print("  %6i nodes: %8.4f s  %6.1f us/node" % (size, best, best * 1e6 / size))
+
+
+if __name__ == "__main__":
+    sizes = [250, 500, 1000, 2000, 4000, 8000]
+    benchmark("chain", create_chain, sizes)
+    benchmark("wide", create_wide_graph, sizes)
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+import unittest
+import asyncio
+from graas_openeo_core_wrapper.async_graas_interface import AsyncGRaaSInterface, close_sessions
+from graas_openeo_core_wrapper.test_base import TestBase
+from pprint import pprint
+
+__license__ = "Apache License, Version 2.0"
+__author__ = "Sören Gebbert"
+__copyright__ = "Copyright 2018, Sören Gebbert"
+__maintainer__ = "Soeren Gebbert"
+__email__ = "soerengebbert@googlemail.com"
+
+
+class AsyncGRaaSInterfaceTestCase(TestBase):
+
+    def setUp(self):
+        TestBase.setUp(self)
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.run_until_complete(close_sessions())
+        self.loop.close()
+
+    def test_health_check(self):
+        iface = AsyncGRaaSInterface(self.gconf)
+        self.assertTrue(self.loop.run_until_complete(iface.check_health()))
+
+    def test_list_strds(self):
+        iface = AsyncGRaaSInterface(self.gconf)
+        status, layers = self.loop.run_until_complete(iface.list_strds(location="ECAD", mapset="PERMANENT"))
+        pprint(layers)
+
+        self.assertEqual(status, 200)
+        self.assertEqual(len(layers), 2)
+
+    def test_concurrent_layer_info(self):
+        iface = AsyncGRaaSInterface(self.gconf)
+        layers = ["ECAD.PERMANENT.strds.precipitation_1950_2013_yearly_mm",
+                  "ECAD.PERMANENT.strds.temperature_mean_1950_2013_yearly_celsius",
+                  "ECAD.PERMANENT.raster.precipitation_yearly_mm_0"]
+
+        results = self.loop.run_until_complete(asyncio.gather(*[iface.layer_info(layer_name=layer)
+                                                                for layer in layers]))
+        pprint(results)
+
+        for status, info in results:
+            self.assertEqual(status, 200)
+
+        status, info = self.loop.run_until_complete(iface.mapset_info(location="ECAD", mapset="PERMANENT"))
+        self.assertEqual(status, 200)
+        self.assertTrue("projection" in info)
+
+    def test_layer_exists_error(self):
+        iface = AsyncGRaaSInterface(self.gconf)
+        status = self.loop.run_until_complete(
+            iface.check_layer_exists(layer_name="ECAD.PERMANENT.strds.precipitation_1950_2013_yearly_mm_nope"))
+        self.assertFalse(status)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+import unittest
+import time
+from graas_openeo_core_wrapper.cache import TTLCache
+
+__license__ = "Apache License, Version 2.0"
+__author__ = "Sören Gebbert"
+__copyright__ = "Copyright 2018, Sören Gebbert"
+__maintainer__ = "Soeren Gebbert"
+__email__ = "soerengebbert@googlemail.com"
+
+
+class TTLCacheTestCase(unittest.TestCase):
+
+    def test_lru_size_limit(self):
+        cache = TTLCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.put("c", 3)
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+
+    def test_ttl(self):
+        cache = TTLCache(maxsize=10, ttl=0.05)
+        cache.put("a", 1)
+        cache.put("b", 2, ttl=None)
+        self.assertEqual(cache.get("a"), 1)
+        time.sleep(0.1)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("b"), 2)
+
+    def test_get_or_load(self):
+        cache = TTLCache(maxsize=10, ttl=10)
+        calls = []
+
+        def loader():
+            calls.append(1)
+            return 400, "error"
+
+        self.assertEqual(cache.get_or_load("a", loader, cache_if=lambda r: r[0] == 200), (400, "error"))
+        self.assertEqual(cache.get_or_load("a", loader, cache_if=lambda r: r[0] == 200), (400, "error"))
+        self.assertEqual(len(calls), 2)
+
+        self.assertEqual(cache.get_or_load("b", lambda: (200, "ok")), (200, "ok"))
+        self.assertEqual(cache.get_or_load("b", loader), (200, "ok"))
+        self.assertEqual(len(calls), 2)
+
+    def test_stale_while_revalidate(self):
+        cache = TTLCache(maxsize=10, ttl=0.05, stale_ttl=10)
+        cache.put("a", "old")
+        time.sleep(0.1)
+
+        # The stale value is served while the new value is loaded in the background
+        self.assertEqual(cache.get_or_load("a", lambda: "new"), "old")
+        for i in range(50):
+            if cache.get("a") == "new":
+                break
+            time.sleep(0.02)
+        self.assertEqual(cache.get("a"), "new")
+
+    def test_invalidate(self):
+        cache = TTLCache(maxsize=10)
+        cache.put(("LL", "mapset_1"), 1)
+        cache.put(("LL", "mapset_2"), 2)
+        cache.put(("ECAD", "PERMANENT"), 3)
+
+        cache.invalidate(("LL", "mapset_1"))
+        self.assertIsNone(cache.get(("LL", "mapset_1")))
+
+        cache.invalidate_if(lambda key: key[0] == "LL")
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.get(("ECAD", "PERMANENT")), 3)
+
+    def test_invalidate_while_loading(self):
+        cache = TTLCache(maxsize=10)
+
+        def loader():
+            # The entry is invalidated while the old state is loaded
+            cache.invalidate_if(lambda key: key[0] == "LL")
+            return "old"
+
+        # The loaded value is returned, but not stored since it may be outdated
+        self.assertEqual(cache.get_or_load(("LL", "mapset_1"), loader), "old")
+        self.assertIsNone(cache.get(("LL", "mapset_1")))
+        self.assertEqual(cache.get_or_load(("LL", "mapset_1"), lambda: "new"), "new")
+        self.assertEqual(cache.get(("LL", "mapset_1")), "new")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,6 +2,8 @@
 import unittest
 from flask import json
 from graas_openeo_core_wrapper.test_base import TestBase
+from graas_openeo_core_wrapper.graas_interface import GRaaSInterface
+from graas_openeo_core_wrapper.data_batch import get_product_infos
 
 __license__ = "Apache License, Version 2.0"
 __author__ = "Sören Gebbert"
@@ -10,6 +12,19 @@ __maintainer__ = "Soeren Gebbert"
 __email__ = "soerengebbert@googlemail.com"
 
 
+class MalformedLayerInterface(GRaaSInterface):
+    """Returns layer information without extent for the layers whose name starts with malformed"""
+
+    def layer_info(self, layer_name, use_cache=True):
+        if layer_name.split(".")[-1].startswith("malformed"):
+            return 200, {"name": layer_name}
+        return 200, {"west": 0, "east": 1, "north": 1, "south": 0, "title": "", "comments": "",
+                     "datatype": "CELL", "cells": 1, "cols": 1, "rows": 1, "ewres": 1, "nsres": 1}
+
+    def mapset_info(self, location, mapset, use_cache=True):
+        return 200, {"projection": "EPSG:4326"}
+
+
 class DataTestCase(TestBase):
 
     def test_data(self):
@@ -59,6 +74,35 @@ class DataTestCase(TestBase):
 
         self.assertEqual(data["product_id"], "ECAD.PERMANENT.raster.temperature_mean_yearly_celsius_0")
 
+    def test_data_batch(self):
+        product_ids = ["ECAD.PERMANENT.strds.precipitation_1950_2013_yearly_mm",
+                       "ECAD.PERMANENT.strds.temperature_mean_1950_2013_yearly_celsius",
+                       "ECAD.PERMANENT.raster.precipitation_yearly_mm_0",
+                       "ECAD.PERMANENT.raster.precipitation_yearly_mm_0_nope",
+                       "precipitation_yearly_mm_0"]
+        response = self.app.post('/data_batch', data=json.dumps({"product_ids": product_ids}),
+                                 content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data.decode())
+        print(data)
+
+        self.assertEqual([entry["product_id"] for entry in data["products"]], product_ids[:3])
+        self.assertEqual([entry["product_id"] for entry in data["errors"]], product_ids[4:] + product_ids[3:4])
+
+    def test_data_batch_malformed_product(self):
+        product_ids = ["ECAD.PERMANENT.raster.precipitation_yearly_mm_0",
+                       "ECAD.PERMANENT.raster.malformed"]
+        product_info_list, error_list = get_product_infos(MalformedLayerInterface(self.gconf), product_ids)
+
+        # The malformed product is reported as error, the other products are described
+        self.assertEqual([entry["product_id"] for entry in product_info_list], product_ids[:1])
+        self.assertEqual([entry["product_id"] for entry in error_list], product_ids[1:])
+
+    def test_data_batch_error(self):
+        response = self.app.post('/data_batch', data=json.dumps({"product_ids": "nope"}),
+                                 content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
 
 if __name__ == "__main__":
     unittest.main()
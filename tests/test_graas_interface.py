@@ -18,6 +18,19 @@ class GRaaSInterfaceTestCase(TestBase):
         iface = GRaaSInterface(self.gconf)
         self.assertTrue(iface.check_health())
 
+    def test_shared_session(self):
+        iface_1 = GRaaSInterface(self.gconf)
+        iface_2 = GRaaSInterface()
+        self.assertTrue(iface_1.session is iface_2.session)
+        self.assertTrue(iface_1.check_health())
+        self.assertTrue(iface_2.check_health())
+
+    def test_shared_backend_guards(self):
+        iface_1 = GRaaSInterface(self.gconf)
+        iface_2 = GRaaSInterface(self.gconf)
+        self.assertTrue(iface_1.rate_limiter is iface_2.rate_limiter)
+        self.assertTrue(iface_1.circuit_breaker is iface_2.circuit_breaker)
+
     def test_list_raster(self):
         iface = GRaaSInterface(self.gconf)
         status, layers = iface.list_raster(location="ECAD", mapset="PERMANENT")
@@ -56,6 +69,23 @@ class GRaaSInterfaceTestCase(TestBase):
         self.assertTrue("modification_time" in info)
         self.assertTrue("number_of_maps" in info)
 
+    def test_strds_info_cached(self):
+        iface = GRaaSInterface(self.gconf)
+        status, info = iface.layer_info(layer_name="ECAD.PERMANENT.strds.precipitation_1950_2013_yearly_mm")
+        self.assertEqual(status, 200)
+        status, cached_info = iface.layer_info(layer_name="ECAD.PERMANENT.strds.precipitation_1950_2013_yearly_mm")
+        self.assertEqual(status, 200)
+        self.assertEqual(info, cached_info)
+        # The cached entry is returned as copy, changes of the caller do not change the cache
+        self.assertFalse(info is cached_info)
+        cached_info["number_of_maps"] = -1
+        status, cached_info = iface.layer_info(layer_name="ECAD.PERMANENT.strds.precipitation_1950_2013_yearly_mm")
+        self.assertEqual(info, cached_info)
+        status, new_info = iface.layer_info(layer_name="ECAD.PERMANENT.strds.precipitation_1950_2013_yearly_mm",
+                                            use_cache=False)
+        self.assertEqual(status, 200)
+        self.assertEqual(info, new_info)
+
     def test_mapset_info(self):
         iface = GRaaSInterface(self.gconf)
         status, info = iface.mapset_info(location="ECAD", mapset="PERMANENT")
@@ -92,6 +122,19 @@ class GRaaSInterfaceTestCase(TestBase):
         status = iface.check_layer_exists(layer_name="ECAD.PERMANENT.raster.precipitation_yearly_mm_0")
         self.assertTrue(status)
 
+    def test_find_missing_layers(self):
+        iface = GRaaSInterface(self.gconf)
+        missing = iface.find_missing_layers(["ECAD.PERMANENT.strds.precipitation_1950_2013_yearly_mm",
+                                             "ECAD.PERMANENT.raster.precipitation_yearly_mm_0",
+                                             "ECAD.PERMANENT.strds.precipitation_1950_2013_yearly_mm_nope",
+                                             "ECAD.PERMANENT_nope.strds.precipitation_1950_2013_yearly_mm",
+                                             "precipitation_1950_2013_yearly_mm"])
+        pprint(missing)
+
+        self.assertEqual(missing, ["ECAD.PERMANENT.strds.precipitation_1950_2013_yearly_mm_nope",
+                                   "ECAD.PERMANENT_nope.strds.precipitation_1950_2013_yearly_mm",
+                                   "precipitation_1950_2013_yearly_mm"])
+
     def test_async_persistent_processing(self):
 
         iface = GRaaSInterface(self.gconf)
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from graas_openeo_core_wrapper.graph_db import MapsetNameAllocator
+
+__license__ = "Apache License, Version 2.0"
+__author__ = "Sören Gebbert"
+__copyright__ = "Copyright 2018, Sören Gebbert"
+__maintainer__ = "Soeren Gebbert"
+__email__ = "soerengebbert@googlemail.com"
+
+
+class MapsetNameAllocatorTestCase(unittest.TestCase):
+
+    def setUp(self):
+        handle, self.filename = tempfile.mkstemp(suffix=".sqlite")
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.filename)
+
+    def test_seed_once_per_location(self):
+        seeds = []
+
+        def seed():
+            seeds.append(1)
+            return 5
+
+        allocator = MapsetNameAllocator(self.filename)
+        self.assertEqual(allocator.allocate("LL", "openeo_mapset", seed), "openeo_mapset_5")
+        self.assertEqual(allocator.allocate("LL", "openeo_mapset", seed), "openeo_mapset_6")
+        self.assertEqual(len(seeds), 1)
+
+        # The counter is persistent and separate for each location
+        allocator = MapsetNameAllocator(self.filename)
+        self.assertEqual(allocator.allocate("LL", "openeo_mapset", seed), "openeo_mapset_7")
+        self.assertEqual(allocator.allocate("ECAD", "openeo_mapset", lambda: 0), "openeo_mapset_0")
+
+    def test_concurrent_allocation(self):
+
+        def allocate(i):
+            return MapsetNameAllocator(self.filename).allocate("LL", "openeo_mapset", lambda: 0)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            names = list(executor.map(allocate, range(200)))
+
+        self.assertEqual(len(set(names)), 200)
+        self.assertEqual(set(names), set("openeo_mapset_%i" % i for i in range(200)))
+
+
+if __name__ == "__main__":
+    unittest.main()
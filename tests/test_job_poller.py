@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+import unittest
+from graas_openeo_core_wrapper.config import Config
+from graas_openeo_core_wrapper.job_poller import JobStatusPoller
+
+__license__ = "Apache License, Version 2.0"
+__author__ = "Sören Gebbert"
+__copyright__ = "Copyright 2018, Sören Gebbert"
+__maintainer__ = "Soeren Gebbert"
+__email__ = "soerengebbert@googlemail.com"
+
+
+class StateFetcher(object):
+    """Returns the next state of a job from a list with each call and counts the calls of each job
+
+    Integers in the list are returned as failed requests with this status code.
+    """
+
+    def __init__(self, states):
+        self.states = states
+        self.calls = {}
+        self.lock = threading.Lock()
+
+    def __call__(self, job_id):
+        with self.lock:
+            count = self.calls.get(job_id, 0)
+            self.calls[job_id] = count + 1
+        state = self.states[min(count, len(self.states) - 1)]
+        if isinstance(state, int):
+            return state, {"error": "Request failed"}, "%s_%i" % (job_id, state)
+        return 200, {"status": state}, "%s_%s" % (job_id, state)
+
+
+class JobStatusPollerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.intervals = (Config.JOB_POLLER_MIN_INTERVAL, Config.JOB_POLLER_MAX_INTERVAL)
+        Config.JOB_POLLER_MIN_INTERVAL = 0.01
+        Config.JOB_POLLER_MAX_INTERVAL = 0.1
+
+    def tearDown(self):
+        Config.JOB_POLLER_MIN_INTERVAL, Config.JOB_POLLER_MAX_INTERVAL = self.intervals
+
+    def test_read_and_wait(self):
+        poller = JobStatusPoller(StateFetcher(["accepted", "accepted", "running", "running", "finished"]))
+
+        status, info, etag = poller.read("job_1", timeout=5)
+        self.assertEqual(info["status"], "accepted")
+
+        status, info, etag = poller.wait_for_change("job_1", etag=etag, timeout=5)
+        self.assertEqual(info["status"], "running")
+
+        # A finished job is returned immediately, even if its state is known
+        status, info, etag = poller.wait_for_change("job_1", etag=etag, timeout=5)
+        self.assertEqual(info["status"], "finished")
+        status, info, etag = poller.wait_for_change("job_1", etag=etag, timeout=5)
+        self.assertEqual(info["status"], "finished")
+
+        # Finished jobs are not requested again
+        calls = poller.fetch.calls["job_1"]
+        time.sleep(0.1)
+        poller.read("job_1", timeout=5)
+        self.assertEqual(poller.fetch.calls["job_1"], calls)
+
+    def test_backoff(self):
+        poller = JobStatusPoller(StateFetcher(["running"]))
+        poller.read("job_2", timeout=5)
+        time.sleep(0.5)
+
+        # The interval grows from 0.01 to 0.1 seconds, hence much less than 50 requests are sent
+        self.assertTrue(poller.fetch.calls["job_2"] < 20)
+
+    def test_shared_requests(self):
+        poller = JobStatusPoller(StateFetcher(["running"] * 10 + ["finished"]))
+        results = []
+
+        def wait():
+            state = poller.read("job_3", timeout=5)
+            while state[1]["status"] != "finished":
+                state = poller.wait_for_change("job_3", etag=state[2], timeout=5)
+            results.append(state)
+
+        threads = [threading.Thread(target=wait) for i in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # All clients read the states of a single sequence of requests
+        self.assertEqual([info["status"] for status, info, etag in results], ["finished"] * 10)
+        self.assertEqual(poller.fetch.calls["job_3"], 11)
+
+    def test_iterate_changes(self):
+        poller = JobStatusPoller(StateFetcher(["accepted", "running", "running", "finished"]))
+        states = [state[1]["status"] for state in poller.iterate_changes("job_4", timeout=5, keepalive=5)
+                  if state is not None]
+        self.assertEqual(states, ["accepted", "running", "finished"])
+
+    def test_transient_failure(self):
+        poller = JobStatusPoller(StateFetcher(["running", 503, 502, "running", "finished"]))
+        finished = []
+        poller.add_listener(lambda job_id, state: finished.append((job_id, state[1]["status"])))
+
+        status, info, etag = poller.read("job_5", timeout=5)
+        self.assertEqual(info["status"], "running")
+
+        # The failed requests do not end the polling and do not replace the known state
+        status, info, etag = poller.wait_for_change("job_5", etag=etag, timeout=5)
+        self.assertEqual(info["status"], "finished")
+        self.assertEqual(poller.fetch.calls["job_5"], 5)
+
+        # The listeners are called after the readers are notified
+        time.sleep(0.1)
+        self.assertEqual(finished, [("job_5", "finished")])
+
+    def test_rejected_request(self):
+        poller = JobStatusPoller(StateFetcher([404, "running"]))
+        final = []
+        poller.add_listener(lambda job_id, state: final.append(state[0]))
+
+        # The backend does not know the job, it is not requested again
+        status, info, etag = poller.read("job_6", timeout=5)
+        self.assertEqual(status, 404)
+        time.sleep(0.1)
+        self.assertEqual(poller.fetch.calls["job_6"], 1)
+        self.assertEqual(final, [404])
+
+    def test_failed_first_request(self):
+        calls = []
+
+        def fetch(job_id):
+            calls.append(job_id)
+            raise Exception("Connection refused")
+
+        poller = JobStatusPoller(fetch)
+
+        # The failed state is returned as soon as it is known
+        start = time.monotonic()
+        status, info, etag = poller.read("job_7", timeout=5)
+        self.assertEqual(status, 500)
+        self.assertTrue(time.monotonic() - start < 1)
+
+        # The job is not requested anymore after too many temporary failures
+        max_failures = Config.JOB_POLLER_MAX_TRANSIENT_FAILURES
+        Config.JOB_POLLER_MAX_TRANSIENT_FAILURES = 3
+        try:
+            poller.track("job_8")
+            time.sleep(0.5)
+            self.assertNotIn("job_8", poller._schedule)
+            self.assertEqual(calls.count("job_8"), 4)
+        finally:
+            Config.JOB_POLLER_MAX_TRANSIENT_FAILURES = max_failures
+
+    def test_priority(self):
+        requested = []
+
+        def fetch(job_id):
+            requested.append(job_id)
+            time.sleep(0.01)
+            return 200, {"status": "finished"}, job_id
+
+        poller = JobStatusPoller(fetch)
+        for i in range(10 * Config.JOB_POLLER_BATCH_SIZE):
+            poller.track("stored_job_%i" % i)
+
+        # The job that a client waits for is requested before the stored jobs
+        status, info, etag = poller.read("client_job", timeout=5)
+        self.assertEqual(etag, "client_job")
+        self.assertIn("client_job", requested[:Config.JOB_POLLER_BATCH_SIZE])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+import unittest
+from graas_openeo_core_wrapper.job_queue import JobQueue
+
+__license__ = "Apache License, Version 2.0"
+__author__ = "Sören Gebbert"
+__copyright__ = "Copyright 2018, Sören Gebbert"
+__maintainer__ = "Soeren Gebbert"
+__email__ = "soerengebbert@googlemail.com"
+
+
+class Submitter(object):
+    """Records the submitted jobs in their submission order and returns the job id of the submission"""
+
+    def __init__(self):
+        self.submitted = []
+        self.job_ids = []
+        self.event = threading.Event()
+
+    def submit(self, name, status=200, job_id=None):
+        self.submitted.append(name)
+        self.job_ids.append(job_id if job_id is not None else name)
+        self.event.set()
+        if status != 200:
+            return status, {"error": name}
+        return 200, {"job_id": self.job_ids[-1]}
+
+    def wait(self, count):
+        """Wait until count jobs were submitted"""
+        while len(self.submitted) < count:
+            self.event.wait(5)
+            self.event.clear()
+
+    def job(self, name, status=200):
+        return lambda job_id=None: self.submit(name, status, job_id)
+
+
+FINISHED = (200, {"status": "finished"}, "etag")
+
+
+def wait_for_submission(queue, job_id):
+    """Wait until the submission of a queued job completed and return its queue information"""
+    for i in range(500):
+        info = queue.queued_info(job_id)
+        if info is None or info[1]["status"] != "queued":
+            return info
+        time.sleep(0.01)
+
+
+class JobQueueTestCase(unittest.TestCase):
+
+    def test_admit_and_queue(self):
+        submitter = Submitter()
+        queue = JobQueue(max_running=2, max_running_per_user=None, max_queued_per_user=1)
+
+        self.assertEqual(queue.admit("user_1", 0, submitter.job("job_1")), (200, {"job_id": "job_1"}))
+        self.assertEqual(queue.admit("user_1", 0, submitter.job("job_2")), (200, {"job_id": "job_2"}))
+
+        status, data = queue.admit("user_1", 0, submitter.job("job_3"))
+        self.assertEqual(status, 202)
+        self.assertEqual(data["status"], "queued")
+        self.assertEqual(data["queue_position"], 1)
+        self.assertEqual(queue.queued_info(data["job_id"])[1]["status"], "queued")
+
+        # The queue of the user is full
+        status, data_4 = queue.admit("user_1", 0, submitter.job("job_4"))
+        self.assertEqual(status, 429)
+
+        # Running states and temporary failures of the state requests do not release the slot of a job
+        queue.job_finished("job_1", (200, {"status": "running"}, "etag"))
+        queue.job_finished("job_1", (503, {"error": "Service unavailable"}, "etag"))
+        self.assertEqual(submitter.submitted, ["job_1", "job_2"])
+
+        # The queued job is submitted with its queued id when a running job finished
+        queue.job_finished("job_1", FINISHED)
+        submitter.wait(3)
+        self.assertEqual(submitter.submitted, ["job_1", "job_2", "job_3"])
+        self.assertIsNone(wait_for_submission(queue, data["job_id"]))
+
+    def test_priority_and_round_robin(self):
+        submitter = Submitter()
+        queue = JobQueue(max_running=1, max_running_per_user=None, max_queued_per_user=None)
+
+        queue.admit("user_1", 0, submitter.job("job_1"))
+        queue.admit("user_1", 0, submitter.job("user_1_low"))
+        status, data = queue.admit("user_1", 5, submitter.job("user_1_high"))
+        queue.admit("user_2", 0, submitter.job("user_2_job"))
+
+        # The jobs of the users take turns, the jobs of a user are ordered by priority
+        self.assertEqual(data["queue_position"], 1)
+        self.assertEqual(queue.queued_info(data["job_id"])[1]["queue_position"], 1)
+
+        for count in range(2, 5):
+            queue.job_finished(submitter.job_ids[-1], FINISHED)
+            submitter.wait(count)
+
+        self.assertEqual(submitter.submitted, ["job_1", "user_1_high", "user_2_job", "user_1_low"])
+
+    def test_per_user_limit(self):
+        submitter = Submitter()
+        queue = JobQueue(max_running=None, max_running_per_user=1, max_queued_per_user=None)
+
+        queue.admit("user_1", 0, submitter.job("job_1"))
+        status, data = queue.admit("user_1", 0, submitter.job("job_2"))
+        self.assertEqual(status, 202)
+
+        # Other users are not blocked by the limit of a user
+        self.assertEqual(queue.admit("user_2", 0, submitter.job("job_3")), (200, {"job_id": "job_3"}))
+        self.assertEqual(submitter.submitted, ["job_1", "job_3"])
+
+    def test_cancel_and_failed_submission(self):
+        submitter = Submitter()
+        queue = JobQueue(max_running=1, max_running_per_user=None, max_queued_per_user=None)
+
+        queue.admit("user_1", 0, submitter.job("job_1"))
+        status, cancelled = queue.admit("user_1", 0, submitter.job("job_2"))
+        status, failing = queue.admit("user_1", 0, submitter.job("job_3", status=400))
+        status, queued = queue.admit("user_1", 0, submitter.job("job_4"))
+
+        self.assertTrue(queue.cancel(cancelled["job_id"]))
+        self.assertFalse(queue.cancel(cancelled["job_id"]))
+        self.assertEqual(queue.queued_info(cancelled["job_id"])[1]["status"], "terminated")
+
+        # The failed submission releases its slot, hence the next job is submitted
+        queue.job_finished("job_1", FINISHED)
+        submitter.wait(3)
+        self.assertEqual(submitter.submitted, ["job_1", "job_3", "job_4"])
+        self.assertEqual(wait_for_submission(queue, failing["job_id"]), (400, {"status": "error", "user_id": "user_1",
+                                                                      "job_info": {"error": "job_3"}}))
@@ -5,6 +5,8 @@ import pprint
 from flask import json
 from graas_openeo_core_wrapper.test_base import TestBase
 from graas_openeo_core_wrapper import config
+from graas_openeo_core_wrapper.job_queue import get_job_queue
+from graas_openeo_core_wrapper.graph_db import JobGroupDB
 
 __license__ = "Apache License, Version 2.0"
 __author__ = "Sören Gebbert"
@@ -374,7 +376,156 @@ class JobsTestCase(TestBase):
         data = json.loads(response.data.decode())
         pprint.pprint(data)
 
-        self.wait_until_finished(response=response, status="error", http_status=400)
+        # The missing strds is detected before the job is submitted
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue("LL.sentinel2A_openeo_subset.strds.S2A_B04_nope" in data["description"])
+
+    def test_5_post_reuse_finished_job(self):
+        response = self.app.post('/jobs?reuse=false', data=json.dumps(date_range_filter),
+                                 content_type="application/json")
+        data = json.loads(response.data.decode())
+        pprint.pprint(data)
+        self.wait_until_finished(response=response)
+
+        # The finished job is reused for the identical process graph
+        response = self.app.post('/jobs', data=json.dumps(date_range_filter), content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        reused_data = json.loads(response.data.decode())
+        pprint.pprint(reused_data)
+        self.assertTrue(reused_data["reused"])
+        self.assertEqual(reused_data["job_id"], data["job_id"])
+
+        # Opt out of the reuse
+        response = self.app.post('/jobs?reuse=false', data=json.dumps(date_range_filter),
+                                 content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        new_data = json.loads(response.data.decode())
+        self.assertFalse("reused" in new_data)
+        self.assertNotEqual(new_data["job_id"], data["job_id"])
+
+    def test_6_post_tiled_job(self):
+        response = self.app.post('/jobs?tile_size=0.5&reuse=false', data=json.dumps(date_range_filter_long_run),
+                                 content_type="application/json")
+        data = json.loads(response.data.decode())
+        pprint.pprint(data)
+
+        # The extent is split into 2 x 2 tiles that are processed by separate backend jobs
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(data["job_id"].startswith("job_group-"))
+        self.assertEqual(len(data["job_info"]["children"]), 4)
+
+        resp_data = self.wait_until_finished(response=response)
+        self.assertEqual(len(resp_data["job_info"]["children"]), 4)
+
+    def test_7_post_time_chunks_job(self):
+        response = self.app.post('/jobs?time_chunks=3&reuse=false', data=json.dumps(use_case_1_graph_export),
+                                 content_type="application/json")
+        data = json.loads(response.data.decode())
+        pprint.pprint(data)
+
+        # The date range is split into 3 parts, the partial minimums are merged when all parts are finished
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(data["job_id"].startswith("job_group-"))
+        self.assertEqual(len(data["job_info"]["children"]), 3)
+
+        resp_data = self.wait_until_finished(response=response)
+        self.assertTrue("merge_job" in resp_data["job_info"])
+
+        # The mapsets of the partial results are deleted when the job group is finished
+        for i in range(50):
+            if not JobGroupDB()[data["job_id"]]["mapsets"]:
+                break
+            time.sleep(0.2)
+        self.assertEqual(JobGroupDB()[data["job_id"]]["mapsets"], [])
+
+        # The number of time chunks is checked before the process graph is split
+        response = self.app.post('/jobs?time_chunks=100000&reuse=false', data=json.dumps(use_case_1_graph_export),
+                                 content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
+    def test_8_get_job_not_modified(self):
+        response = self.app.post('/jobs', data=json.dumps(date_range_filter), content_type="application/json")
+        data = self.wait_until_finished(response=response)
+
+        response = self.app.get('/jobs/%s' % data["job_id"])
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers["ETag"]
+
+        # The finished job did not change, hence it is not sent again
+        response = self.app.get('/jobs/%s' % data["job_id"], headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b"")
+        self.assertEqual(response.headers["ETag"], etag)
+
+        response = self.app.get('/jobs/%s' % data["job_id"], headers={"If-None-Match": '"outdated"'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_9_get_job_wait(self):
+        response = self.app.post('/jobs', data=json.dumps(date_range_filter), content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data.decode())
+
+        # Each request blocks until the state differs from the known state
+        headers = {}
+        states = []
+        while not states or states[-1] not in ("finished", "error", "terminated"):
+            response = self.app.get('/jobs/%s?wait=30' % data["job_id"], headers=headers)
+            self.assertEqual(response.status_code, 200)
+            states.append(json.loads(response.data.decode())["status"])
+            headers = {"If-None-Match": response.headers["ETag"]}
+
+        pprint.pprint(states)
+        self.assertEqual(states[-1], "finished")
+
+    def test_9_get_job_events(self):
+        response = self.app.post('/jobs', data=json.dumps(date_range_filter), content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data.decode())
+
+        # The stream ends when the job is finished
+        response = self.app.get('/jobs/%s/events' % data["job_id"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, "text/event-stream")
+
+        events = [line[len("data: "):] for line in response.data.decode().split("\n") if line.startswith("data: ")]
+        pprint.pprint(events)
+        self.assertEqual(json.loads(events[-1])["status"], "finished")
+
+    def test_9_post_queued_job(self):
+        queue = get_job_queue()
+        max_running_per_user = queue.max_running_per_user
+        queue.max_running_per_user = 1
+
+        try:
+            first = self.app.post('/jobs?reuse=false', data=json.dumps(date_range_filter),
+                                  content_type="application/json")
+            self.assertEqual(first.status_code, 200)
+
+            # The second job of the user waits until the first job is finished
+            response = self.app.post('/jobs?reuse=false', data=json.dumps(date_range_filter),
+                                     content_type="application/json")
+            data = json.loads(response.data.decode())
+            pprint.pprint(data)
+            self.assertEqual(response.status_code, 202)
+            self.assertEqual(data["status"], "queued")
+            self.assertEqual(data["queue_position"], 1)
+
+            response = self.app.get('/jobs/%s' % data["job_id"])
+            self.assertEqual(json.loads(response.data.decode())["status"], "queued")
+
+            self.wait_until_finished(response=first)
+
+            # The queued job keeps its id after the submission
+            states = []
+            while not states or states[-1] not in ("finished", "error", "terminated"):
+                response = self.app.get('/jobs/%s?wait=30' % data["job_id"],
+                                        headers={"If-None-Match": response.headers.get("ETag", "")})
+                states.append(json.loads(response.data.decode())["status"])
+
+            pprint.pprint(states)
+            self.assertEqual(states[-1], "finished")
+        finally:
+            queue.max_running_per_user = max_running_per_user
 
     def wait_until_finished(self, response, http_status=200, status="finished"):
         """Poll the status of a resource and assert its finished HTTP status
@@ -1,9 +1,20 @@
 # -*- coding: utf-8 -*-
+import sys
 import unittest
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from pprint import pprint
 from graas_openeo_core_wrapper import config
 from graas_openeo_core_wrapper.test_base import TestBase
-from graas_openeo_core_wrapper.process_definitions import analyse_process_graph
+from graas_openeo_core_wrapper.process_definitions import analyse_process_graph, compile_process_graph
+from graas_openeo_core_wrapper.process_definitions.compile_context import CompileContext
+from graas_openeo_core_wrapper.process_definitions.graph_hash import canonical_graph_hash
+from graas_openeo_core_wrapper.process_definitions.optimizer import optimize_process_chain
+from graas_openeo_core_wrapper.process_definitions.rewrite import push_down_filters
+from graas_openeo_core_wrapper.process_definitions.tiling import compute_tiles, count_tiles, split_process_graph
+from graas_openeo_core_wrapper.process_definitions.temporal import compute_time_chunks, split_time_reduction, \
+    create_merge_process_chain
+from graas_openeo_core_wrapper.process_definitions.validate import validate_process_graph, parse_date
 
 __license__ = "Apache License, Version 2.0"
 __author__ = "Sören Gebbert"
@@ -327,6 +338,640 @@ class ProcessDefinitionTestCase(TestBase):
 
         self.assertEqual(len(pc), 6)
 
+    def test_canonical_graph_hash(self):
+        graph_1 = {"process_graph": {"process_id": "filter_bbox",
+                                     "args": {"collections": [{"product_id": "ECAD.PERMANENT.strds.t"}],
+                                              "left": -40.5, "right": 75, "top": 75.5, "bottom": 25.25,
+                                              "ewres": 0.1, "nsres": 0.1}}}
+        graph_2 = {"process_graph": {"args": {"nsres": 0.1, "ewres": 0.1, "bottom": 25.25, "top": 75.5,
+                                              "right": 75.0, "left": -40.5,
+                                              "collections": [{"product_id": "ECAD.PERMANENT.strds.t"}]},
+                                     "process_id": "filter_bbox"}}
+        graph_3 = {"process_graph": {"process_id": "filter_bbox",
+                                     "args": {"collections": [{"product_id": "ECAD.PERMANENT.strds.t"}],
+                                              "left": -40.5, "right": 75.1, "top": 75.5, "bottom": 25.25,
+                                              "ewres": 0.1, "nsres": 0.1}}}
+
+        self.assertEqual(canonical_graph_hash(graph_1), canonical_graph_hash(graph_2))
+        self.assertNotEqual(canonical_graph_hash(graph_1), canonical_graph_hash(graph_3))
+
+    def test_compile_process_graph(self):
+        graph = {
+            "process_graph": {
+                "process_id": "min_time",
+                "args": {
+                    "collections": [{
+                        "process_id": "filter_daterange",
+                        "args": {
+                            "collections": [{"product_id": "ECAD.PERMANENT.strds.temperature_mean_1950_2013_yearly_celsius"}],
+                            "from": "2001-01-01",
+                            "to": "2005-01-01"
+                        }
+                    }]
+                }
+            }
+        }
+
+        compiled = compile_process_graph(graph)
+        pprint(compiled)
+
+        self.assertEqual(compiled.locations, ["ECAD"])
+        self.assertEqual(compiled.output_names, ["temperature_mean_1950_2013_yearly_celsius_filter_daterange_min_time"])
+        self.assertEqual(len(compiled.process_list), 2)
+
+        # The compiled process chain is deterministic and cached
+        self.assertEqual(compile_process_graph(graph), compiled)
+        compiled.process_list.pop()
+        self.assertEqual(len(compile_process_graph(graph).process_list), 2)
+
+    def test_compile_concurrently(self):
+
+        def create_graph(location, year):
+            return {
+                "process_graph": {
+                    "process_id": "min_time",
+                    "args": {
+                        "collections": [{
+                            "process_id": "filter_daterange",
+                            "args": {
+                                "collections": [{"product_id": "%s.PERMANENT.strds.precipitation" % location}],
+                                "from": "%i-01-01" % year,
+                                "to": "%i-01-01" % (year + 1)
+                            }
+                        }]
+                    }
+                }
+            }
+
+        graphs = [create_graph(location, year) for year in range(1950, 2000) for location in ("ECAD", "LL")]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(compile_process_graph, graphs))
+
+        # The locations and the step ids of a compilation do not leak into other compilations
+        for graph, compiled in zip(graphs, results):
+            location = graph["process_graph"]["args"]["collections"][0]["args"]["collections"][0]["product_id"]
+            self.assertEqual(compiled.locations, [location.split(".")[0]])
+            self.assertEqual([step["id"] for step in compiled.process_list],
+                             ["t_rast_extract_0", "t_rast_series_1"])
+
+        context = CompileContext()
+        analyse_process_graph(graphs[0], context)
+        self.assertEqual(context.locations, {"ECAD"})
+
+    def test_compile_common_subgraphs(self):
+        branch = {
+            "process_id": "filter_daterange",
+            "args": {
+                "collections": [{
+                    "process_id": "filter_bbox",
+                    "args": {
+                        "collections": [{"product_id": "LL.sentinel2A_openeo_subset.strds.S2A_B04"}],
+                        "left": -5.0,
+                        "right": -4.7,
+                        "top": 39.3,
+                        "bottom": 39.0,
+                        "ewres": 0.1,
+                        "nsres": 0.1
+                    }
+                }],
+                "from": "2017-04-12 11:17:08",
+                "to": "2017-09-04 11:18:26"
+            }
+        }
+        graph = {
+            "process_graph": {
+                "process_id": "zonal_statistics",
+                "args": {
+                    "collections": [branch,
+                                    {"process_id": "min_time", "args": {"collections": [branch]}}],
+                    "regions": "https://storage.googleapis.com/graas-geodata/roi_openeo_use_case_2.geojson"
+                }
+            }
+        }
+
+        names, pc = analyse_process_graph(graph=graph)
+        self.assertEqual(len(pc), 19)
+
+        compiled = compile_process_graph(graph)
+        pprint(compiled)
+
+        # The shared filter_daterange(filter_bbox()) branch is emitted only once
+        modules = [entry["module"] for entry in compiled.process_list]
+        self.assertEqual(modules[:3], ["g.region", "t.rast.extract", "t.rast.series"])
+        self.assertEqual(len(compiled.process_list), 15)
+        self.assertEqual(compiled.process_list[2]["inputs"][0]["value"], "S2A_B04_filter_daterange")
+        self.assertEqual(compiled.output_names, ["S2A_B04_filter_daterange", "S2A_B04_filter_daterange_min_time"])
+
+    def test_compile_common_subgraphs_region(self):
+
+        def bbox(top):
+            return {"process_id": "filter_bbox",
+                    "args": {"collections": [{"product_id": "LL.sentinel2A_openeo_subset.strds.S2A_B04"}],
+                             "left": -5.0, "right": -4.7, "top": top, "bottom": 39.0,
+                             "ewres": 0.1, "nsres": 0.1}}
+
+        graph = {"process_graph": {
+            "process_id": "min_time",
+            "args": {"collections": [
+                {"process_id": "min_time", "args": {"collections": [bbox(75.5)]}},
+                {"process_id": "min_time", "args": {"collections": [bbox(50.0)]}},
+                {"process_id": "filter_daterange",
+                 "args": {"collections": [bbox(75.5)],
+                          "from": "2017-04-12 11:17:08",
+                          "to": "2017-09-04 11:18:26"}}]}}}
+
+        compiled = compile_process_graph(graph)
+        pprint(compiled.process_list)
+
+        # The reused filter_bbox subgraph sets its region again after the region of the second branch
+        north = None
+        for step in compiled.process_list:
+            if step["module"] == "g.region":
+                north = dict((entry["param"], entry["value"]) for entry in step["inputs"]).get("n", north)
+            if step["module"] == "t.rast.extract":
+                self.assertEqual(north, "75.5")
+
+        self.assertEqual(len([step for step in compiled.process_list if step["module"] == "t.rast.extract"]), 1)
+
+    def test_optimize_regions(self):
+        graph = {
+            "process_graph": {
+                "process_id": "zonal_statistics",
+                "args": {
+                    "collections": [{
+                        "process_id": "filter_bbox",
+                        "args": {
+                            "collections": [{"product_id": "LL.sentinel2A_openeo_subset.strds.S2A_B04"},
+                                            {"product_id": "LL.sentinel2A_openeo_subset.strds.S2A_B08"}],
+                            "left": -5.0,
+                            "right": -4.7,
+                            "top": 39.3,
+                            "bottom": 39.0,
+                            "ewres": 0.1,
+                            "nsres": 0.1
+                        }
+                    }],
+                    "regions": "https://storage.googleapis.com/graas-geodata/roi_openeo_use_case_2.geojson"
+                }
+            }
+        }
+
+        names, pc = analyse_process_graph(graph=graph)
+        self.assertEqual(len(pc), 16)
+
+        # The identical second g.region, the last region restore and its region save are removed
+        optimized = optimize_process_chain(pc)
+        pprint(optimized)
+        modules = [entry["module"] for entry in optimized]
+        self.assertEqual(modules, ["g.region", "importer", "g.region", "g.region", "r.mask", "t.rast.univar",
+                                   "r.mask", "g.region", "importer", "g.region", "r.mask", "t.rast.univar",
+                                   "r.mask"])
+
+        # The region of a persistent mapset must be restored at the end of processing
+        optimized = optimize_process_chain(pc, discard_region=False)
+        self.assertEqual(len(optimized), 15)
+
+    def test_compile_openeo_usecase_1(self):
+        graph = {
+            "process_graph": {
+                "process_id": "NDVI",
+                "args": {
+                    "collections": [{
+                        "process_id": "filter_bbox",
+                        "args": {
+                            "collections": [{"product_id": "LL.sentinel2A_openeo_subset.strds.S2A_B04"}],
+                            "left": -5.0, "right": -4.7, "top": 39.3, "bottom": 39.0, "ewres": 0.1, "nsres": 0.1
+                        }
+                    }, {
+                        "process_id": "filter_bbox",
+                        "args": {
+                            "collections": [{"product_id": "LL.sentinel2A_openeo_subset.strds.S2A_B08"}],
+                            "left": -5.0, "right": -4.7, "top": 39.3, "bottom": 39.0, "ewres": 0.1, "nsres": 0.1
+                        }
+                    }],
+                    "red": "S2A_B04",
+                    "nir": "S2A_B08"
+                }
+            }
+        }
+
+        names, pc = analyse_process_graph(graph=graph)
+        self.assertEqual(len(pc), 4)
+
+        # Only a single g.region step is required
+        compiled = compile_process_graph(graph)
+        pprint(compiled)
+        modules = [entry["module"] for entry in compiled.process_list]
+        self.assertEqual(modules, ["g.region", "t.rast.mapcalc", "t.rast.colors"])
+
+    def test_compile_filter_push_down(self):
+        graph = {
+            "process_graph": {
+                "process_id": "min_time",
+                "args": {
+                    "collections": [{
+                        "process_id": "filter_daterange",
+                        "args": {
+                            "collections": [{
+                                "process_id": "NDVI",
+                                "args": {
+                                    "collections": [{"product_id": "LL.sentinel2A_openeo_subset.strds.S2A_B04"},
+                                                    {"product_id": "LL.sentinel2A_openeo_subset.strds.S2A_B08"}],
+                                    "red": "S2A_B04",
+                                    "nir": "S2A_B08"
+                                }
+                            }],
+                            "from": "2017-04-12 11:17:08",
+                            "to": "2017-09-04 11:18:26"
+                        }
+                    }]
+                }
+            }
+        }
+
+        names, pc = analyse_process_graph(graph=graph)
+        modules = [entry["module"] for entry in pc]
+        self.assertEqual(modules, ["t.rast.mapcalc", "t.rast.colors", "t.rast.extract", "t.rast.series"])
+
+        # The date filter is applied to the bands before the NDVI is computed
+        compiled = compile_process_graph(graph)
+        pprint(compiled)
+        modules = [entry["module"] for entry in compiled.process_list]
+        self.assertEqual(modules, ["t.rast.extract", "t.rast.extract", "t.rast.mapcalc",
+                                   "t.rast.colors", "t.rast.series"])
+        self.assertEqual(compiled.output_names, ["S2A_B08_filter_daterange_NDVI_min_time"])
+
+        # The scaling of the extracted maps is fused into the NDVI expression
+        for entry in compiled.process_list[:2]:
+            self.assertFalse("expression" in [param["param"] for param in entry["inputs"]])
+        expression = compiled.process_list[2]["inputs"][0]["value"]
+        self.assertTrue(expression.startswith("S2A_B08_filter_daterange_NDVI = float(((1.0 * S2A_B08_filter_daterange)"))
+
+    def test_filter_push_down_order(self):
+        graph = {
+            "process_graph": {
+                "process_id": "filter_bbox",
+                "args": {
+                    "collections": [{
+                        "process_id": "filter_daterange",
+                        "args": {
+                            "collections": [{
+                                "process_id": "zonal_statistics",
+                                "args": {
+                                    "collections": [{"product_id": "LL.sentinel2A_openeo_subset.strds.S2A_B04"}],
+                                    "regions": "https://storage.googleapis.com/graas-geodata/roi_openeo_use_case_2.geojson"
+                                }
+                            }],
+                            "from": "2017-04-12 11:17:08",
+                            "to": "2017-09-04 11:18:26"
+                        }
+                    }],
+                    "left": -5.0, "right": -4.7, "top": 39.3, "bottom": 39.0, "ewres": 0.1, "nsres": 0.1
+                }
+            }
+        }
+
+        # The spatial filter is moved below the date filter, but not below the zonal statistics
+        rewritten = push_down_filters(graph)
+        pprint(rewritten)
+        self.assertEqual(rewritten["process_graph"]["process_id"], "filter_daterange")
+        bbox = rewritten["process_graph"]["args"]["collections"][0]
+        self.assertEqual(bbox["process_id"], "filter_bbox")
+        self.assertEqual(bbox["args"]["collections"][0]["process_id"], "zonal_statistics")
+        self.assertEqual(graph["process_graph"]["process_id"], "filter_bbox")
+
+    def test_nested_filter_bbox(self):
+        inner = {"process_id": "filter_bbox",
+                 "args": {"collections": [{"product_id": "LL.sentinel2A_openeo_subset.strds.S2A_B04"}],
+                          "left": 0, "right": 10, "top": 10, "bottom": 0, "ewres": 0.1, "nsres": 0.1}}
+        outer = {"process_id": "filter_bbox",
+                 "args": {"collections": [inner],
+                          "left": 2, "right": 5, "top": 5, "bottom": 2, "ewres": 0.1, "nsres": 0.1}}
+        graph = {
+            "process_graph": {
+                "process_id": "raster_exporter",
+                "args": {
+                    "collections": [{
+                        "process_id": "min_time",
+                        "args": {"collections": [outer]}
+                    }]
+                }
+            }
+        }
+
+        # Nested spatial filters keep their order, the region of the outer filter is used
+        rewritten = push_down_filters(graph)
+        bbox = rewritten["process_graph"]["args"]["collections"][0]["args"]["collections"][0]
+        self.assertEqual(bbox["args"]["left"], 2)
+        self.assertEqual(bbox["args"]["collections"][0]["args"]["left"], 0)
+
+        compiled = compile_process_graph(graph)
+        pprint(compiled)
+        regions = [entry for entry in compiled.process_list if entry["module"] == "g.region"]
+        inputs = dict((param["param"], param["value"]) for param in regions[-1]["inputs"])
+        self.assertEqual((inputs["n"], inputs["s"], inputs["e"], inputs["w"]), ("5", "2", "5", "2"))
+
+    def test_fusion_keeps_used_extract(self):
+        graph = {
+            "process_graph": {
+                "process_id": "min_time",
+                "args": {
+                    "collections": [{
+                        "process_id": "filter_daterange",
+                        "args": {
+                            "collections": [{"product_id": "ECAD.PERMANENT.strds.temperature_mean_1950_2013_yearly_celsius"}],
+                            "from": "2001-01-01",
+                            "to": "2005-01-01"
+                        }
+                    }]
+                }
+            }
+        }
+
+        # t.rast.series is not a map algebra step, hence the extracted maps must be computed
+        compiled = compile_process_graph(graph)
+        self.assertTrue("expression" in [param["param"] for param in compiled.process_list[0]["inputs"]])
+
+    def test_compile_deep_graph(self):
+        depth = sys.getrecursionlimit() * 3
+
+        entry = {"product_id": "ECAD.PERMANENT.strds.temperature_mean_1950_2013_yearly_celsius"}
+        for i in range(depth):
+            entry = {"process_id": "min_time", "args": {"collections": [entry]}}
+        graph = {"process_graph": entry}
+
+        compiled = compile_process_graph(graph)
+
+        self.assertEqual(len(compiled.process_list), depth)
+        self.assertEqual(compiled.locations, ["ECAD"])
+        # The generated names are unique and do not grow with the depth of the graph
+        names = [step["inputs"][2]["value"] for step in compiled.process_list]
+        self.assertEqual(len(set(names)), depth)
+        self.assertTrue(max(len(name) for name in names) < 150)
+        self.assertEqual(compiled.process_list[1]["inputs"][0]["value"], names[0])
+
+    def test_step_ids(self):
+        graph = {
+            "process_graph": {
+                "process_id": "zonal_statistics",
+                "args": {
+                    "collections": [{
+                        "process_id": "udf_reduce_time",
+                        "args": {
+                            "collections": [{"product_id": "LL.sentinel2A_openeo_subset.strds.S2A_B04"},
+                                            {"product_id": "LL.sentinel2A_openeo_subset.strds.S2A_B08"}],
+                            "python_file_url": "https://storage.googleapis.com/datentransfer/aggr_func.py"
+                        }
+                    }],
+                    "regions": "https://storage.googleapis.com/graas-geodata/roi_openeo_use_case_2.geojson"
+                }
+            }
+        }
+
+        names, pc = analyse_process_graph(graph=graph)
+        ids = [step["id"] for step in pc]
+        pprint(ids)
+
+        # The step ids are unique and identical for each analysis of the same process graph
+        self.assertEqual(len(set(ids)), len(pc))
+        self.assertEqual(ids[:3], ["t_rast_aggr_func_0", "t_rast_aggr_func_1", "importer_2"])
+        self.assertEqual(analyse_process_graph(graph=graph)[1], pc)
+
+    def test_validate_process_graph(self):
+        graph = {
+            "process_graph": {
+                "process_id": "zonal_statistics",
+                "args": {
+                    "collections": [{
+                        "process_id": "NDVI",
+                        "args": {
+                            "collections": [{
+                                "process_id": "filter_daterange",
+                                "args": {
+                                    "collections": [{
+                                        "process_id": "filter_bbox",
+                                        "args": {
+                                            "collections": [{"product_id": "LL.sentinel2A_openeo_subset.strds.S2A_B04"}],
+                                            "left": 5.0,
+                                            "right": -5.0,
+                                            "top": 39.3,
+                                            "bottom": 39.0,
+                                            "ewres": "0.1",
+                                            "nsres": 0.1
+                                        }
+                                    }],
+                                    "from": "2017-04-12 11:17:08",
+                                    "to": "yesterday"
+                                }
+                            }],
+                            "red": "S2A_B04",
+                            "nir": "S2A_B08"
+                        }
+                    }]
+                }
+            }
+        }
+
+        errors = validate_process_graph(graph)
+        pprint(errors)
+
+        self.assertEqual(errors, [
+            "The argument <ewres> of process <filter_bbox> must be of type number",
+            "The left boundary of process <filter_bbox> must be smaller than the right boundary",
+            "The argument <to> of process <filter_daterange> is not a valid date: yesterday",
+            "Process <NDVI> requires two input time series, but got 1",
+            "Process <zonal_statistics> requires the argument <regions>"])
+
+        # The compilation rejects the process graph with all errors
+        with self.assertRaises(Exception) as context:
+            compile_process_graph(graph)
+        self.assertTrue("must be smaller than the right boundary" in str(context.exception))
+        self.assertTrue("requires the argument <regions>" in str(context.exception))
+
+        self.assertEqual(validate_process_graph({"process_graph": {"process_id": "min_time", "args": {}}}),
+                         ["Process <min_time> requires a list of collections"])
+        self.assertEqual(validate_process_graph({}), ["process_graph or collection not found on process description"])
+
+    def test_parse_date(self):
+        self.assertEqual(parse_date("2017-04-12"), datetime(2017, 4, 12))
+        self.assertEqual(parse_date("2017-04-12 11:17:08"), datetime(2017, 4, 12, 11, 17, 8))
+
+        # ISO 8601 dates with time zone are converted to UTC
+        self.assertEqual(parse_date("2017-04-12T11:17:08Z"), datetime(2017, 4, 12, 11, 17, 8))
+        self.assertEqual(parse_date("2017-04-12T11:17:08.250Z"), datetime(2017, 4, 12, 11, 17, 8, 250000))
+        self.assertEqual(parse_date("2017-04-12T13:17:08+02:00"), datetime(2017, 4, 12, 11, 17, 8))
+        self.assertEqual(parse_date("2017-04-12 08:17:08.5-0300"), datetime(2017, 4, 12, 11, 17, 8, 500000))
+        self.assertIsNone(parse_date("2017-13-12T11:17:08Z"))
+
+        self.assertIsNone(parse_date("yesterday"))
+        self.assertIsNone(parse_date(20170412))
+
+        # The dates with and without time zone can be compared
+        graph = {
+            "process_graph": {
+                "process_id": "filter_daterange",
+                "args": {
+                    "collections": [{"product_id": "LL.sentinel2A_openeo_subset.strds.S2A_B04"}],
+                    "from": "2017-04-12T11:17:08.250Z",
+                    "to": "2017-09-04 11:18:26"
+                }
+            }
+        }
+        self.assertEqual(validate_process_graph(graph), [])
+
+    def test_compute_tiles(self):
+        extent = dict(left=0.0, right=1.0, top=1.0, bottom=0.0, ewres=0.1, nsres=0.1)
+
+        tiles = compute_tiles(extent, tile_size=0.4)
+        pprint(tiles)
+
+        # 10 x 10 cells are split into 3 x 3 tiles, the last row and column are smaller
+        self.assertEqual(len(tiles), 9)
+        self.assertEqual(tiles[0], dict(left=0.0, right=0.4, top=1.0, bottom=0.6, ewres=0.1, nsres=0.1))
+        self.assertEqual(tiles[-1], dict(left=0.8, right=1.0, top=0.2, bottom=0.0, ewres=0.1, nsres=0.1))
+
+        # The overlap extends the tiles by whole cells, but not beyond the extent
+        tiles = compute_tiles(extent, tile_size=0.5, overlap=1)
+        self.assertEqual(len(tiles), 4)
+        self.assertEqual(tiles[0], dict(left=0.0, right=0.6, top=1.0, bottom=0.4, ewres=0.1, nsres=0.1))
+        self.assertEqual(tiles[3], dict(left=0.4, right=1.0, top=0.6, bottom=0.0, ewres=0.1, nsres=0.1))
+
+        # The tiles are counted without creating them
+        self.assertEqual(count_tiles(extent, tile_size=0.4), 9)
+        self.assertEqual(count_tiles(extent, tile_size=0.5), 4)
+        self.assertEqual(count_tiles(dict(extent, right=1000000.0, top=1000000.0), tile_size=0.1), 10 ** 14)
+
+        self.assertRaises(Exception, compute_tiles, extent, tile_size=0)
+        self.assertRaises(Exception, compute_tiles, extent, tile_size=-0.5)
+        self.assertRaises(Exception, compute_tiles, extent, tile_size=0.5, overlap=-1)
+
+    def test_split_process_graph(self):
+
+        def bbox(product_id, right=1.0):
+            return {"process_id": "filter_bbox",
+                    "args": {"collections": [{"product_id": product_id}],
+                             "left": 0.0, "right": right, "top": 1.0, "bottom": 0.0,
+                             "ewres": 0.1, "nsres": 0.1}}
+
+        graph = {"process_graph": {
+            "process_id": "min_time",
+            "args": {"collections": [{
+                "process_id": "NDVI",
+                "args": {"collections": [bbox("LL.sentinel2A_openeo_subset.strds.S2A_B04"),
+                                         bbox("LL.sentinel2A_openeo_subset.strds.S2A_B08")],
+                         "red": "S2A_B04",
+                         "nir": "S2A_B08"}}]}}}
+
+        tiles = split_process_graph(graph, tile_size=0.5)
+        self.assertEqual(len(tiles), 4)
+
+        for tile, tile_graph in tiles:
+            ndvi = tile_graph["process_graph"]["args"]["collections"][0]
+            for entry in ndvi["args"]["collections"]:
+                self.assertEqual(entry["args"]["left"], tile["left"])
+                self.assertEqual(entry["args"]["top"], tile["top"])
+            output_names, process_list = compile_process_graph(tile_graph)[:2]
+            self.assertTrue(len(process_list) > 0)
+
+        # The original process graph is not modified
+        self.assertEqual(graph["process_graph"]["args"]["collections"][0]["args"]["collections"][0]["args"]["right"],
+                         1.0)
+
+        # Too many tiles are rejected before they are created
+        self.assertRaises(Exception, split_process_graph, graph, tile_size=0.5, max_tiles=3)
+        self.assertEqual(len(split_process_graph(graph, tile_size=0.5, max_tiles=4)), 4)
+
+        # A single tile, different extents and processes that are not tileable prevent the tiling
+        self.assertEqual(split_process_graph(graph, tile_size=2.0), None)
+        graph["process_graph"]["args"]["collections"][0]["args"]["collections"][1] = \
+            bbox("LL.sentinel2A_openeo_subset.strds.S2A_B08", right=0.9)
+        self.assertEqual(split_process_graph(graph, tile_size=0.5), None)
+        graph = {"process_graph": {"process_id": "udf_reduce_time",
+                                   "args": {"collections": [bbox("LL.sentinel2A_openeo_subset.strds.S2A_B04")],
+                                            "python_file_url": "https://example.com/udf.py"}}}
+        self.assertEqual(split_process_graph(graph, tile_size=0.5), None)
+
+    def test_compute_time_chunks(self):
+        chunks = compute_time_chunks("2017-01-01", "2017-01-31 00:00:00", 3)
+        pprint(chunks)
+
+        self.assertEqual(chunks, [{"from": "2017-01-01", "to": "2017-01-31 00:00:00",
+                                   "start_before": "2017-01-11 00:00:00"},
+                                  {"from": "2017-01-11 00:00:00", "to": "2017-01-31 00:00:00",
+                                   "start_before": "2017-01-21 00:00:00"},
+                                  {"from": "2017-01-21 00:00:00", "to": "2017-01-31 00:00:00"}])
+
+        # Parts without a map of each time series are merged with the following part
+        start_times = [["2017-01-02", "2017-01-03", "2017-01-25"],
+                       ["2017-01-02 12:00:00", "2017-01-22 00:00:00"]]
+        chunks = compute_time_chunks("2017-01-01", "2017-01-31 00:00:00", 3, start_times)
+        self.assertEqual(chunks, [{"from": "2017-01-01", "to": "2017-01-31 00:00:00",
+                                   "start_before": "2017-01-11 00:00:00"},
+                                  {"from": "2017-01-11 00:00:00", "to": "2017-01-31 00:00:00"}])
+
+        # An empty last part is merged with the previous part
+        chunks = compute_time_chunks("2017-01-01", "2017-01-31 00:00:00", 3, [["2017-01-02", "2017-01-12"]])
+        self.assertEqual(chunks, [{"from": "2017-01-01", "to": "2017-01-31 00:00:00",
+                                   "start_before": "2017-01-11 00:00:00"},
+                                  {"from": "2017-01-11 00:00:00", "to": "2017-01-31 00:00:00"}])
+
+    def test_split_time_reduction(self):
+
+        def daterange(product_id, to="2017-09-04 11:18:26"):
+            return {"process_id": "filter_daterange",
+                    "args": {"collections": [{"product_id": product_id}],
+                             "from": "2017-04-12 11:17:08",
+                             "to": to}}
+
+        graph = {"process_graph": {
+            "process_id": "raster_exporter",
+            "args": {"collections": [{
+                "process_id": "min_time",
+                "args": {"collections": [{
+                    "process_id": "NDVI",
+                    "args": {"collections": [daterange("LL.sentinel2A_openeo_subset.strds.S2A_B04"),
+                                             daterange("LL.sentinel2A_openeo_subset.strds.S2A_B08")],
+                             "red": "S2A_B04",
+                             "nir": "S2A_B08"}}]}}]}}}
+
+        split = split_time_reduction(graph, 4)
+        self.assertEqual(len(split.chunks), 4)
+        self.assertEqual(split.merge_method, "minimum")
+        self.assertTrue(split.export)
+
+        for chunk, chunk_graph in split.chunks:
+            # The raster exporter is not part of the chunks, it is applied to the merged result
+            self.assertEqual(chunk_graph["process_graph"]["process_id"], "min_time")
+            output_names, process_list = compile_process_graph(chunk_graph, persistent=True)[:2]
+            pprint(process_list)
+            self.assertEqual(len(output_names), 1)
+
+            extracts = [step for step in process_list if step["module"] == "t.rast.extract"]
+            self.assertEqual(len(extracts), 2)
+            for step in extracts:
+                where = [param["value"] for param in step["inputs"] if param["param"] == "where"][0]
+                self.assertTrue(chunk["from"] in where)
+                if "start_before" in chunk:
+                    self.assertTrue("start_time < '%s'" % chunk["start_before"] in where)
+
+        # Only parts with maps are created, a single remaining part prevents the split
+        start_times = {"LL.sentinel2A_openeo_subset.strds.S2A_B04": ["2017-04-13", "2017-08-20"],
+                       "LL.sentinel2A_openeo_subset.strds.S2A_B08": ["2017-04-13", "2017-08-20"]}
+        split = split_time_reduction(graph, 4, list_start_times=start_times.get)
+        self.assertEqual(len(split.chunks), 2)
+        self.assertEqual(split_time_reduction(graph, 4, list_start_times=lambda product_id: ["2017-04-13"]), None)
+
+        process_chain = create_merge_process_chain([["a@mapset_1", "a@mapset_2"]], "minimum", True)
+        pprint(process_chain)
+        self.assertEqual([step["module"] for step in process_chain["list"]], ["g.region", "r.series", "exporter"])
+        self.assertEqual(process_chain["list"][1]["inputs"][0]["value"], "a@mapset_1,a@mapset_2")
+
+        # Different date ranges and processes that are not temporally local prevent the split
+        ndvi = graph["process_graph"]["args"]["collections"][0]["args"]["collections"][0]
+        ndvi["args"]["collections"][1] = daterange("LL.sentinel2A_openeo_subset.strds.S2A_B08", to="2017-08-01")
+        self.assertEqual(split_time_reduction(graph, 4), None)
+        self.assertEqual(split_time_reduction({"process_graph": ndvi}, 4), None)
+
 
 if __name__ == "__main__":
     unittest.main()
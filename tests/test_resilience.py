@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+import time
+import unittest
+import requests
+from graas_openeo_core_wrapper.config import Config
+from graas_openeo_core_wrapper.graas_interface import GRaaSInterface
+from graas_openeo_core_wrapper.resilience import TokenBucket, CircuitBreaker
+
+__license__ = "Apache License, Version 2.0"
+__author__ = "Sören Gebbert"
+__copyright__ = "Copyright 2018, Sören Gebbert"
+__maintainer__ = "Soeren Gebbert"
+__email__ = "soerengebbert@googlemail.com"
+
+
+class TokenBucketTestCase(unittest.TestCase):
+
+    def test_burst_and_rate(self):
+        bucket = TokenBucket(rate=20, burst=3)
+
+        for i in range(3):
+            self.assertTrue(bucket.acquire(timeout=0))
+
+        # The bucket is empty, the next token is available after 1/20 seconds
+        self.assertFalse(bucket.acquire(timeout=0))
+        start = time.monotonic()
+        self.assertTrue(bucket.acquire(timeout=1))
+        self.assertGreater(time.monotonic() - start, 0.03)
+
+    def test_no_limit(self):
+        bucket = TokenBucket(rate=None, burst=0)
+        for i in range(100):
+            self.assertTrue(bucket.acquire(timeout=0))
+
+
+class CircuitBreakerTestCase(unittest.TestCase):
+
+    def test_open_and_close(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.1)
+        probes = []
+
+        def probe(result):
+            probes.append(result)
+            return result
+
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        self.assertTrue(breaker.allow(probe=lambda: probe(True)))
+
+        # Two consecutive failures open the circuit, requests are rejected without a probe
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow(probe=lambda: probe(True)))
+        self.assertEqual(probes, [])
+
+        # A failed probe after the reset timeout opens the circuit again
+        time.sleep(0.1)
+        self.assertFalse(breaker.allow(probe=lambda: probe(False)))
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow(probe=lambda: probe(True)))
+
+        time.sleep(0.1)
+        self.assertTrue(breaker.allow(probe=lambda: probe(True)))
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(probes, [False, True])
+
+    def test_failed_probe(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+
+        def probe():
+            raise Exception("Connection refused")
+
+        self.assertFalse(breaker.allow(probe=probe))
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+
+class FakeSession(object):
+    """Returns the status codes of a list as responses and records the requests"""
+
+    def __init__(self, status_codes, healthy=True):
+        self.status_codes = list(status_codes)
+        self.healthy = healthy
+        self.requests = []
+
+    def request(self, method, url, **kwargs):
+        self.requests.append((method, url))
+        status_code = self.status_codes.pop(0)
+        if status_code is None:
+            raise requests.ConnectionError("Connection refused")
+
+        response = requests.Response()
+        response.status_code = status_code
+        response._content = b'{"process_results": []}'
+        return response
+
+    def get(self, url, **kwargs):
+        response = requests.Response()
+        response.status_code = 200 if self.healthy else 503
+        return response
+
+
+class SendRequestTestCase(unittest.TestCase):
+
+    def create_interface(self, status_codes, failures=5):
+        """Create an interface with its own backend guards that sends its requests to a fake session"""
+        config = Config()
+        config.HOST = "http://%s" % self.id()
+        config.BACKEND_RETRIES = 2
+        config.BACKEND_RETRY_BACKOFF = 0
+        config.BACKEND_CIRCUIT_FAILURES = failures
+        config.BACKEND_CIRCUIT_RESET_TIMEOUT = 30
+        config.BACKEND_RATE_LIMIT = None
+
+        iface = GRaaSInterface(config)
+        iface.session = FakeSession(status_codes)
+        return iface
+
+    def test_retry_get(self):
+        for status_code in (502, 503, 504):
+            iface = self.create_interface([status_code, None, 200])
+            r = iface._send_request("GET", iface.base_url + "/locations")
+            self.assertEqual(r.status_code, 200)
+            self.assertEqual(len(iface.session.requests), 3)
+
+        # Other errors are not retried, the last retry is returned
+        iface = self.create_interface([500, 503, 503, 503])
+        self.assertEqual(iface._send_request("GET", iface.base_url + "/locations").status_code, 500)
+        iface = self.create_interface([503, 503, 503, 200])
+        self.assertEqual(iface._send_request("GET", iface.base_url + "/locations").status_code, 503)
+        self.assertEqual(len(iface.session.requests), 3)
+
+    def test_no_retry_post_delete(self):
+        for method in ("POST", "DELETE"):
+            iface = self.create_interface([503, 200])
+            self.assertEqual(iface._send_request(method, iface.base_url + "/locations/LL").status_code, 503)
+            self.assertEqual(len(iface.session.requests), 1)
+
+            iface = self.create_interface([None, 200])
+            self.assertRaises(requests.ConnectionError, iface._send_request, method,
+                              iface.base_url + "/locations/LL")
+            self.assertEqual(len(iface.session.requests), 1)
+
+    def test_open_circuit(self):
+        iface = self.create_interface([200, 200, 503], failures=1)
+        listing_url = iface.base_url + "/locations"
+        status_url = iface.base_url + "/status/user/resource_id"
+
+        self.assertEqual(iface._send_request("GET", listing_url).status_code, 200)
+        self.assertEqual(iface._send_request("GET", status_url).status_code, 200)
+
+        # The failure opens the circuit, the last successful response of the url is returned without a request
+        iface.retries = 0
+        self.assertEqual(iface._send_request("GET", iface.base_url + "/locations/LL/mapsets").status_code, 503)
+        self.assertEqual(iface._send_request("GET", listing_url).status_code, 200)
+        self.assertEqual(len(iface.session.requests), 3)
+
+        # Urls without a successful response, job status requests and other methods fail
+        self.assertRaises(Exception, iface._send_request, "GET", iface.base_url + "/locations/LL/mapsets")
+        self.assertRaises(Exception, iface._send_request, "GET", status_url)
+        self.assertRaises(Exception, iface._send_request, "POST", listing_url)
+        self.assertEqual(len(iface.session.requests), 3)